@@ -1,62 +1,212 @@
-import boto3
-from fastapi import FastAPI, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import FileResponse
-from ultralytics import YOLO
-from PIL import Image
+import asyncio
+import contextlib
+import io
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Response, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 import os
 import uuid
-import traceback
+import hashlib
+import mimetypes
 import torch
 from datetime import datetime
 from fastapi import Path
-import threading
 import json
+import logging
 import time
-import requests
 from urllib.parse import urlparse
+import zipfile
+from typing import Dict, List, Literal, Optional, Tuple
 
 # Import our storage layer
-from storage import get_storage
+from storage import get_storage, CachedStorage
+from storage.pagination import InvalidCursor
+from inference import (get_predict_fn, get_scheduler, get_result_cache, inference_workers,
+                       get_admission_controller, Overloaded)
+from images import (SAVE_LOCAL_IMAGES, decode_image, encode_jpeg, extract_zip_images, make_variant,
+                    variant_path, variant_size)
+from rendering import RENDER_MODE, renderer
+from image_store import get_image_store
+from serving import IMAGE_REDIRECT_TO_S3, negotiate_image_type, presigned_redirect, serve_file
+from executors import SingleFlight, run_cpu, run_io
+from clients import CALLBACK_TIMEOUT, http_session, s3_client, sqs_client
+from transfers import PENDING, UPLOADED, FAILED, UploadQueueFull, get_upload_queue
+from messaging import get_consumer_pool
+import metrics
+from metrics import stage, timed
+from logs import configure_logging, bind, add_correlation, new_request_id, shutdown_logging
+
+configure_logging()
+logger = logging.getLogger("yolo")
+sqs_logger = logging.getLogger("sqs")
 
 # Disable GPU usage
 torch.cuda.is_available = lambda: False
 
-app = FastAPI()
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inference worker processes are spawned once the server is up, never while this
+    # module is imported: spawn re-imports the main module in every worker
+    if inference_pool is not None:
+        await run_io(inference_pool.start)
+        logger.info("✅ %s inference worker processes ready", inference_pool.num_workers)
+    yield
+    # Stop taking SQS messages first; the ones already received still finish
+    if sqs_consumer is not None and sqs_consumer.pool is not None:
+        await run_io(sqs_consumer.pool.stop)
+    if inference_pool is not None:
+        await run_io(inference_pool.shutdown)
+    # Uploads still queued stay spooled and resume on the next start
+    if uploads and not IN_INFERENCE_WORKER:
+        await run_io(uploads.stop)
+    logger.info("👋 Shut down")
+    shutdown_logging()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def correlate_request(request: Request, call_next):
+    """Tag every log line of a request with its X-Request-ID (generated if absent) and echo it back"""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    with bind(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 UPLOAD_DIR = "uploads/original"
 PREDICTED_DIR = "uploads/predicted"
-
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(PREDICTED_DIR, exist_ok=True)
-
-model = YOLO("yolov8n.pt")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# /predictions/label and /predictions/score page sizes
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_PAGE_SIZE = 500
+
+# /predict/batch limits, counted after zip archives are expanded
+BATCH_MAX_FILES = int(os.getenv("PREDICT_BATCH_MAX_FILES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("PREDICT_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+# UPLOAD_DIR/PREDICTED_DIR paths are logical names: the bytes live in a size-bounded,
+# sharded local store that falls back to S3 (same path relative to uploads/) on a miss
+image_store = get_image_store()
+image_flight = SingleFlight()
+
+# INFERENCE_BACKEND picks eager PyTorch, ONNX Runtime or OpenVINO; exported models
+# are created next to the weights on first start and reused afterwards.
+# INFERENCE_WORKERS > 0 moves the model into pinned worker processes.
+# The model is warmed up before the first real request either way.
+predict_batch, MODEL_ID, inference_pool = get_predict_fn()
+logger.info("Model loaded: %s, inference workers: %s", MODEL_ID, inference_workers() or 'in-process')
+
+# Concurrent /predict calls and SQS messages share one micro-batching scheduler,
+# so the model runs one batched forward pass instead of many batch-size-1 passes
+inference_scheduler = get_scheduler(metrics.observe_batches(predict_batch))
+logger.info("Inference batching: max_batch_size=%s, max_wait_ms=%.0f",
+            inference_scheduler.max_batch_size, inference_scheduler.max_wait * 1000)
+
+# Bounded queue in front of the scheduler: /predict gets a fast 503 when it is full or
+# the deadline can't be met, and the SQS consumer stops receiving before that point
+admission = get_admission_controller()
+logger.info("Admission control: max_pending=%s, deadline=%ss", admission.max_pending, admission.deadline_seconds)
+metrics.register_admission(admission)
+
+
+def render_jpeg(frame, detections, pipeline: str) -> bytes:
+    """Draw the detections into the frame and JPEG-encode it, timing each step"""
+    with stage(pipeline, "render"):
+        annotated = renderer.draw(frame, detections)
+    with stage(pipeline, "encode"):
+        return encode_jpeg(annotated)
+
+
+def extract_detections(result):
+    """Convert a YOLO result's boxes into storage detection dicts"""
+    detections = []
+    for box in result.boxes:
+        label_idx = int(box.cls[0].item())
+        detections.append({
+            "label": result.names[label_idx],
+            "score": float(box.conf[0]),
+            "box": box.xyxy[0].tolist()
+        })
+    return detections
 
 bucket_name = os.getenv("S3_BUCKET_NAME")
-print("[YOLO] Using S3 bucket:", bucket_name)
+logger.info("Using S3 bucket: %s", bucket_name)
 
 # Initialize storage on startup and log the configuration
-print(f"[YOLO] Storage Configuration:")
-print(f"[YOLO] STORAGE_TYPE: {os.getenv('STORAGE_TYPE', 'NOT_SET')}")
-print(f"[YOLO] DYNAMODB_TABLE: {os.getenv('DYNAMODB_TABLE', 'NOT_SET')}")
-print(f"[YOLO] AWS_DEFAULT_REGION: {os.getenv('AWS_DEFAULT_REGION', 'NOT_SET')}")
-print(f"[YOLO] ENVIRONMENT: {os.getenv('ENVIRONMENT', 'NOT_SET')}")
+logger.info("Storage Configuration:")
+logger.info("STORAGE_TYPE: %s", os.getenv('STORAGE_TYPE', 'NOT_SET'))
+logger.info("DYNAMODB_TABLE: %s", os.getenv('DYNAMODB_TABLE', 'NOT_SET'))
+logger.info("AWS_DEFAULT_REGION: %s", os.getenv('AWS_DEFAULT_REGION', 'NOT_SET'))
+logger.info("ENVIRONMENT: %s", os.getenv('ENVIRONMENT', 'NOT_SET'))
 
 try:
     storage = get_storage()
-    print(f"[YOLO] ✅ Storage initialized: {type(storage).__name__}")
+    logger.info("✅ Storage initialized: %s", type(storage).__name__)
+    if isinstance(storage, CachedStorage):
+        logger.info("Read cache in front of %s: %s entries",
+                    type(storage.backend).__name__, storage.predictions.max_entries)
     if hasattr(storage, 'table_name'):
-        print(f"[YOLO] DynamoDB table: {storage.table_name}")
+        logger.info("DynamoDB table: %s", storage.table_name)
     elif hasattr(storage, 'db_path'):
-        print(f"[YOLO] SQLite database: {storage.db_path}")
+        logger.info("SQLite database: %s", storage.db_path)
 except Exception as e:
-    print(f"[YOLO] ❌ Storage initialization failed: {e}")
+    logger.error("❌ Storage initialization failed: %s", e)
     raise
 
+# Latency per backend method goes to /metrics; timing the backend (not the cache) shows real I/O
+metrics.instrument_storage(storage.backend if isinstance(storage, CachedStorage) else storage)
+
+# Identical images (same bytes, same model and inference settings) reuse an earlier result
+result_cache = get_result_cache(MODEL_ID, storage)
+
+# S3 uploads run in the background from a local spool; the storage record tracks their status
+uploads = get_upload_queue(on_complete=storage.set_upload_status)
+# `python app.py` makes this module __main__, which inference workers re-import as
+# __mp_main__; they must not run the uploader or the SQS consumers themselves
+IN_INFERENCE_WORKER = __name__ == "__mp_main__"
+if uploads and not IN_INFERENCE_WORKER:
+    recovered = uploads.start()
+    metrics.register_uploads(uploads)
+    logger.info("Background uploads: %s workers, %s spooled uploads resumed", uploads.num_workers, recovered)
+
+
+def upload_images(uid: Optional[str], files, pipeline: str) -> None:
+    """
+    Hand a prediction's (s3_key, bytes) files to the background upload queue, or
+    upload them inline when background uploads are disabled or the queue is full.
+    Call after the prediction is stored with upload_status="pending"; its status
+    changes once the files are up. Images derived later (lazy renders, variants)
+    pass uid=None: their uploads leave the prediction's status alone.
+    """
+    if uploads:
+        try:
+            with stage(pipeline, "upload_spool"):
+                uploads.submit(uid, bucket_name, files)
+            return
+        except UploadQueueFull as e:
+            logger.warning("⚠️ Upload queue full (%s), uploading inline", e)
+
+    status = UPLOADED
+    with stage(pipeline, "s3_upload"):
+        for key, data in files:
+            try:
+                s3_client().upload_fileobj(io.BytesIO(data), bucket_name, key)
+            except Exception as e:
+                logger.warning("⚠️ Failed to upload s3://%s/%s: %s", bucket_name, key, e)
+                status = FAILED
+    if uid is not None:
+        storage.set_upload_status(uid, status)
+
 
 class SQSConsumer:
     def __init__(self):
-        self.sqs = boto3.client('sqs', region_name='us-east-2')
-        self.s3 = boto3.client('s3', region_name='us-east-2')
+        # Shared, pooled clients; SQS_ENDPOINT_URL can point SQS at a local stand-in (e.g. ElasticMQ)
+        self.sqs = sqs_client()
+        self.s3 = s3_client()
 
         # Determine which queue to use based on environment
         env = os.getenv('ENVIRONMENT', 'dev').lower()
@@ -68,46 +218,82 @@ class SQSConsumer:
         try:
             response = self.sqs.get_queue_url(QueueName=self.queue_name)
             self.queue_url = response['QueueUrl']
-            print(f"[SQS] ✅ Using queue: {self.queue_name}")
-            print(f"[SQS] Queue URL: {self.queue_url}")
+            sqs_logger.info("✅ Using queue: %s", self.queue_name)
+            sqs_logger.info("Queue URL: %s", self.queue_url)
         except Exception as e:
-            print(f"[SQS] ❌ Failed to get queue URL: {e}")
+            sqs_logger.error("❌ Failed to get queue URL: %s", e)
             self.queue_url = None
+        self.pool = None
 
-    def download_from_s3(self, s3_url, local_path):
-        """Download image from S3 URL to local path"""
+    def fetch_from_s3(self, s3_url):
+        """Read an image from an S3 URL into memory; returns the bytes or None"""
         try:
             # Parse s3://bucket/key format
             if not s3_url.startswith('s3://'):
-                print(f"[SQS] ❌ Invalid S3 URL format: {s3_url}")
-                return False
+                sqs_logger.error("❌ Invalid S3 URL format: %s", s3_url)
+                return None
 
             parsed = urlparse(s3_url)
             bucket = parsed.netloc
             key = parsed.path.lstrip('/')
 
-            print(f"[SQS] 📥 Downloading s3://{bucket}/{key} to {local_path}")
+            sqs_logger.debug("📥 Fetching s3://%s/%s", bucket, key)
 
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            self.s3.download_file(bucket, key, local_path)
-            print(f"[SQS] ✅ Download successful")
-            return True
+            response = self.s3.get_object(Bucket=bucket, Key=key)
+            data = response['Body'].read()
+            sqs_logger.debug("✅ Fetched %s bytes", len(data))
+            return data
 
         except Exception as e:
-            print(f"[SQS] ❌ S3 download failed: {e}")
-            return False
+            sqs_logger.error("❌ S3 download failed: %s", e)
+            return None
 
     def send_result_to_polybot(self, callback_url, result_data):
         """Send processing result back to Polybot service"""
         try:
-            print(f"[SQS] 📤 Sending result to Polybot: {callback_url}")
-            response = requests.post(callback_url, json=result_data, timeout=30)
-            print(f"[SQS] ✅ Result sent, status: {response.status_code}")
+            sqs_logger.debug("📤 Sending result to Polybot: %s", callback_url)
+            response = http_session().post(callback_url, json=result_data, timeout=CALLBACK_TIMEOUT)
+            sqs_logger.debug("✅ Result sent, status: %s", response.status_code)
             return response.status_code == 200
         except Exception as e:
-            print(f"[SQS] ❌ Failed to send result to Polybot: {e}")
+            sqs_logger.error("❌ Failed to send result to Polybot: %s", e)
             return False
 
+    def detect_and_save(self, image_bytes, original_path, chat_id, prediction_id):
+        """Run YOLO on an in-memory image, upload the annotated image and store the detections"""
+        sqs_logger.debug("🔍 Running YOLO detection...")
+        with stage("sqs", "decode"):
+            frame = decode_image(image_bytes)
+        # SQS work is never shed here; the consumer pauses receiving when the queue is deep instead
+        with stage("sqs", "inference"), admission.slot(force=True):
+            result = inference_scheduler.predict(frame)
+
+        # Create annotated image
+        detections = extract_detections(result)
+        predicted_bytes = render_jpeg(result.orig_img, detections, "sqs")
+
+        user_id = chat_id
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        predicted_filename = f"{user_id}/{timestamp}_predicted.jpg"
+        predicted_path = os.path.join(PREDICTED_DIR, predicted_filename)
+
+        # Keep predicted image for API access (the image store evicts it when over budget)
+        if SAVE_LOCAL_IMAGES:
+            with stage("sqs", "save_local"):
+                image_store.save(predicted_path, predicted_bytes)
+            sqs_logger.debug("💾 Predicted image saved: %s", predicted_path)
+
+        # Save prediction and all detections in one storage write
+        with stage("sqs", "storage_write"):
+            storage.save_prediction_with_detections(prediction_id, original_path, predicted_path, detections,
+                                                    upload_status=PENDING)
+
+        # The worker moves on to the next message while the predicted image uploads
+        s3_key = f"predicted/{user_id}/{timestamp}_predicted.jpg"
+        upload_images(prediction_id, [(s3_key, predicted_bytes)], "sqs")
+
+        return predicted_path, detections
+
     def process_yolo_request(self, message_data):
         """Process YOLO request from SQS message"""
         try:
@@ -115,12 +301,16 @@ class SQSConsumer:
             image_url = message_data['image_url']
             prediction_id = message_data['prediction_id']
             callback_url = message_data.get('callback_url')
+            add_correlation(prediction_id=prediction_id, chat_id=chat_id)
 
-            print(f"[SQS] 🔄 Processing YOLO request: {prediction_id[:8]} for chat {chat_id}")
+            sqs_logger.info("🔄 Processing YOLO request: %s for chat %s", prediction_id[:8], chat_id)
 
-            # Download image from S3
+            # Fetch image from S3 into memory
             local_path = os.path.join(UPLOAD_DIR, f"{prediction_id}.jpg")
-            if not self.download_from_s3(image_url, local_path):
+            started = time.perf_counter()
+            with stage("sqs", "s3_fetch"):
+                image_bytes = self.fetch_from_s3(image_url)
+            if image_bytes is None:
                 if callback_url:
                     self.send_result_to_polybot(callback_url, {
                         'chat_id': chat_id,
@@ -132,46 +322,25 @@ class SQSConsumer:
 
             # Process with YOLO
             try:
-                print(f"[SQS] 🔍 Running YOLO detection...")
-                results = model(local_path, device="cpu")
-
-                # Create annotated image
-                annotated_frame = results[0].plot()
-                annotated_image = Image.fromarray(annotated_frame)
-
-                # Save predicted image
-                user_id = chat_id
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                predicted_filename = f"{user_id}/{timestamp}_predicted.jpg"
-                predicted_path = os.path.join(PREDICTED_DIR, predicted_filename)
-
-                os.makedirs(os.path.dirname(predicted_path), exist_ok=True)
-                annotated_image.save(predicted_path)
-                print(f"[SQS] 💾 Predicted image saved: {predicted_path}")
-
-                # Save to storage
-                storage.save_prediction(prediction_id, local_path, predicted_path)
-
-                # Extract and save detections
-                detected_labels = []
-                for box in results[0].boxes:
-                    label_idx = int(box.cls[0].item())
-                    label = model.names[label_idx]
-                    score = float(box.conf[0])
-                    bbox = box.xyxy[0].tolist()
-
-                    storage.save_detection(prediction_id, label, score, bbox)
-                    detected_labels.append(label)
-
-                print(f"[SQS] ✅ Detected {len(detected_labels)} objects: {detected_labels}")
-
-                # Upload predicted image to S3
-                try:
-                    s3_key = f"predicted/{user_id}/{timestamp}_predicted.jpg"
-                    self.s3.upload_file(predicted_path, bucket_name, s3_key)
-                    print(f"[SQS] ✅ Uploaded predicted image to S3: {s3_key}")
-                except Exception as e:
-                    print(f"[SQS] ⚠️ Failed to upload predicted image to S3: {e}")
+                with stage("sqs", "cache_lookup"):
+                    content_hash = hashlib.sha256(image_bytes).hexdigest()
+                    cached = result_cache.lookup(content_hash) if result_cache else None
+
+                if cached:
+                    sqs_logger.info("♻️ Duplicate image, reusing detections from %s", cached['prediction_uid'][:8])
+                    predicted_path = cached["predicted_image"]
+                    detections = cached["detections"]
+                    # Point at the earlier prediction's images, which are already stored
+                    with stage("sqs", "storage_write"):
+                        storage.save_prediction_with_detections(prediction_id, cached["original_image"],
+                                                                predicted_path, detections)
+                else:
+                    predicted_path, detections = self.detect_and_save(image_bytes, local_path, chat_id, prediction_id)
+                    if result_cache:
+                        result_cache.store(content_hash, prediction_id, detections, local_path, predicted_path)
+
+                detected_labels = [d["label"] for d in detections]
+                sqs_logger.debug("✅ Detected %s objects: %s", len(detected_labels), detected_labels)
 
                 # Send result back to Polybot
                 if callback_url:
@@ -181,13 +350,15 @@ class SQSConsumer:
                         'status': 'success',
                         'labels': detected_labels
                     }
-                    self.send_result_to_polybot(callback_url, result_data)
+                    with stage("sqs", "callback"):
+                        self.send_result_to_polybot(callback_url, result_data)
 
-                print(f"[SQS] ✅ YOLO processing complete for {prediction_id[:8]}")
+                metrics.observe_stage("sqs", "total", time.perf_counter() - started)
+                sqs_logger.info("✅ YOLO processing complete with %s detections", len(detected_labels),
+                                extra={"fields": {"labels": detected_labels}})
 
             except Exception as e:
-                print(f"[SQS] ❌ YOLO processing failed: {e}")
-                traceback.print_exc()
+                sqs_logger.exception("❌ YOLO processing failed: %s", e)
 
                 if callback_url:
                     self.send_result_to_polybot(callback_url, {
@@ -198,213 +369,373 @@ class SQSConsumer:
                     })
                 return False
 
-            # Cleanup local files
-            try:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                if os.path.exists(predicted_path):
-                    # Keep predicted image for API access, don't delete
-                    pass
-            except Exception as e:
-                print(f"[SQS] ⚠️ Cleanup warning: {e}")
-
             return True
 
         except Exception as e:
-            print(f"[SQS] ❌ Failed to process YOLO request: {e}")
-            traceback.print_exc()
+            sqs_logger.exception("❌ Failed to process YOLO request: %s", e)
             return False
 
+    def handle_message(self, message):
+        """Route a single SQS message; returns True when it should be deleted"""
+        with bind(message_id=message.get('MessageId')):
+            return self._route_message(message)
+
+    def _route_message(self, message):
+        message_body = message['Body']
+        message_attributes = message.get('MessageAttributes', {})
+
+        sqs_logger.debug("📨 Received message: %s...", message_body[:100])
+
+        # Check if this is a YOLO request
+        message_type = message_attributes.get('MessageType', {}).get('StringValue')
+
+        if message_type == 'yolo_request':
+            sqs_logger.debug("🎯 Processing YOLO request message")
+            message_data = json.loads(message_body)
+
+            if self.process_yolo_request(message_data):
+                return True
+            sqs_logger.error("❌ Message processing failed, will retry later")
+            return False
+
+        # Not a YOLO request, check if it has 'type' field
+        try:
+            parsed_message = json.loads(message_body)
+        except json.JSONDecodeError:
+            sqs_logger.warning("⚠️ Invalid JSON message, deleting")
+            return True
+
+        if parsed_message.get('type') == 'yolo_request':
+            sqs_logger.debug("🎯 Processing YOLO request (type field)")
+            if self.process_yolo_request(parsed_message):
+                return True
+            sqs_logger.error("❌ Message processing failed, will retry later")
+            return False
+
+        # Not a YOLO message, delete it to avoid clogging
+        sqs_logger.info("ℹ️ Ignoring non-YOLO message: %s", parsed_message.get('type', 'unknown'))
+        return True
+
     def start_consuming(self):
-        """Start consuming messages from SQS queue"""
+        """Start the SQS consumer pool in background threads"""
         if not self.queue_url:
-            print("[SQS] ❌ Queue URL not available, skipping SQS consumer")
+            sqs_logger.error("❌ Queue URL not available, skipping SQS consumer")
             return
 
-        print(f"[SQS] 🎯 Starting SQS consumer for {self.queue_name}")
-
-        while True:
-            try:
-                # Receive messages from SQS
-                response = self.sqs.receive_message(
-                    QueueUrl=self.queue_url,
-                    MaxNumberOfMessages=1,
-                    WaitTimeSeconds=20,  # Long polling
-                    MessageAttributeNames=['All'],
-                    VisibilityTimeout=300  # ✅ FIXED: Changed from VisibilityTimeoutSeconds
-                )
-
-                messages = response.get('Messages', [])
-
-                if not messages:
-                    print("[SQS] ⏳ No messages in queue...")
-                    continue
-
-                for message in messages:
-                    try:
-                        message_body = message['Body']
-                        receipt_handle = message['ReceiptHandle']
-                        message_attributes = message.get('MessageAttributes', {})
-
-                        print(f"[SQS] 📨 Received message: {message_body[:100]}...")
-
-                        # Check if this is a YOLO request
-                        message_type = message_attributes.get('MessageType', {}).get('StringValue')
-
-                        if message_type == 'yolo_request':
-                            print("[SQS] 🎯 Processing YOLO request message")
-                            message_data = json.loads(message_body)
-
-                            if self.process_yolo_request(message_data):
-                                # Delete message after successful processing
-                                self.sqs.delete_message(
-                                    QueueUrl=self.queue_url,
-                                    ReceiptHandle=receipt_handle
-                                )
-                                print("[SQS] ✅ Message processed and deleted")
-                            else:
-                                print("[SQS] ❌ Message processing failed, will retry later")
-                        else:
-                            # Not a YOLO request, check if it has 'type' field
-                            try:
-                                parsed_message = json.loads(message_body)
-                                if parsed_message.get('type') == 'yolo_request':
-                                    print("[SQS] 🎯 Processing YOLO request (type field)")
-                                    if self.process_yolo_request(parsed_message):
-                                        self.sqs.delete_message(
-                                            QueueUrl=self.queue_url,
-                                            ReceiptHandle=receipt_handle
-                                        )
-                                        print("[SQS] ✅ Message processed and deleted")
-                                    else:
-                                        print("[SQS] ❌ Message processing failed, will retry later")
-                                else:
-                                    # Not a YOLO message, delete it to avoid clogging
-                                    print(
-                                        f"[SQS] ℹ️ Ignoring non-YOLO message: {parsed_message.get('type', 'unknown')}")
-                                    self.sqs.delete_message(
-                                        QueueUrl=self.queue_url,
-                                        ReceiptHandle=receipt_handle
-                                    )
-                            except json.JSONDecodeError:
-                                print("[SQS] ⚠️ Invalid JSON message, deleting")
-                                self.sqs.delete_message(
-                                    QueueUrl=self.queue_url,
-                                    ReceiptHandle=receipt_handle
-                                )
-
-                    except Exception as e:
-                        print(f"[SQS] ❌ Error processing individual message: {e}")
-                        traceback.print_exc()
-
-            except KeyboardInterrupt:
-                print("[SQS] 🛑 Stopping SQS consumer...")
-                break
-            except Exception as e:
-                print(f"[SQS] ❌ SQS consumer error: {e}")
-                time.sleep(5)  # Wait before retrying
+        sqs_logger.info("🎯 Starting SQS consumer for %s", self.queue_name)
+        self.pool = get_consumer_pool(self.sqs, self.queue_url, self.handle_message,
+                                      should_pause=admission.should_pause,
+                                      on_complete=metrics.observe_sqs_message)
+        self.pool.start()
+        sqs_logger.info("Consumer pool: %s workers, batch size %s, up to %s messages in flight",
+                        self.pool.num_workers, self.pool.batch_size, self.pool.capacity)
 
 
-def start_sqs_consumer():
-    """Start SQS consumer in background thread"""
+def start_sqs_consumer() -> Optional[SQSConsumer]:
+    """Start SQS consumer pool in background threads; returns the consumer, or None if it failed to start"""
     try:
         consumer = SQSConsumer()
-        consumer_thread = threading.Thread(target=consumer.start_consuming, daemon=True)
-        consumer_thread.start()
-        print("[SQS] ✅ SQS consumer started in background thread")
+        consumer.start_consuming()
+        sqs_logger.info("✅ SQS consumer started in background threads")
+        return consumer
     except Exception as e:
-        print(f"[SQS] ❌ Failed to start SQS consumer: {e}")
+        sqs_logger.error("❌ Failed to start SQS consumer: %s", e)
+        return None
+
+
+async def read_upload(file: UploadFile, hasher=None) -> bytes:
+    """Read an upload chunk by chunk into memory, optionally hashing it on the way"""
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if hasher is not None:
+            hasher.update(chunk)
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def request_deadline(request: Request) -> float:
+    """Seconds this request may wait for inference: PREDICT_DEADLINE_SECONDS, or less via X-Request-Timeout"""
+    deadline = admission.deadline_seconds
+    try:
+        return min(deadline, float(request.headers.get("X-Request-Timeout", deadline)))
+    except ValueError:
+        return deadline
+
+
+async def admitted_inference(image_bytes: bytes, ticket, deadline: float):
+    """Decode and run inference in an admission slot, giving up once the deadline passes"""
+    try:
+        # Decode once; the model gets the array instead of re-reading a file from disk
+        frame = await timed("http", "decode", run_cpu(decode_image, image_bytes))
+        remaining = max(0.0, deadline - (time.monotonic() - ticket[0]))
+        # Cancelling on timeout also drops the request from the scheduler's queue
+        result = await timed("http", "inference", asyncio.wait_for(
+            asyncio.wrap_future(inference_scheduler.submit(frame)), remaining))
+    except asyncio.TimeoutError:
+        admission.release(ticket, completed=False, timed_out=True)
+        raise Overloaded(f"inference did not finish within {deadline:.1f}s", admission.retry_after())
+    except BaseException:
+        admission.release(ticket, completed=False)
+        raise
+    admission.release(ticket)
+    return result
+
+
+async def detect_image(image_bytes: bytes, content_hash: str, user_id: str, stem: str, deadline: float,
+                       render: str = "eager") -> Dict:
+    """
+    Run one image through the result cache or the model and render its annotated copy
+    now, after the response via finish_render(), or lazily on its first request.
+    Returns the prediction record for store_predictions(); raises Overloaded when shed.
+    """
+    uid = str(uuid.uuid4())
+    add_correlation(prediction_id=uid)
+    record = {
+        "uid": uid,
+        "content_hash": content_hash,
+        "original_image": os.path.join(UPLOAD_DIR, f"{user_id}/{stem}.jpg"),
+        "predicted_image": os.path.join(PREDICTED_DIR, f"{user_id}/{stem}_predicted.jpg"),
+        "cached": False,
+        "uploads": [],
+    }
+
+    cached = await timed("http", "cache_lookup", run_io(result_cache.lookup, content_hash)) if result_cache else None
+    if cached:
+        # Same bytes were already processed: skip the model, rendering and both S3 uploads
+        # by pointing the record at the earlier prediction's original and annotated images
+        logger.info("♻️ Duplicate image, reusing result of %s", cached['prediction_uid'])
+        record.update(cached=True, detections=cached["detections"], original_image=cached["original_image"],
+                      predicted_image=cached["predicted_image"])
+        return record
+
+    # Shed load before doing any work: raises Overloaded when the queue is full
+    # or the estimated wait already exceeds this request's deadline
+    ticket = admission.admit(deadline)
+
+    # Optionally keep a local copy of the original while YOLO runs on it
+    logger.debug("Running YOLO detection")
+    pending = [admitted_inference(image_bytes, ticket, deadline)]
+    if SAVE_LOCAL_IMAGES:
+        pending.append(timed("http", "save_local", run_io(image_store.save, record["original_image"], image_bytes)))
+    result, *_ = await asyncio.gather(*pending)
+    logger.debug("Completed YOLO detection")
+
+    record["detections"] = extract_detections(result)
+    record["uploads"] = [(f"original/{user_id}/{stem}.jpg", image_bytes)]
+    predicted_s3_key = f"predicted/{user_id}/{stem}_predicted.jpg"
+    if render == "eager":
+        predicted_bytes = await run_cpu(render_jpeg, result.orig_img, record["detections"], "http")
+        logger.debug("Rendered predicted image (%s bytes)", len(predicted_bytes))
+        if SAVE_LOCAL_IMAGES:
+            await timed("http", "save_local", run_io(image_store.save, record["predicted_image"], predicted_bytes))
+        record["uploads"].append((predicted_s3_key, predicted_bytes))
+    elif render == "deferred":
+        record["deferred_render"] = (result.orig_img, predicted_s3_key)
+    else:
+        record["lazy_render"] = True
+    return record
+
+
+def finish_render(record: Dict) -> None:
+    """Render, save and upload the annotated image of a render=deferred prediction once the response is sent"""
+    frame, predicted_s3_key = record.pop("deferred_render")
+    predicted_bytes = render_jpeg(frame, record["detections"], "http")
+    if SAVE_LOCAL_IMAGES:
+        image_store.save(record["predicted_image"], predicted_bytes)
+    # The original waited for this, so one upload status covers both images
+    upload_images(record["uid"], record["uploads"] + [(predicted_s3_key, predicted_bytes)], "http")
+
+
+def store_predictions(records: List[Dict]) -> None:
+    """Write prediction records in one storage call, then queue their S3 uploads"""
+    for r in records:
+        if r["uploads"] or "deferred_render" in r:
+            r["upload_status"] = PENDING
+    with stage("http", "storage_write"):
+        if len(records) == 1:
+            r = records[0]
+            storage.save_prediction_with_detections(r["uid"], r["original_image"], r["predicted_image"],
+                                                    r["detections"], r.get("upload_status"))
+        else:
+            storage.save_predictions_with_detections(records)
+        for r in records:
+            if r.get("lazy_render"):
+                # Lets /image/predicted/... draw the image on its first request too
+                storage.save_image_prediction(r["predicted_image"], r["uid"])
+        if result_cache:
+            for r in records:
+                if not r["cached"]:
+                    result_cache.store(r["content_hash"], r["uid"], r["detections"], r["original_image"],
+                                       r["predicted_image"])
+    # Images go to S3 in the background; the response doesn't wait for them.
+    # render=deferred predictions upload from finish_render() instead
+    for r in records:
+        if r["uploads"] and "deferred_render" not in r:
+            upload_images(r["uid"], r["uploads"], "http")
+
+
+def prediction_summary(record: Dict) -> Dict:
+    labels = [d["label"] for d in record["detections"]]
+    return {"prediction_uid": record["uid"], "detection_count": len(labels), "labels": labels}
 
 
 @app.post("/predict")
-def predict(request: Request, file: UploadFile = File(...)):
-    print(f"[YOLO] Incoming /predict with file: {file.filename}")
-    print(f"[YOLO] Using storage: {type(storage).__name__}")
+async def predict(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                  render: Literal["lazy", "eager", "deferred"] = RENDER_MODE):
+    logger.debug("Incoming /predict with file: %s", file.filename)
+    logger.debug("Using storage: %s", type(storage).__name__)
 
+    started = time.perf_counter()
     try:
-        s3 = boto3.client('s3')
-        ext = os.path.splitext(file.filename)[1] or ".jpg"
-        uid = str(uuid.uuid4())
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
         # Get user ID from the request if available
         user_id = request.headers.get('X-User-ID', 'unknown')
 
-        original_filename = f"{user_id}/{timestamp}.jpg"
-        predicted_filename = f"{user_id}/{timestamp}_predicted.jpg"
-        original_path = os.path.join(UPLOAD_DIR, original_filename)
-        predicted_path = os.path.join(PREDICTED_DIR, predicted_filename)
-
-        # Create directories if they don't exist
-        os.makedirs(os.path.dirname(original_path), exist_ok=True)
-        os.makedirs(os.path.dirname(predicted_path), exist_ok=True)
-
-        print(f"[YOLO] Will save original image to: {original_path}")
-        print(f"[YOLO] Will save predicted image to: {predicted_path}")
-
-        # Save uploaded file locally
-        print(f"[YOLO] Reading uploaded file...")
-        file_content = file.file.read()
-        print(f"[YOLO] Read {len(file_content)} bytes from uploaded file")
-
-        print(f"[YOLO] Writing file to {original_path}")
-        with open(original_path, "wb") as f:
-            f.write(file_content)
-        print(f"[YOLO] Successfully saved original image")
-
-        # Upload original image to S3
-        original_s3_key = f"original/{user_id}/{timestamp}.jpg"
-        predicted_s3_key = f"predicted/{user_id}/{timestamp}_predicted.jpg"
-        print(f"[YOLO] Uploading original image to s3://{bucket_name}/{original_s3_key}")
-        s3.upload_file(original_path, bucket_name, original_s3_key)
-        print(f"[YOLO] Successfully uploaded original image to S3")
-
-        # Run YOLO detection
-        print(f"[YOLO] Running YOLO detection on {original_path}")
-        results = model(original_path, device="cpu")
-        print(f"[YOLO] YOLO detection completed")
-
-        annotated_frame = results[0].plot()
-        annotated_image = Image.fromarray(annotated_frame)
-        print(f"[YOLO] Saving predicted image to {predicted_path}")
-        annotated_image.save(predicted_path)
-        print(f"[YOLO] Successfully saved predicted image")
-
-        # Save prediction session using storage layer
-        print(f"[YOLO] Saving prediction to {type(storage).__name__}")
-        storage.save_prediction(uid, original_path, predicted_path)
-        print(f"[YOLO] Successfully saved prediction session")
-
-        detected_labels = []
-        for box in results[0].boxes:
-            label_idx = int(box.cls[0].item())
-            label = model.names[label_idx]
-            score = float(box.conf[0])
-            bbox = box.xyxy[0].tolist()
-
-            # Save detection using storage layer
-            print(f"[YOLO] Saving detection: {label} (score: {score:.2f})")
-            storage.save_detection(uid, label, score, bbox)
-            detected_labels.append(label)
-
-        print(f"[YOLO] Successfully saved {len(detected_labels)} detections")
-
-        print(f"[YOLO] Uploading predicted image to s3://{bucket_name}/{predicted_s3_key}")
-        s3.upload_file(predicted_path, bucket_name, predicted_s3_key)
-        print(f"[YOLO] Successfully uploaded predicted image to S3")
-
-        return {
-            "prediction_uid": uid,
-            "detection_count": len(detected_labels),
-            "labels": detected_labels
-        }
-
+        # Read the upload into memory, hashing it on the way for the result cache
+        hasher = hashlib.sha256()
+        with stage("http", "read_upload"):
+            image_bytes = await read_upload(file, hasher)
+        logger.debug("Read %s bytes from uploaded file", len(image_bytes))
+
+        record = await detect_image(image_bytes, hasher.hexdigest(), user_id, timestamp, request_deadline(request),
+                                    render)
+        logger.debug("Saving prediction to %s and queueing uploads to s3://%s", type(storage).__name__, bucket_name)
+        await run_io(store_predictions, [record])
+        if "deferred_render" in record:
+            background_tasks.add_task(finish_render, record)
+        metrics.observe_stage("http", "total", time.perf_counter() - started)
+
+        summary = prediction_summary(record)
+        if not record["cached"]:
+            logger.info("✅ Prediction complete with %s detections", summary["detection_count"],
+                        extra={"fields": {"labels": summary["labels"]}})
+        return summary
+
+    except Overloaded as e:
+        logger.warning("⚠️ Shedding /predict: %s (retry after %ss)", e.reason, e.retry_after)
+        raise HTTPException(status_code=503, detail=f"Server overloaded: {e.reason}",
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        print("[YOLO ERROR]", str(e))
-        traceback.print_exc()
+        logger.exception("❌ Prediction failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
 
+async def read_batch(files: List[UploadFile]) -> List[Tuple[str, bytes]]:
+    """Read every uploaded image, expanding zip archives, as (filename, bytes) pairs"""
+    items = []
+    total_bytes = 0
+    for file in files:
+        data = await read_upload(file)
+        if file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip"):
+            try:
+                members = await run_io(extract_zip_images, data, BATCH_MAX_FILES - len(items),
+                                       BATCH_MAX_BYTES - total_bytes)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid zip archive")
+            except ValueError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            items.extend(members)
+            total_bytes += sum(len(member) for _, member in members)
+        else:
+            items.append((file.filename, data))
+            total_bytes += len(data)
+        if len(items) > BATCH_MAX_FILES or total_bytes > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_FILES} images "
+                                                        f"or {BATCH_MAX_BYTES} bytes")
+    return items
+
+
+@app.post("/predict/batch")
+async def predict_many(request: Request, background_tasks: BackgroundTasks, files: List[UploadFile] = File(...),
+                       stream: bool = False, render: Literal["lazy", "eager", "deferred"] = RENDER_MODE):
+    """
+    Predict every uploaded image (or every image in uploaded zip archives) in one request.
+
+    Images share the micro-batching scheduler, so they run as full batches. Results are
+    per image, with failures reported per item; stream=true returns them as NDJSON lines
+    in completion order, otherwise one JSON body in upload order after a single bulk write.
+    render works as for /predict.
+    """
+    started = time.perf_counter()
+    user_id = request.headers.get('X-User-ID', 'unknown')
+    deadline = request_deadline(request)
+    # Batch images share a timestamp, so an ID keeps their file names apart from other batches
+    prefix = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    with stage("http", "read_upload"):
+        items = await read_batch(files)
+    if not items:
+        raise HTTPException(status_code=400, detail="No images in request")
+    logger.info("📦 Batch prediction of %s images", len(items))
+
+    # Enough images in flight to fill the scheduler's batches without flooding admission control
+    in_flight = asyncio.Semaphore(inference_scheduler.max_batch_size)
+
+    async def detect(index: int, filename: str, image_bytes: bytes):
+        item = {"index": index, "filename": filename}
+        async with in_flight:
+            try:
+                content_hash = hashlib.sha256(image_bytes).hexdigest()
+                return item, await detect_image(image_bytes, content_hash, user_id, f"{prefix}_{index}", deadline,
+                                                render)
+            except Overloaded as e:
+                item.update(error=f"Server overloaded: {e.reason}", retry_after=e.retry_after)
+            except Exception as e:
+                logger.warning("⚠️ Batch item %s (%s) failed: %s", index, filename, e)
+                item["error"] = f"Prediction failed: {e}"
+            return item, None
+
+    tasks = [asyncio.ensure_future(detect(i, name, data)) for i, (name, data) in enumerate(items)]
+
+    if stream:
+        async def results():
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    item, record = await next_done
+                    if record is not None:
+                        try:
+                            await run_io(store_predictions, [record])
+                            item.update(prediction_summary(record))
+                            if "deferred_render" in record:
+                                background_tasks.add_task(finish_render, record)
+                        except Exception as e:
+                            logger.exception("❌ Failed to store batch item %s: %s", item["index"], e)
+                            item["error"] = f"Prediction failed: {e}"
+                    yield json.dumps(item) + "\n"
+                metrics.observe_stage("http", "batch_total", time.perf_counter() - started)
+            finally:
+                # The client went away: don't leave images queued for inference
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(results(), media_type="application/x-ndjson")
+
+    done = await asyncio.gather(*tasks)
+    records = [record for _, record in done if record is not None]
+    if records:
+        try:
+            await run_io(store_predictions, records)
+        except Exception as e:
+            logger.exception("❌ Batch storage write failed: %s", e)
+            raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+    results = []
+    for item, record in done:
+        if record is not None:
+            item.update(prediction_summary(record))
+            if "deferred_render" in record:
+                background_tasks.add_task(finish_render, record)
+        results.append(item)
+    failed = sum(1 for item in results if "error" in item)
+    metrics.observe_stage("http", "batch_total", time.perf_counter() - started)
+    logger.info("✅ Batch prediction complete: %s succeeded, %s failed", len(results) - failed, failed)
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+
 @app.get("/prediction/{uid}")
 def get_prediction_by_uid(uid: str):
     result = storage.get_prediction(uid)
@@ -413,52 +744,196 @@ def get_prediction_by_uid(uid: str):
     return result
 
 
-@app.get("/predictions/label/{label}")
-def get_predictions_by_label(label: str):
-    return storage.get_predictions_by_label(label)
+def paginated_predictions(fetch_page, response: Response, limit: int, cursor: Optional[str], format: str):
+    """
+    Serve one page of a prediction query as a JSON list, with the continuation token in the
+    X-Next-Cursor header, or stream every remaining page as NDJSON when format=ndjson.
+    """
+    if format == "ndjson":
+        # Fetch the first page up front so a bad cursor is a 400, not a broken stream
+        try:
+            first_page = fetch_page(NDJSON_PAGE_SIZE, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
+        def export():
+            page = first_page
+            while True:
+                for item in page["items"]:
+                    yield json.dumps(item) + "\n"
+                if page["next_cursor"] is None:
+                    return
+                page = fetch_page(NDJSON_PAGE_SIZE, page["next_cursor"])
 
-@app.get("/predictions/score/{min_score}")
-def get_predictions_by_score(min_score: float = Path(..., ge=0.0, le=1.0)):
-    return storage.get_predictions_by_score(min_score)
+        return StreamingResponse(export(), media_type="application/x-ndjson")
+
+    try:
+        page = fetch_page(limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
 
 
-@app.get("/image/{type}/{filename}")
-def get_image(type: str, filename: str):
+@app.get("/predictions/label/{label}")
+def get_predictions_by_label(label: str, response: Response,
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             cursor: Optional[str] = None,
+                             format: Literal["json", "ndjson"] = "json"):
+    return paginated_predictions(
+        lambda page_limit, page_cursor: storage.get_predictions_by_label_page(label, page_limit, page_cursor),
+        response, limit, cursor, format
+    )
+
+
+@app.get("/predictions/score/{min_score}")
+def get_predictions_by_score(response: Response,
+                             min_score: float = Path(..., ge=0.0, le=1.0),
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             cursor: Optional[str] = None,
+                             format: Literal["json", "ndjson"] = "json"):
+    return paginated_predictions(
+        lambda page_limit, page_cursor: storage.get_predictions_by_score_page(min_score, page_limit, page_cursor),
+        response, limit, cursor, format
+    )
+
+
+async def s3_redirect(path: str, media_type: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+    """Presigned S3 redirect for an image already in the bucket, when IMAGE_REDIRECT_TO_S3 is on"""
+    if not (IMAGE_REDIRECT_TO_S3 and bucket_name):
+        return None
+    if not await run_io(image_store.in_s3, path):
+        return None
+    return presigned_redirect(bucket_name, image_store.key_for(path), media_type, headers)
+
+
+@app.get("/image/{type}/{filename:path}")
+async def get_image(type: str, filename: str, request: Request):
     if type not in ["original", "predicted"]:
         raise HTTPException(status_code=400, detail="Invalid image type")
-    path = os.path.join("uploads", type, filename)
-    if not os.path.exists(path):
+    # filename may name a per-user subdirectory (user/1_predicted.jpg), but never leave its type
+    path = os.path.normpath(os.path.join("uploads", type, filename))
+    if not path.startswith(os.path.join("uploads", type) + os.sep):
+        raise HTTPException(status_code=404, detail="Image not found")
+    redirect = await s3_redirect(path, mimetypes.guess_type(filename)[0])
+    if redirect is not None:
+        return redirect
+    local_path = await image_flight.do(path, run_io, image_store.local_path, path)
+    if not local_path and type == "predicted":
+        # Not drawn yet (render=lazy): render it from its prediction like /prediction/{uid}/image does
+        uid = await run_io(storage.get_prediction_uid_by_image, path)
+        if uid:
+            local_path = await image_flight.do(("predicted", path), predicted_image, uid, path)
+    # Store files have no extension, so the type comes from the requested name
+    media_type = mimetypes.guess_type(filename)[0]
+    response = serve_file(request, local_path, media_type) if local_path else None
+    if response is None:
         raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(path)
+    return response
+
+
+def render_original(image_bytes: bytes, detections) -> bytes:
+    return render_jpeg(decode_image(image_bytes), detections, "lazy")
+
+
+async def predicted_image(uid: str, image_path: str) -> Optional[str]:
+    """
+    Local file of a prediction's annotated image: from the image store (or S3), else drawn
+    now from the original and the stored detections, for predictions stored with render=lazy
+    """
+    local_path = await run_io(image_store.local_path, image_path)
+    if local_path:
+        return local_path
+
+    prediction = await run_io(storage.get_prediction, uid)
+    if prediction is None:
+        return None
+    image_bytes = await timed("lazy", "load_original", run_io(image_store.read, prediction["original_image"]))
+    if image_bytes is None:
+        return None
+    predicted_bytes = await run_cpu(render_original, image_bytes, prediction["detection_objects"])
+    logger.debug("Rendered annotated image on demand (%s bytes)", len(predicted_bytes))
+    await run_io(image_store.save, image_path, predicted_bytes)
+    if bucket_name:
+        # Later requests (and S3 redirects) find it there once this node evicts it
+        await run_io(upload_images, None, [(image_store.key_for(image_path), predicted_bytes)], "lazy")
+    return image_store.local_path(image_path)
+
+
+async def image_variant(uid: str, image_path: str, path: str, size: Optional[int], media_type: str) -> Optional[str]:
+    """
+    Local file of a prediction's annotated image at variant path, made from the full-size
+    image the first time it is asked for and then kept in the image store and S3
+    """
+    # Fetched or rendered once, however many clients ask at the same time
+    full_path = await image_flight.do(("predicted", image_path), predicted_image, uid, image_path)
+    if path == image_path or not full_path:
+        return full_path
+    local_path = await run_io(image_store.local_path, path)
+    if local_path:
+        return local_path
+
+    image_bytes = await run_io(image_store.read, image_path)
+    if image_bytes is None:
+        return None
+    variant_bytes = await timed("variant", "resize", run_cpu(make_variant, image_bytes, size, media_type))
+    logger.debug("Made %s variant at size %s (%s bytes)", media_type, size, len(variant_bytes))
+    await run_io(image_store.save, path, variant_bytes)
+    if bucket_name:
+        await run_io(upload_images, None, [(image_store.key_for(path), variant_bytes)], "variant")
+    return image_store.local_path(path)
 
 
 @app.get("/prediction/{uid}/image")
-def get_prediction_image(uid: str, request: Request):
-    accept = request.headers.get("accept", "")
+async def get_prediction_image(uid: str, request: Request,
+                               size: Optional[int] = Query(None, ge=1, le=10000)):
+    media_type = negotiate_image_type(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(status_code=406, detail="Client does not accept an image format")
 
-    image_path = storage.get_prediction_image_path(uid)
+    image_path = await run_io(storage.get_prediction_image_path, uid)
     if not image_path:
         raise HTTPException(status_code=404, detail="Prediction not found")
 
-    if not os.path.exists(image_path):
+    # Any size is served from the next standard size up, so variants stay few and shared
+    size = variant_size(size)
+    path = variant_path(image_path, size, media_type)
+    # The representation depends on Accept, so shared caches must key on it
+    headers = {"Vary": "Accept"}
+    redirect = await s3_redirect(path, media_type, headers)
+    if redirect is not None:
+        return redirect
+
+    local_path = await image_flight.do(("variant", path), image_variant, uid, image_path, path, size, media_type)
+    response = serve_file(request, local_path, media_type, headers) if local_path else None
+    if response is None:
         raise HTTPException(status_code=404, detail="Predicted image file not found")
+    return response
 
-    if "image/png" in accept:
-        return FileResponse(image_path, media_type="image/png")
-    elif "image/jpeg" in accept or "image/jpg" in accept:
-        return FileResponse(image_path, media_type="image/jpeg")
-    else:
-        raise HTTPException(status_code=406, detail="Client does not accept an image format")
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    status = {"status": "ok", "admission": admission.stats()}
+    if isinstance(storage, CachedStorage):
+        status["storage_cache"] = storage.stats()
+    if result_cache:
+        status["result_cache"] = result_cache.stats()
+    if uploads:
+        status["uploads"] = uploads.stats()
+    status["image_store"] = image_store.stats()
+    return status
 
 
 # Initialize SQS consumer when the app starts
-start_sqs_consumer()
+sqs_consumer = None if IN_INFERENCE_WORKER else start_sqs_consumer()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,118 @@
+"""
+Compare inference backends against the eager PyTorch (.pt) path.
+
+For every backend, reports warm-up time and per-image latency (p50/p99), and
+checks accuracy parity against .pt on the same images: the share of reference
+boxes matched by a box with the same label at IoU >= --iou, plus the mean IoU
+of matched boxes.
+
+Usage:
+    python benchmarks/bench_backends.py --images tests/test_image.jpg --backends onnx openvino --int8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+
+from images import decode_image
+from inference import BACKENDS, load_model, warm_up
+
+torch.cuda.is_available = lambda: False
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def detections(model, frame):
+    result = model(frame, device="cpu", verbose=False)[0]
+    return [(result.names[int(box.cls[0])], box.xyxy[0].tolist()) for box in result.boxes]
+
+
+def parity(reference, candidate, iou_threshold):
+    """Greedy one-to-one matching of candidate boxes to reference boxes with the same label"""
+    matched, ious = 0, []
+    unused = list(candidate)
+    for label, ref_box in reference:
+        best, best_iou = None, 0.0
+        for item in unused:
+            iou = box_iou(ref_box, item[1])
+            if item[0] == label and iou > best_iou:
+                best, best_iou = item, iou
+        if best is not None and best_iou >= iou_threshold:
+            unused.remove(best)
+            matched += 1
+            ious.append(best_iou)
+    return matched, ious
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="+", default=["tests/test_image.jpg"])
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "openvino"], choices=BACKENDS)
+    parser.add_argument("--int8", action="store_true", help="also benchmark INT8-quantized exports")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--iou", type=float, default=0.9)
+    args = parser.parse_args()
+
+    frames = []
+    for path in args.images:
+        with open(path, "rb") as f:
+            frames.append(decode_image(f.read()))
+
+    variants = [("pytorch", False)] + [(backend, False) for backend in args.backends if backend != "pytorch"]
+    if args.int8:
+        variants += [(backend, True) for backend in args.backends if backend != "pytorch"]
+
+    reference = None
+    print(f"images={len(frames)} repeats={args.repeats} imgsz={args.imgsz}")
+    for backend, int8 in variants:
+        name = f"{backend}{'-int8' if int8 else ''}"
+        model = load_model(args.model, backend, imgsz=args.imgsz, int8=int8)
+        warmup = warm_up(model, imgsz=args.imgsz)
+
+        latencies = []
+        for _ in range(args.repeats):
+            for frame in frames:
+                start = time.perf_counter()
+                model(frame, device="cpu", verbose=False)
+                latencies.append(time.perf_counter() - start)
+
+        outputs = [detections(model, frame) for frame in frames]
+        if reference is None:
+            reference = outputs
+            agreement = "reference"
+        else:
+            total = sum(len(r) for r in reference)
+            matched, ious = 0, []
+            for ref, out in zip(reference, outputs):
+                m, i = parity(ref, out, args.iou)
+                matched += m
+                ious += i
+            agreement = (f"label+box agreement={matched}/{total} "
+                         f"mean_iou={np.mean(ious) if ious else 0.0:.3f}")
+
+        print(f"{name:<14} warmup={warmup:6.2f} s  "
+              f"p50={percentile(latencies, 50) * 1000:7.1f} ms  "
+              f"p99={percentile(latencies, 99) * 1000:7.1f} ms  {agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare per-image YOLO inference against the micro-batching scheduler.
+
+Fires N concurrent clients at the model, each sending the same image, and
+reports throughput plus p50/p99 latency for both paths.
+
+Usage:
+    python benchmarks/bench_batching.py --image tests/test_image.jpg --requests 200 --concurrency 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+from ultralytics import YOLO
+
+from inference import BatchScheduler
+
+torch.cuda.is_available = lambda: False
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(name, infer, image, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        start = time.perf_counter()
+        infer(image)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total)))
+    wall = time.perf_counter() - started
+
+    print(f"{name:<12} throughput={total / wall:7.1f} img/s  "
+          f"p50={percentile(latencies, 50) * 1000:7.1f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="tests/test_image.jpg")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=15.0)
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    model(args.image, device="cpu", verbose=False)  # warm-up
+
+    # The per-image path serialises on the model just like the old global model() calls did
+    model_lock = threading.Lock()
+
+    def per_image(image):
+        with model_lock:
+            return model(image, device="cpu", verbose=False)[0]
+
+    scheduler = BatchScheduler(
+        lambda images: model(images, device="cpu", verbose=False),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+
+    print(f"requests={args.requests} concurrency={args.concurrency} "
+          f"max_batch_size={args.max_batch_size} max_wait_ms={args.max_wait_ms}")
+    run("per-image", per_image, args.image, args.requests, args.concurrency)
+    run("batched", scheduler.predict, args.image, args.requests, args.concurrency)
+    scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the per-request overhead saved by sharing AWS/HTTP clients.
+
+Always compares building a fresh boto3 S3 client per request (the old
+/predict behaviour) against reusing the shared client from clients.py; this
+part needs no network. With --bucket, it also times a small put_object per
+request over each client, so the fresh-client numbers include a new TLS
+handshake every time. With --url, it compares bare requests.post against the
+shared keep-alive requests.Session.
+
+Usage:
+    python benchmarks/bench_clients.py --requests 200 [--bucket my-bucket] [--url http://localhost:8081/callback]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import boto3
+import requests
+
+from clients import AWS_REGION, http_session, s3_client
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(name, fn, total):
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    print(f"{name:<28} mean={sum(latencies) / total * 1000:8.2f} ms  "
+          f"p50={percentile(latencies, 50) * 1000:8.2f} ms  p99={percentile(latencies, 99) * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--bucket", help="S3 bucket for put_object timings")
+    parser.add_argument("--url", help="HTTP endpoint for callback POST timings")
+    args = parser.parse_args()
+
+    print(f"requests={args.requests} region={AWS_REGION}")
+    run("client per request", lambda i: boto3.client("s3", region_name=AWS_REGION), args.requests)
+    run("shared client", lambda i: s3_client(), args.requests)
+
+    if args.bucket:
+        body = b"x" * 1024
+        run("put_object, fresh client",
+            lambda i: boto3.client("s3", region_name=AWS_REGION).put_object(
+                Bucket=args.bucket, Key=f"bench/fresh-{i}", Body=body),
+            args.requests)
+        run("put_object, shared client",
+            lambda i: s3_client().put_object(Bucket=args.bucket, Key=f"bench/shared-{i}", Body=body),
+            args.requests)
+
+    if args.url:
+        payload = {"chat_id": "bench", "status": "success", "labels": ["person"]}
+        run("requests.post", lambda i: requests.post(args.url, json=payload, timeout=30), args.requests)
+        run("shared session", lambda i: http_session().post(args.url, json=payload, timeout=30), args.requests)
+
+
+if __name__ == "__main__":
+    main()
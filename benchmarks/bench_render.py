@@ -0,0 +1,90 @@
+"""
+Compare the annotation path before and after the dedicated renderer.
+
+"plot + PIL" is the old hot path: Results.plot() with Ultralytics' annotator,
+then an RGB copy and PIL's JPEG encoder. "renderer + cv2" draws with
+rendering.Renderer into the frame and encodes with OpenCV. Detections are
+synthetic, so no model weights are needed.
+
+Usage:
+    python benchmarks/bench_render.py --image test.jpg --boxes 20 --runs 200
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+from PIL import Image
+from ultralytics.engine.results import Results
+
+from images import JPEG_QUALITY, decode_image, encode_jpeg
+from rendering import Renderer
+
+LABELS = ["person", "car", "dog", "bicycle", "truck", "bus", "cat", "chair"]
+
+
+def synthetic_detections(frame, count, seed=0):
+    rng = random.Random(seed)
+    h, w = frame.shape[:2]
+    detections = []
+    for _ in range(count):
+        x1, y1 = rng.uniform(0, w * 0.8), rng.uniform(0, h * 0.8)
+        x2, y2 = rng.uniform(x1 + 10, w), rng.uniform(y1 + 10, h)
+        detections.append({"label": rng.choice(LABELS), "score": rng.uniform(0.25, 0.99), "box": [x1, y1, x2, y2]})
+    return detections
+
+
+def as_results(frame, detections):
+    names = dict(enumerate(LABELS))
+    boxes = torch.tensor([d["box"] + [d["score"], LABELS.index(d["label"])] for d in detections])
+    return Results(frame, path="bench.jpg", names=names, boxes=boxes)
+
+
+def old_path(frame, detections):
+    annotated = as_results(frame.copy(), detections).plot()
+    buffer = io.BytesIO()
+    Image.fromarray(annotated[:, :, ::-1]).save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def new_path(renderer):
+    def render(frame, detections):
+        return encode_jpeg(renderer.draw(frame.copy(), detections))
+    return render
+
+
+def run(name, fn, frame, detections, runs):
+    fn(frame, detections)  # warm caches
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        size = len(fn(frame, detections))
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<16} p50={np.percentile(latencies, 50):7.2f} ms  p99={np.percentile(latencies, 99):7.2f} ms  "
+          f"jpeg={size / 1024:.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="test.jpg")
+    parser.add_argument("--boxes", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        frame = decode_image(f.read())
+    detections = synthetic_detections(frame, args.boxes)
+    print(f"image={args.image} {frame.shape[1]}x{frame.shape[0]} boxes={args.boxes} runs={args.runs}")
+    run("plot + PIL", old_path, frame, detections, args.runs)
+    run("renderer + cv2", new_path(Renderer()), frame, detections, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Measure inference throughput as the number of worker processes grows.
+
+Runs the same image through an in-process model with torch's default thread
+count (the old behaviour), then through InferenceProcessPool with 1..N
+workers, each with a fixed number of torch threads and optionally pinned to
+its own CPUs. Reports throughput, p50/p99 latency and scaling efficiency
+relative to the single-worker run; near-linear scaling shows efficiency
+close to 100%.
+
+Usage:
+    python benchmarks/bench_scaling.py --workers 1 2 4 8 --threads-per-worker 1 --pin
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+
+from images import decode_image
+from inference import BatchScheduler, InferenceProcessPool, load_model, warm_up
+
+torch.cuda.is_available = lambda: False
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(predict, frame, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        start = time.perf_counter()
+        predict(frame)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total)))
+    wall = time.perf_counter() - started
+    return total / wall, percentile(latencies, 50), percentile(latencies, 99)
+
+
+def report(name, throughput, p50, p99, efficiency=""):
+    print(f"{name:<26} throughput={throughput:7.1f} img/s  p50={p50 * 1000:7.1f} ms  "
+          f"p99={p99 * 1000:7.1f} ms  {efficiency}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="tests/test_image.jpg")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--pin", action="store_true", help="pin each worker to its own CPUs")
+    parser.add_argument("--max-batch-size", type=int, default=1)
+    parser.add_argument("--requests-per-worker", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        frame = decode_image(f.read())
+
+    print(f"cpus={os.cpu_count()} backend={args.backend} threads_per_worker={args.threads_per_worker} "
+          f"pin={args.pin} max_batch_size={args.max_batch_size}")
+
+    # Baseline: one in-process model, torch picks its own thread count, callers serialise on it
+    model = load_model(args.model, args.backend)
+    warm_up(model)
+    model_lock = threading.Lock()
+
+    def in_process(image):
+        with model_lock:
+            return model([image], device="cpu", verbose=False)
+
+    concurrency = 2 * max(args.workers)
+    report(f"in-process ({torch.get_num_threads()} threads)",
+           *run(in_process, frame, args.requests_per_worker * max(args.workers), concurrency))
+
+    single = None
+    for workers in args.workers:
+        pool = InferenceProcessPool(
+            load_model,
+            {"weights": args.model, "backend": args.backend},
+            num_workers=workers,
+            threads_per_worker=args.threads_per_worker,
+            pin_cpus=args.pin,
+            warmup_fn=functools.partial(warm_up, batch_sizes=(1, args.max_batch_size)),
+        )
+        scheduler = BatchScheduler(pool.predict_batch, max_batch_size=args.max_batch_size,
+                                   max_wait_ms=5, concurrency=workers)
+        throughput, p50, p99 = run(scheduler.predict, frame, args.requests_per_worker * workers, 2 * workers)
+        scheduler.stop()
+        pool.shutdown()
+
+        single = single or throughput
+        report(f"{workers} worker(s)", throughput, p50, p99,
+               f"efficiency={throughput / (single * workers) * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
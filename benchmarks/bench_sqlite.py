@@ -0,0 +1,93 @@
+"""
+Compare SQLiteStorage's pooled WAL connections against connect-per-call.
+
+Runs a mix of writer threads (save_prediction_with_detections) and reader
+threads (get_prediction / get_predictions_by_label) against a fresh database
+for each mode and reports ops/sec and "database is locked" errors.
+
+Usage:
+    python benchmarks/bench_sqlite.py --seconds 5 --writers 2 --readers 6
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from storage.sqlite_storage import SQLiteStorage
+
+
+class ConnectPerCallStorage(SQLiteStorage):
+    """The previous behaviour: a new rollback-journal connection for every call"""
+
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self):
+        pass
+
+
+def run(storage_cls, seconds, writers, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = storage_cls(db_path=os.path.join(tmp, "bench.db"))
+        detections = [{"label": "person", "score": 0.8, "box": [1.0, 2.0, 3.0, 4.0]}] * 5
+        storage.save_prediction_with_detections("seed", "o.jpg", "p.jpg", detections)
+
+        counts = {"ops": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def record(ops=0, locked=0):
+            with lock:
+                counts["ops"] += ops
+                counts["locked"] += locked
+
+        def writer(n):
+            i = 0
+            while time.monotonic() < deadline:
+                try:
+                    storage.save_prediction_with_detections(f"{n}-{i}", "o.jpg", "p.jpg", detections)
+                    record(ops=1)
+                except sqlite3.OperationalError:
+                    record(locked=1)
+                i += 1
+
+        def reader():
+            while time.monotonic() < deadline:
+                try:
+                    storage.get_prediction("seed")
+                    storage.get_predictions_by_label("person")
+                    record(ops=2)
+                except sqlite3.OperationalError:
+                    record(locked=1)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        storage.close()
+
+    print(f"{storage_cls.__name__:<22} {counts['ops'] / seconds:9.0f} ops/s  locked_errors={counts['locked']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=6)
+    args = parser.parse_args()
+
+    run(ConnectPerCallStorage, args.seconds, args.writers, args.readers)
+    run(SQLiteStorage, args.seconds, args.writers, args.readers)
+
+
+if __name__ == "__main__":
+    main()
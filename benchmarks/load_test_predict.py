@@ -0,0 +1,89 @@
+"""
+Load-test POST /predict on a running service.
+
+Keeps --concurrency requests in flight until --requests have completed and
+reports throughput, p50/p99 latency and error count. Run it against the old
+and new builds with the same settings to compare how many in-flight requests
+each can sustain.
+
+Every request sends the image with a unique suffix after its end-of-image
+marker, so the bytes (and their hash) differ and each request runs the model
+instead of hitting the result cache. Pass --repeat-image to send identical
+bytes and measure the cache-hit path instead.
+
+Usage:
+    python benchmarks/load_test_predict.py --url http://localhost:8080 --requests 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--image", default="tests/test_image.jpg")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--repeat-image", action="store_true",
+                        help="send identical bytes every request, so all but the first hit the result cache")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+
+    # Unique per run too, so a second run doesn't hit entries cached by the first
+    run_id = uuid.uuid4().hex
+    latencies = []
+    errors = 0
+    remaining = args.requests
+    lock = asyncio.Lock()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while True:
+                async with lock:
+                    if remaining == 0:
+                        return
+                    remaining -= 1
+                    sequence = remaining
+                # JPEG decoders ignore bytes after the end-of-image marker
+                payload = image_bytes if args.repeat_image else image_bytes + f"{run_id}-{sequence}".encode()
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/predict", files={"file": ("load_test.jpg", payload, "image/jpeg")}
+                    )
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+
+    print(f"requests={args.requests} concurrency={args.concurrency} wall={wall:.1f}s")
+    print(f"throughput={len(latencies) / wall:.1f} req/s  errors={errors}")
+    if latencies:
+        print(f"p50={percentile(latencies, 50) * 1000:.0f} ms  p99={percentile(latencies, 99) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
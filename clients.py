@@ -0,0 +1,97 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import boto3
+import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Long-lived AWS and HTTP clients shared by the whole process. boto3 clients and
+# requests.Session are safe to share across threads once created; building them
+# per request costs milliseconds of CPU and throws away pooled keep-alive connections.
+AWS_REGION = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION", "us-east-2"))
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "60"))
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+CALLBACK_TIMEOUT = (float(os.getenv("CALLBACK_CONNECT_TIMEOUT", "3")),
+                    float(os.getenv("CALLBACK_READ_TIMEOUT", "30")))
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[Tuple[str, Optional[str], str], object] = {}
+_http_session: Optional[requests.Session] = None
+
+
+def aws_config(**overrides) -> Config:
+    """Pool size, adaptive retries, timeouts and TCP keep-alive for every AWS client"""
+    settings = {
+        "max_pool_connections": AWS_MAX_POOL_CONNECTIONS,
+        "retries": {"mode": "adaptive", "max_attempts": AWS_MAX_ATTEMPTS},
+        "connect_timeout": AWS_CONNECT_TIMEOUT,
+        "read_timeout": AWS_READ_TIMEOUT,
+        "tcp_keepalive": True,
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def _boto_session() -> boto3.session.Session:
+    # boto3.session.Session is not thread-safe; only touch it under _lock
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service: str, endpoint_url: Optional[str] = None, region_name: str = AWS_REGION):
+    """Return the process-wide client for an AWS service, creating it on first use"""
+    key = (service, endpoint_url, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _boto_session().client(service, region_name=region_name,
+                                                endpoint_url=endpoint_url, config=aws_config())
+                _clients[key] = client
+    return client
+
+
+def get_resource(service: str, region_name: str = AWS_REGION):
+    """A new resource on the shared session; resources aren't thread-safe, so callers own them"""
+    with _lock:
+        return _boto_session().resource(service, region_name=region_name, config=aws_config())
+
+
+def s3_client():
+    return get_client("s3")
+
+
+def sqs_client():
+    return get_client("sqs", endpoint_url=os.getenv("SQS_ENDPOINT_URL"))
+
+
+def http_session() -> requests.Session:
+    """Shared requests.Session with pooled keep-alive connections"""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                # Connection failures are retried for any method (nothing was sent);
+                # read errors and 5xx are only retried for idempotent methods, so a
+                # callback POST is never delivered twice
+                retry = Retry(total=HTTP_MAX_RETRIES, read=0, backoff_factor=0.2,
+                              status_forcelist=(502, 503, 504))
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                                      pool_maxsize=HTTP_POOL_CONNECTIONS, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DiskCache:
+    """
+    Byte-bounded LRU cache of files on local disk.
+
+    Files live under directory/<2 hex>/<2 hex>/<key hash>, so even millions of
+    files spread over 65536 small directories. Recency and sizes are kept in an
+    in-memory index that is rebuilt from a single scan at startup (oldest access
+    first); after that, lookups and evictions never walk the directory tree.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # path -> size, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for subshard in os.scandir(shard.path):
+                if not subshard.is_dir():
+                    continue
+                for entry in os.scandir(subshard.path):
+                    if entry.name.endswith(".tmp"):
+                        os.remove(entry.path)
+                        continue
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._index[path] = size
+            self._bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:4], digest)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached file for key, marking it recently used, or None"""
+        path = self.path_for(key)
+        with self._lock:
+            if path in self._index:
+                self._index.move_to_end(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store data for key, evicting least recently used files beyond max_bytes; returns its path"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers only ever see complete files
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(path, 0)
+            self._index[path] = len(data)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            path, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "files": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,52 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# CPU-bound work (plotting, JPEG encoding) gets its own small pool so it can't
+# starve blocking I/O, and neither competes with Starlette's default threadpool.
+CPU_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(os.cpu_count() or 2)))
+IO_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "32"))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+
+def _in_context(fn, *args, **kwargs):
+    # run_in_executor doesn't carry contextvars over (unlike asyncio.to_thread), so
+    # correlation IDs bound for the request would be missing from the worker's logs
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run a CPU-bound callable on the bounded CPU executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, _in_context(fn, *args, **kwargs))
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O callable (S3, storage, disk) on the I/O executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, _in_context(fn, *args, **kwargs))
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller starts
+    the work and everyone who asks for that key while it runs awaits the same result.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn, *args):
+        # Tasks belong to one event loop; keying by loop keeps callers on other loops apart
+        key = (asyncio.get_running_loop(), key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller going away must not cancel the work for the others
+        return await asyncio.shield(task)
@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from clients import s3_client
+from disk_cache import DiskCache
+from storage.cached_storage import LRUCache
+
+logger = logging.getLogger("images")
+
+
+class ImageStore:
+    """
+    Local copies of original and annotated images within a byte budget, backed by S3.
+
+    Images keep their logical paths (uploads/original/<user>/<ts>.jpg, as stored in
+    prediction records); the S3 key is the same path relative to uploads/. Bytes
+    live in a sharded DiskCache that evicts least recently used files, and a local
+    miss is filled from S3. Files written under the old unmanaged layout are still
+    served from where they are.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, bucket: Optional[str] = None, root: str = "uploads"):
+        self.root = root
+        self.bucket = bucket
+        self.cache = DiskCache(directory, max_bytes)
+        # Whether S3 holds a key: positives never change, negatives expire as uploads land
+        self._in_s3 = LRUCache(max_entries=100000)
+        self._lock = threading.Lock()
+        self.s3_fetches = 0
+        self.s3_misses = 0
+
+    def key_for(self, path: str) -> Optional[str]:
+        """S3 key for a logical image path, or None if it points outside the root"""
+        key = os.path.relpath(os.path.normpath(path), self.root).replace(os.sep, "/")
+        if key == "." or key.startswith("../"):
+            return None
+        return key
+
+    def save(self, path: str, data: bytes) -> None:
+        key = self.key_for(path)
+        if key is None:
+            raise ValueError(f"{path} is outside {self.root}")
+        self.cache.put(key, data)
+
+    def local_path(self, path: str) -> Optional[str]:
+        """A local file holding the image, fetching it from S3 on a miss; None if it exists nowhere"""
+        key = self.key_for(path)
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if os.path.isfile(path):
+            return path
+
+        data = self._fetch(key)
+        if data is None:
+            return None
+        return self.cache.put(key, data)
+
+    def read(self, path: str) -> Optional[bytes]:
+        local = self.local_path(path)
+        if local is None:
+            return None
+        with open(local, "rb") as f:
+            return f.read()
+
+    def in_s3(self, path: str) -> bool:
+        """Whether S3 has the image, remembered so repeated checks cost no request"""
+        key = self.key_for(path)
+        if key is None or not self.bucket:
+            return False
+        known = self._in_s3.get(key)
+        if known is not None:
+            return known
+        try:
+            s3_client().head_object(Bucket=self.bucket, Key=key)
+            exists = True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.warning("⚠️ Failed to check s3://%s/%s: %s", self.bucket, key, e)
+                return False
+            exists = False
+        self._in_s3.put(key, exists, ttl_seconds=None if exists else 60)
+        return exists
+
+    def _fetch(self, key: str) -> Optional[bytes]:
+        if not self.bucket:
+            return None
+        try:
+            data = s3_client().get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.warning("⚠️ Failed to fetch s3://%s/%s: %s", self.bucket, key, e)
+            with self._lock:
+                self.s3_misses += 1
+            return None
+        except Exception as e:
+            logger.warning("⚠️ Failed to fetch s3://%s/%s: %s", self.bucket, key, e)
+            return None
+        with self._lock:
+            self.s3_fetches += 1
+        logger.debug("📥 Filled local image store from s3://%s/%s", self.bucket, key)
+        return data
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.cache.stats(), "s3_fetches": self.s3_fetches, "s3_misses": self.s3_misses}
+
+
+def get_image_store() -> ImageStore:
+    return ImageStore(
+        directory=os.getenv("IMAGE_STORE_DIR", "uploads/store"),
+        max_bytes=int(os.getenv("IMAGE_STORE_MAX_BYTES", str(10 * 1024 ** 3))),
+        bucket=os.getenv("S3_BUCKET_NAME"),
+    )
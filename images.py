@@ -0,0 +1,101 @@
+import io
+import os
+import zipfile
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+# Keep local copies of originals and annotated images in the image store so /image and
+# /prediction/{uid}/image can serve them without going to S3; S3 always gets a copy regardless
+SAVE_LOCAL_IMAGES = os.getenv("SAVE_LOCAL_IMAGES", "true").lower() == "true"
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "90"))
+# Optimized Huffman tables shave a few percent off the file size for noticeably more encode time
+JPEG_OPTIMIZE = os.getenv("JPEG_OPTIMIZE", "false").lower() == "true"
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+
+# Types /prediction/{uid}/image can be served as, with the extension their files are stored under
+IMAGE_TYPES = {"image/jpeg": ".jpg", "image/webp": ".webp", "image/png": ".png"}
+# Longest-side sizes that resized variants are made at; a requested size is rounded up to
+# one of these, so a handful of files per image serves any size a client asks for
+VARIANT_SIZES = sorted(int(size) for size in os.getenv("IMAGE_VARIANT_SIZES", "160,320,640,1280").split(",") if size)
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode encoded image bytes once into a BGR array, the layout YOLO expects for NumPy input"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+def encode_jpeg(frame_bgr: np.ndarray, quality: int = JPEG_QUALITY, optimize: bool = JPEG_OPTIMIZE) -> bytes:
+    """Encode a BGR frame to JPEG bytes in memory; OpenCV takes BGR as-is, so no RGB copy is made"""
+    ok, encoded = cv2.imencode(".jpg", frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                                   cv2.IMWRITE_JPEG_OPTIMIZE, int(optimize)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def encode_image(frame_bgr: np.ndarray, media_type: str) -> bytes:
+    """Encode a BGR frame as one of IMAGE_TYPES"""
+    if media_type == "image/jpeg":
+        return encode_jpeg(frame_bgr)
+    params = [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY] if media_type == "image/webp" else []
+    ok, encoded = cv2.imencode(IMAGE_TYPES[media_type], frame_bgr, params)
+    if not ok:
+        raise ValueError(f"{media_type} encoding failed")
+    return encoded.tobytes()
+
+
+def variant_size(requested: Optional[int]) -> Optional[int]:
+    """The smallest VARIANT_SIZES entry covering the requested size; None means full size"""
+    if requested is None:
+        return None
+    return next((size for size in VARIANT_SIZES if size >= requested), None)
+
+
+def variant_path(image_path: str, size: Optional[int], media_type: str) -> str:
+    """
+    Logical path of an image resized to size (None for full size) and encoded as media_type,
+    next to the image itself: 1_predicted.jpg -> 1_predicted_320.webp. The full-size JPEG
+    is the image's own path.
+    """
+    stem, ext = os.path.splitext(image_path)
+    if size is None and IMAGE_TYPES[media_type] == ext:
+        return image_path
+    return f"{stem}{f'_{size}' if size else ''}{IMAGE_TYPES[media_type]}"
+
+
+def make_variant(data: bytes, size: Optional[int], media_type: str) -> bytes:
+    """Re-encode an image as media_type, scaled down (never up) to fit within size x size"""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Cannot decode image")
+    height, width = frame.shape[:2]
+    if size and max(height, width) > size:
+        scale = size / max(height, width)
+        # INTER_AREA averages source pixels, so thin boxes and label text survive downscaling
+        frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    return encode_image(frame, media_type)
+
+
+def extract_zip_images(data: bytes, max_files: int, max_bytes: int) -> List[Tuple[str, bytes]]:
+    """
+    Read the files in a zip archive as (name, bytes) pairs, skipping directories and
+    macOS/hidden entries. Sizes are checked from the archive index before anything is
+    decompressed; ValueError if the archive holds more than max_files or max_bytes.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+            and not os.path.basename(info.filename).startswith(".")
+        ]
+        if len(members) > max_files:
+            raise ValueError(f"Archive holds {len(members)} files, at most {max(max_files, 0)} allowed")
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ValueError(f"Archive expands to more than {max(max_bytes, 0)} bytes")
+        return [(info.filename, archive.read(info)) for info in members]
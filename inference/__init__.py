@@ -0,0 +1,100 @@
+import functools
+import os
+from typing import Callable, Optional, Tuple
+
+from .admission import AdmissionController, Overloaded
+from .batcher import BatchScheduler
+from .backends import BACKENDS, export_model, load_model, model_id, warm_up
+from .process_pool import InferenceProcessPool
+from .result_cache import ResultCache
+
+
+def _model_settings():
+    return {
+        "weights": os.getenv("MODEL_WEIGHTS", "yolov8n.pt"),
+        "backend": os.getenv("INFERENCE_BACKEND", "pytorch").lower(),
+        "imgsz": int(os.getenv("INFERENCE_IMGSZ", "640")),
+        "int8": os.getenv("INFERENCE_INT8", "false").lower() == "true",
+    }
+
+
+def _warmup_fn():
+    """Warm-up for single images and full batches; None when INFERENCE_WARMUP_RUNS=0"""
+    runs = int(os.getenv("INFERENCE_WARMUP_RUNS", "2"))
+    if runs <= 0:
+        return None
+    batch_sizes = tuple(sorted({1, int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))}))
+    return functools.partial(warm_up, imgsz=int(os.getenv("INFERENCE_IMGSZ", "640")),
+                             batch_sizes=batch_sizes, runs=runs)
+
+
+def inference_workers() -> int:
+    return int(os.getenv("INFERENCE_WORKERS", "0"))
+
+
+def get_predict_fn() -> Tuple[Callable, str, Optional[InferenceProcessPool]]:
+    """
+    Build the batch predict function and return (predict_fn, model_id, pool).
+
+    INFERENCE_WORKERS=0 runs the model in this process with INFERENCE_THREADS
+    torch threads and pool is None; otherwise the model runs in that many worker
+    processes with INFERENCE_THREADS_PER_WORKER threads each, pinned to their own
+    CPUs when INFERENCE_PIN_CPUS=true. The pool is not started yet: call
+    pool.start() once the application is up (it otherwise starts on the first batch).
+    """
+    import torch
+
+    settings = _model_settings()
+    calibration_data = os.getenv("INFERENCE_INT8_DATA", "coco8.yaml")
+    workers = inference_workers()
+
+    if workers <= 0:
+        threads = int(os.getenv("INFERENCE_THREADS", "0"))
+        if threads > 0:
+            torch.set_num_threads(threads)
+        model = load_model(calibration_data=calibration_data, **settings)
+        warmup = _warmup_fn()
+        if warmup is not None:
+            warmup(model)
+        return (lambda images: model(images, device="cpu", verbose=False)), model_id(**settings), None
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    threads = int(os.getenv("INFERENCE_THREADS_PER_WORKER", str(max(1, cpus // workers))))
+    # Export once here so workers don't race to write the same file
+    export_model(settings["weights"], settings["backend"], imgsz=settings["imgsz"], int8=settings["int8"],
+                 calibration_data=calibration_data)
+    pool = InferenceProcessPool(
+        load_model,
+        dict(calibration_data=calibration_data, **settings),
+        num_workers=workers,
+        threads_per_worker=threads,
+        pin_cpus=os.getenv("INFERENCE_PIN_CPUS", "false").lower() == "true",
+        warmup_fn=_warmup_fn(),
+    )
+    return pool.predict_batch, model_id(**settings), pool
+
+
+def get_scheduler(predict_fn) -> BatchScheduler:
+    max_batch_size = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+    max_wait_ms = float(os.getenv("INFERENCE_MAX_WAIT_MS", "15"))
+    # One dispatch thread per worker process keeps every worker busy
+    concurrency = max(1, inference_workers())
+    return BatchScheduler(predict_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                          concurrency=concurrency)
+
+
+def get_result_cache(model_id: str, storage=None):
+    max_entries = int(os.getenv("RESULT_CACHE_SIZE", "1000"))
+    if max_entries <= 0:
+        return None
+    if os.getenv("RESULT_CACHE_STORAGE_LOOKUP", "true").lower() != "true":
+        storage = None
+    return ResultCache(model_id, storage=storage, max_entries=max_entries)
+
+
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        max_pending=int(os.getenv("ADMISSION_MAX_PENDING", "64")),
+        deadline_seconds=float(os.getenv("PREDICT_DEADLINE_SECONDS", "10")),
+        pause_ratio=float(os.getenv("ADMISSION_PAUSE_RATIO", "0.8")),
+    )
@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; retry_after is a hint in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded admission in front of inference.
+
+    Every inference (HTTP or SQS) holds a slot while it waits and runs, so
+    pending() is the real queue depth. HTTP requests are rejected once
+    max_pending slots are taken, or when the estimated wait already exceeds
+    their deadline. The estimate uses Little's law over smoothed recent
+    latency and depth: throughput ~= depth / latency. SQS work is always
+    admitted (force=True) but should_pause() tells the consumer to stop
+    receiving before the HTTP path starts shedding.
+    """
+
+    def __init__(self, max_pending: int = 64, deadline_seconds: float = 10.0,
+                 pause_ratio: float = 0.8, smoothing: float = 0.2):
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self.max_pending = max_pending
+        self.deadline_seconds = deadline_seconds
+        self.pause_ratio = pause_ratio
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latency = None
+        self._depth = None
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.timed_out = 0
+
+    def pending(self) -> int:
+        return self._pending
+
+    def _throughput(self) -> Optional[float]:
+        if not self._latency or not self._depth:
+            return None
+        return self._depth / self._latency
+
+    def estimated_wait(self, depth: Optional[int] = None) -> Optional[float]:
+        """Seconds a request admitted now would take to finish, or None before any samples"""
+        throughput = self._throughput()
+        if throughput is None:
+            return None
+        return ((self._pending if depth is None else depth) + 1) / throughput
+
+    def retry_after(self, wait: Optional[float] = None) -> int:
+        """Retry-After hint in seconds, from the given or current estimated wait"""
+        if wait is None:
+            wait = self.estimated_wait()
+        return max(1, min(60, math.ceil(wait if wait is not None else 1)))
+
+    def admit(self, deadline_seconds: Optional[float] = None, force: bool = False) -> Tuple[float, int]:
+        """Take a slot and return a ticket for release(); raises Overloaded unless force is set"""
+        deadline = self.deadline_seconds if deadline_seconds is None else deadline_seconds
+        with self._lock:
+            if not force:
+                wait = self.estimated_wait()
+                if self._pending >= self.max_pending:
+                    self.rejected_queue_full += 1
+                    raise Overloaded("inference queue is full", self.retry_after(wait))
+                if wait is not None and wait > deadline:
+                    self.rejected_deadline += 1
+                    raise Overloaded(f"estimated wait {wait:.1f}s exceeds the {deadline:.1f}s deadline",
+                                     self.retry_after(wait - deadline))
+            self._pending += 1
+            self.admitted += 1
+            depth = self._pending
+        return time.monotonic(), depth
+
+    def release(self, ticket: Tuple[float, int], completed: bool = True, timed_out: bool = False) -> None:
+        """Free a slot; only completed requests update the latency and depth estimates"""
+        started, depth = ticket
+        latency = time.monotonic() - started
+        with self._lock:
+            self._pending -= 1
+            if timed_out:
+                self.timed_out += 1
+            if not completed:
+                return
+            a = self.smoothing
+            self._latency = latency if self._latency is None else a * latency + (1 - a) * self._latency
+            self._depth = depth if self._depth is None else a * depth + (1 - a) * self._depth
+
+    @contextmanager
+    def slot(self, deadline_seconds: Optional[float] = None, force: bool = False):
+        ticket = self.admit(deadline_seconds, force=force)
+        completed = False
+        try:
+            yield ticket
+            completed = True
+        finally:
+            self.release(ticket, completed)
+
+    def should_pause(self) -> bool:
+        """True once the queue is deep enough that background consumers should back off"""
+        return self._pending >= self.max_pending * self.pause_ratio
+
+    def stats(self) -> Dict:
+        with self._lock:
+            wait = self.estimated_wait()
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "deadline_seconds": self.deadline_seconds,
+                "estimated_wait_seconds": round(wait, 3) if wait is not None else None,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_deadline": self.rejected_deadline,
+                "timed_out": self.timed_out,
+                "overloaded": self.should_pause(),
+            }
@@ -0,0 +1,88 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+
+def exported_path(weights: str, backend: str, int8: bool = False) -> Optional[str]:
+    """Where ultralytics writes (or we write) the exported model for a backend; None for pytorch"""
+    stem = os.path.splitext(weights)[0]
+    if backend == "onnx":
+        return f"{stem}.int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    return None
+
+
+def quantize_onnx(source: str, target: str) -> str:
+    """Dynamic INT8 weight quantization of an exported ONNX graph (no calibration data needed)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+    return target
+
+
+def export_model(weights: str, backend: str, imgsz: int = 640, int8: bool = False,
+                 calibration_data: str = "coco8.yaml") -> str:
+    """
+    Export .pt weights for the given backend and return the path to load.
+
+    Exports are reused when they already exist next to the weights, so only the
+    first start (or an image build step) pays the conversion cost.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    target = exported_path(weights, backend, int8)
+    if target is None:
+        return weights
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    logger.info("Exporting %s to %s%s at imgsz=%s", weights, backend, ' (int8)' if int8 else '', imgsz)
+    model = YOLO(weights)
+    if backend == "onnx":
+        # Dynamic axes so the micro-batcher can send any batch size through one session
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        return quantize_onnx(exported, target) if int8 else exported
+    exported = model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=int8, data=calibration_data)
+    return str(Path(exported))
+
+
+def load_model(weights: str, backend: str = "pytorch", imgsz: int = 640, int8: bool = False,
+               calibration_data: str = "coco8.yaml"):
+    """Load a YOLO model on the requested backend; exported models keep the same Results API"""
+    from ultralytics import YOLO
+
+    path = export_model(weights, backend, imgsz=imgsz, int8=int8, calibration_data=calibration_data)
+    model = YOLO(path) if backend == "pytorch" else YOLO(path, task="detect")
+    # Predict calls merge overrides, so every call uses the size the model was exported for
+    model.overrides["imgsz"] = imgsz
+    return model
+
+
+def warm_up(model, imgsz: int = 640, batch_sizes: Iterable[int] = (1,), runs: int = 2) -> float:
+    """
+    Run dummy frames through the model so the first real request doesn't pay for
+    predictor setup, session/graph initialization and allocator growth.
+    Returns the time spent in seconds.
+    """
+    started = time.perf_counter()
+    frame = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for batch_size in batch_sizes:
+        for _ in range(runs):
+            model([frame] * batch_size, device="cpu", imgsz=imgsz, verbose=False)
+    return time.perf_counter() - started
+
+
+def model_id(weights: str, backend: str, imgsz: int, int8: bool) -> str:
+    """Identity of the model and inference settings, used to key cached results"""
+    return f"{os.path.basename(weights)}|backend={backend}|int8={int8}|imgsz={imgsz}|device=cpu"
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class BatchScheduler:
+    """
+    Collects single-image inference requests into micro-batches.
+
+    Callers submit one image at a time and get back a Future. A background
+    thread waits for the first request, then keeps collecting until either
+    max_batch_size images are queued or max_wait_ms has passed, runs a single
+    batched forward pass and resolves each caller's Future with its own result.
+    With concurrency > 1, that many dispatch threads collect and run batches in
+    parallel (e.g. one per inference worker process).
+    """
+
+    def __init__(self, predict_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 15.0, concurrency: int = 1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.concurrency = concurrency
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inference-batcher-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, image: Any) -> Future:
+        """Queue an image for inference and return a Future for its result"""
+        if self._stopped.is_set():
+            raise RuntimeError("BatchScheduler has been stopped")
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def predict(self, image: Any, timeout: float = None) -> Any:
+        """Submit an image and block until its result is ready"""
+        return self.submit(image).result(timeout=timeout)
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the dispatch threads once the queued requests are drained"""
+        self._stopped.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _collect_batch(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Re-queue the stop sentinel so the main loop sees it
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                # Leave the sentinel for the other dispatch threads
+                self._queue.put(None)
+                return
+
+            batch = self._collect_batch(first)
+            # Skip requests whose callers already gave up
+            batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.predict_fn([image for image, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"predict_fn returned {len(results)} results for a batch of {len(batch)}"
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,147 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Set once per worker process by _init_worker
+_worker_model = None
+
+
+def cpu_sets(num_workers: int, threads_per_worker: int, available: Optional[List[int]] = None) -> List[List[int]]:
+    """Split the CPUs this process may use into one contiguous, non-overlapping set per worker"""
+    if available is None:
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    sets = []
+    for index in range(num_workers):
+        start = (index * threads_per_worker) % len(available)
+        sets.append([available[(start + i) % len(available)] for i in range(threads_per_worker)])
+    return sets
+
+
+def _init_worker(load_fn: Callable, load_kwargs: Dict, threads: int, cpu_queue, warmup_fn: Optional[Callable]):
+    import torch
+    from logs import configure_logging
+
+    # Spawned workers start with no logging handlers
+    configure_logging()
+    cpus = cpu_queue.get() if cpu_queue is not None else None
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    # Fixed intra-op threads per worker; inter-op parallelism only adds contention here
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already set once torch has run parallel work in this process
+
+    global _worker_model
+    _worker_model = load_fn(**load_kwargs)
+    if warmup_fn is not None:
+        warmup_fn(_worker_model)
+    logger.info("Inference worker %s ready: threads=%s, cpus=%s", os.getpid(), threads, cpus or 'any')
+
+
+def _worker_pid(_) -> int:
+    return os.getpid()
+
+
+def _predict_in_worker(frames: List[np.ndarray]) -> List[tuple]:
+    # Only names and the raw Nx6 box array cross the process boundary, not the images
+    results = _worker_model(frames, device="cpu", verbose=False)
+    return [(result.names, result.boxes.data.cpu().numpy()) for result in results]
+
+
+def to_results(frames: List[np.ndarray], outputs: List[tuple]) -> List[Any]:
+    """Rebuild ultralytics Results in the parent from worker output and the frames it already holds"""
+    from ultralytics.engine.results import Results
+
+    return [Results(frame, path="", names=names, boxes=boxes) for frame, (names, boxes) in zip(frames, outputs)]
+
+
+class InferenceProcessPool:
+    """
+    Runs the model in dedicated worker processes.
+
+    Each worker loads the model once, uses a fixed number of torch intra-op
+    threads and can be pinned to its own CPUs, so concurrent batches run in
+    parallel instead of oversubscribing the cores the event loop, SQS
+    consumers and I/O threads also need. predict_batch() blocks the calling
+    thread until a worker returns; run up to num_workers callers at once
+    (e.g. BatchScheduler dispatch threads) to keep every worker busy.
+
+    No process is spawned until start() or the first batch. Spawned workers
+    re-import the parent's __main__, so a pool started while that module is
+    still being imported would be started again inside every worker.
+    """
+
+    def __init__(self, load_fn: Callable, load_kwargs: Optional[Dict] = None, num_workers: int = 2,
+                 threads_per_worker: int = 1, pin_cpus: bool = False, warmup_fn: Optional[Callable] = None,
+                 result_fn: Callable = to_results):
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        if threads_per_worker < 1:
+            raise ValueError("threads_per_worker must be >= 1")
+
+        self.load_fn = load_fn
+        self.load_kwargs = load_kwargs or {}
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.pin_cpus = pin_cpus
+        self.warmup_fn = warmup_fn
+        self.result_fn = result_fn
+
+        # spawn, not fork: the parent already runs threads (batcher, SQS, executors)
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Spawn the workers and wait until each has loaded and warmed up its model"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._start_executor()
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        cpu_queue = None
+        if self.pin_cpus:
+            cpu_queue = self._context.Queue()
+            for cpus in cpu_sets(self.num_workers, self.threads_per_worker):
+                cpu_queue.put(cpus)
+        executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self.load_fn, self.load_kwargs, self.threads_per_worker, cpu_queue, self.warmup_fn),
+        )
+        # Start every worker now so model loading and warm-up happen before traffic
+        list(executor.map(_worker_pid, range(self.num_workers)))
+        return executor
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Any]:
+        """Run one batch on a worker process and return Results in input order"""
+        self.start()
+        with self._lock:
+            executor = self._executor
+        try:
+            outputs = executor.submit(_predict_in_worker, frames).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool so later batches work
+            with self._lock:
+                if self._executor is executor:
+                    logger.error("❌ Inference worker died, restarting process pool")
+                    self._executor = self._start_executor()
+            raise
+        return self.result_fn(frames, outputs)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from storage.base import BaseStorage
+from storage.cached_storage import LRUCache
+
+
+class ResultCache:
+    """
+    Content-addressed cache of detection results.
+
+    Entries are keyed by the SHA-256 of the image bytes combined with the
+    model identity and inference parameters, so a byte-identical image seen
+    again (e.g. a forwarded Telegram photo) reuses the earlier prediction's
+    detections and annotated image instead of running the model. Lookups go
+    to a bounded in-process LRU first and then, optionally, to the storage
+    backend, which remembers which prediction a content key produced.
+    """
+
+    def __init__(self, model_id: str, storage: Optional[BaseStorage] = None, max_entries: int = 1000):
+        self.model_id = model_id
+        self.storage = storage
+        self.local = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.storage_hits = 0
+        self.misses = 0
+
+    def key_for(self, content_hash: str) -> str:
+        return hashlib.sha256(f"{self.model_id}|{content_hash}".encode()).hexdigest()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, content_hash: str) -> Optional[Dict]:
+        """
+        Return {"prediction_uid", "detections", "original_image", "predicted_image"} for a
+        previously seen image, or None
+        """
+        key = self.key_for(content_hash)
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count("local_hits")
+            return entry
+
+        if self.storage is not None:
+            prediction_uid = self.storage.get_prediction_uid_by_content_hash(key)
+            prediction = self.storage.get_prediction(prediction_uid) if prediction_uid else None
+            if prediction is not None:
+                entry = {
+                    "prediction_uid": prediction_uid,
+                    "detections": [
+                        {"label": d["label"], "score": d["score"], "box": d["box"]}
+                        for d in prediction["detection_objects"]
+                    ],
+                    "original_image": prediction["original_image"],
+                    "predicted_image": prediction["predicted_image"]
+                }
+                self.local.put(key, entry)
+                self._count("storage_hits")
+                return entry
+
+        self._count("misses")
+        return None
+
+    def store(self, content_hash: str, prediction_uid: str, detections: List[Dict], original_image: str,
+              predicted_image: str) -> None:
+        """Remember the result of running the model on an image"""
+        key = self.key_for(content_hash)
+        self.local.put(key, {
+            "prediction_uid": prediction_uid,
+            "detections": detections,
+            "original_image": original_image,
+            "predicted_image": predicted_image
+        })
+        if self.storage is not None:
+            self.storage.save_content_hash(key, prediction_uid)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.local_hits + self.storage_hits + self.misses
+            hits = self.local_hits + self.storage_hits
+            return {
+                "local_hits": self.local_hits,
+                "storage_hits": self.storage_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "local_size": len(self.local)
+            }
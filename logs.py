@@ -0,0 +1,168 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict
+
+# Correlation IDs (request_id, prediction_id, message_id, ...) for the current request or message.
+# executors.run_cpu/run_io copy the context, so IDs follow work onto the thread pools too
+_correlation: contextvars.ContextVar = contextvars.ContextVar("correlation", default={})
+
+_configured = False
+_listener = None
+
+
+@contextmanager
+def bind(**ids):
+    """Attach correlation IDs to every log record emitted inside the block"""
+    token = _correlation.set({**_correlation.get(), **{k: v for k, v in ids.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _correlation.reset(token)
+
+
+def add_correlation(**ids) -> None:
+    """Add IDs for the rest of the current request task or enclosing bind() block"""
+    _correlation.set({**_correlation.get(), **{k: v for k, v in ids.items() if v is not None}})
+
+
+def correlation_ids() -> Dict:
+    return _correlation.get()
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class CorrelationFilter(logging.Filter):
+    """Copies the caller's correlation IDs onto the record before it leaves the calling thread"""
+
+    def filter(self, record):
+        record.correlation = _correlation.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={"fields": {...}} adds structured fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "correlation", {}))
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(name)s] %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extra = {**getattr(record, "correlation", {}), **getattr(record, "fields", {})}
+        if extra:
+            line += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return line
+
+
+class _PreformattedQueueHandler(logging.handlers.QueueHandler):
+    """Queue the record itself; the listener thread does all formatting and stdout writes"""
+
+    def prepare(self, record):
+        # Resolve the message now (args may be mutable) but leave JSON encoding to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class Sampler:
+    """
+    Lets one event per key through every interval_seconds and counts the rest,
+    for high-frequency events such as empty SQS polls.
+    """
+
+    def __init__(self, interval_seconds: float = 60.0):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._last = {}
+        self._suppressed = {}
+
+    def allow(self, key: str):
+        """Return (allowed, suppressed_since_last_allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval_seconds:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False, 0
+            self._last[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+
+sampler = Sampler(float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "60")))
+
+
+def log_sampled(logger: logging.Logger, level: int, key: str, msg: str, *args) -> None:
+    """Log at most once per sampling interval for this key, noting how many were dropped"""
+    if not logger.isEnabledFor(level):
+        return
+    allowed, suppressed = sampler.allow(key)
+    if allowed:
+        logger.log(level, msg, *args, extra={"fields": {"suppressed": suppressed}} if suppressed else None)
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a queue to a background writer.
+
+    LOG_LEVEL sets the threshold (default INFO) and LOG_FORMAT picks json
+    (default) or text. Records below the level cost one isEnabledFor check;
+    the rest cost a queue put on the calling thread.
+    """
+    global _configured, _listener
+    if _configured:
+        return
+    _configured = True
+
+    stream = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream.setFormatter(TextFormatter())
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    handler = _PreformattedQueueHandler(queue.SimpleQueue())
+    handler.addFilter(CorrelationFilter())
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+def shutdown_logging() -> None:
+    """Flush queued records; call on shutdown"""
+    if _listener is not None:
+        _listener.stop()
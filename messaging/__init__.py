@@ -0,0 +1,27 @@
+import os
+
+from .heartbeat import VisibilityHeartbeat
+from .pool import ConsumerPool
+
+
+def get_consumer_pool(sqs, queue_url: str, handler, **kwargs) -> ConsumerPool:
+    # Short initial visibility so a crashed worker's messages come back quickly;
+    # the heartbeat keeps extending it while a message is still being processed
+    visibility_timeout = int(os.getenv("SQS_VISIBILITY_TIMEOUT", "60"))
+    heartbeat_interval = os.getenv("SQS_HEARTBEAT_INTERVAL")
+    heartbeat = VisibilityHeartbeat(
+        sqs, queue_url,
+        visibility_timeout=visibility_timeout,
+        interval=float(heartbeat_interval) if heartbeat_interval else None,
+    )
+
+    config = {
+        "num_workers": int(os.getenv("SQS_WORKERS", "4")),
+        "batch_size": int(os.getenv("SQS_BATCH_SIZE", "10")),
+        "prefetch_batches": int(os.getenv("SQS_PREFETCH_BATCHES", "1")),
+        "wait_time_seconds": int(os.getenv("SQS_WAIT_TIME_SECONDS", "20")),
+        "visibility_timeout": visibility_timeout,
+        "heartbeat": heartbeat,
+    }
+    config.update(kwargs)
+    return ConsumerPool(sqs, queue_url, handler, **config)
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class VisibilityHeartbeat:
+    """
+    Keeps in-flight SQS messages invisible while they are still being worked on.
+
+    Messages are received with a short visibility timeout so that a crashed
+    worker's messages come back quickly. While a receipt handle is tracked, a
+    background thread pushes its visibility out again every interval seconds
+    using change_message_visibility_batch, so slow messages are never
+    redelivered and processed twice.
+    """
+
+    # SQS caps a message's total invisibility at 12 hours from first receipt
+    MAX_VISIBILITY_SECONDS = 43200
+
+    def __init__(self, sqs, queue_url: str, visibility_timeout: int = 60, interval: float = None):
+        if visibility_timeout < 1:
+            raise ValueError("visibility_timeout must be >= 1")
+
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.interval = interval if interval is not None else max(1.0, visibility_timeout / 3.0)
+        if self.interval >= visibility_timeout:
+            raise ValueError("interval must be shorter than visibility_timeout")
+
+        self._tracked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def track(self, receipt_handle: str) -> None:
+        """Start extending a receipt handle's visibility"""
+        with self._lock:
+            self._tracked.setdefault(receipt_handle, time.monotonic())
+
+    def untrack(self, receipt_handle: str) -> None:
+        """Stop extending a receipt handle once its message is finished"""
+        with self._lock:
+            self._tracked.pop(receipt_handle, None)
+
+    @property
+    def tracked_count(self) -> int:
+        with self._lock:
+            return len(self._tracked)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sqs-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.extend_all()
+            except Exception as e:
+                logger.error("❌ Visibility heartbeat error: %s", e)
+
+    def extend_all(self) -> None:
+        """Extend the visibility of every tracked message, 10 per request"""
+        now = time.monotonic()
+        with self._lock:
+            tracked = list(self._tracked.items())
+
+        entries = []
+        for receipt_handle, received_at in tracked:
+            remaining = int(self.MAX_VISIBILITY_SECONDS - (now - received_at))
+            timeout = min(self.visibility_timeout, remaining)
+            if timeout <= 0:
+                logger.warning("⚠️ Message reached the 12h visibility limit, no longer extending")
+                self.untrack(receipt_handle)
+                continue
+            entries.append({'ReceiptHandle': receipt_handle, 'VisibilityTimeout': timeout})
+
+        for start in range(0, len(entries), 10):
+            chunk = entries[start:start + 10]
+            for i, entry in enumerate(chunk):
+                entry['Id'] = str(i)
+            try:
+                response = self.sqs.change_message_visibility_batch(QueueUrl=self.queue_url, Entries=chunk)
+            except Exception as e:
+                # Keep going: one failed request must not leave the remaining chunks to expire
+                logger.error("❌ Failed to extend visibility of %s messages: %s", len(chunk), e)
+                continue
+
+            for failure in response.get('Failed', []):
+                entry = chunk[int(failure['Id'])]
+                code = failure.get('Code', '')
+                logger.warning("⚠️ Failed to extend visibility: %s %s", code, failure.get('Message'))
+                if 'ReceiptHandleIsInvalid' in code or 'MessageNotInflight' in code:
+                    # Already deleted or redelivered, nothing left to extend
+                    self.untrack(entry['ReceiptHandle'])
@@ -0,0 +1,210 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from logs import log_sampled
+from .heartbeat import VisibilityHeartbeat
+
+logger = logging.getLogger(__name__)
+
+
+class ConsumerPool:
+    """
+    Multi-worker SQS consumer.
+
+    One receiver thread pulls up to batch_size messages per receive_message
+    call and hands them to num_workers worker threads. Successfully handled
+    messages are deleted with delete_message_batch. The receiver keeps at most
+    num_workers + prefetch_batches * batch_size messages in flight, so the next
+    batch is fetched while the current one is still being processed but the
+    pool never holds more messages than it can work through.
+
+    If a VisibilityHeartbeat is given, every received message is tracked by it
+    until its handler returns, so visibility_timeout can stay short.
+
+    on_complete, if given, is called after every handler with the message,
+    the wall-clock time it was received and whether it succeeded.
+    """
+
+    def __init__(self, sqs, queue_url: str, handler: Callable[[Dict], bool],
+                 num_workers: int = 4, batch_size: int = 10, prefetch_batches: int = 1,
+                 wait_time_seconds: int = 20, visibility_timeout: int = 300,
+                 delete_flush_interval: float = 1.0,
+                 heartbeat: Optional[VisibilityHeartbeat] = None,
+                 should_pause: Optional[Callable[[], bool]] = None,
+                 pause_interval: float = 1.0,
+                 on_complete: Optional[Callable[[Dict, float, bool], None]] = None):
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        if not 1 <= batch_size <= 10:
+            raise ValueError("batch_size must be between 1 and 10")
+        if prefetch_batches < 0:
+            raise ValueError("prefetch_batches must be >= 0")
+
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.handler = handler
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.prefetch_batches = prefetch_batches
+        self.wait_time_seconds = wait_time_seconds
+        self.visibility_timeout = visibility_timeout
+        self.delete_flush_interval = delete_flush_interval
+        self.heartbeat = heartbeat
+        self.should_pause = should_pause
+        self.pause_interval = pause_interval
+        self.on_complete = on_complete
+
+        self.capacity = num_workers + prefetch_batches * batch_size
+        self._in_flight = 0
+        self._slots = threading.Condition()
+
+        self._work = queue.Queue()
+        self._deletes = queue.Queue()
+        self._stopping = threading.Event()
+        self._workers_done = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def in_flight(self) -> int:
+        """Messages received but not yet finished (queued or being processed)"""
+        with self._slots:
+            return self._in_flight
+
+    def start(self) -> None:
+        """Start the receiver, worker and deleter threads"""
+        self._threads = [threading.Thread(target=self._receive_loop, name="sqs-receiver", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._worker_loop, name=f"sqs-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        self._deleter = threading.Thread(target=self._delete_loop, name="sqs-deleter", daemon=True)
+        for thread in self._threads + [self._deleter]:
+            thread.start()
+        if self.heartbeat is not None:
+            self.heartbeat.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop receiving, finish queued messages and flush pending deletes"""
+        self._stopping.set()
+        with self._slots:
+            self._slots.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._workers_done.set()
+        self._deleter.join(timeout)
+        if self.heartbeat is not None:
+            self.heartbeat.stop(timeout)
+
+    def _reserve(self) -> int:
+        """Wait for room for a full receive batch; returns how many messages to ask for"""
+        wanted = min(self.batch_size, self.capacity)
+        with self._slots:
+            while self.capacity - self._in_flight < wanted:
+                if self._stopping.is_set():
+                    return 0
+                self._slots.wait(self.pause_interval)
+            self._in_flight += wanted
+            return wanted
+
+    def _release(self, count: int = 1) -> None:
+        if count <= 0:
+            return
+        with self._slots:
+            self._in_flight -= count
+            self._slots.notify_all()
+
+    def _receive_loop(self):
+        while not self._stopping.is_set():
+            if self.should_pause is not None and self.should_pause():
+                self._stopping.wait(self.pause_interval)
+                continue
+
+            wanted = self._reserve()
+            if not wanted:
+                continue
+
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=wanted,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    MessageAttributeNames=['All'],
+                    AttributeNames=['SentTimestamp', 'ApproximateReceiveCount'],
+                    VisibilityTimeout=self.visibility_timeout
+                )
+            except Exception as e:
+                self._release(wanted)
+                logger.error("❌ SQS receive error: %s", e)
+                self._stopping.wait(5)  # Wait before retrying
+                continue
+
+            messages = response.get('Messages', [])
+            self._release(wanted - len(messages))
+            if not messages:
+                log_sampled(logger, logging.INFO, "sqs-empty-poll", "⏳ No messages in queue...")
+                continue
+
+            received_at = time.time()
+            for message in messages:
+                if self.heartbeat is not None:
+                    self.heartbeat.track(message['ReceiptHandle'])
+                self._work.put((message, received_at))
+
+    def _worker_loop(self):
+        while True:
+            try:
+                message, received_at = self._work.get(timeout=self.pause_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            try:
+                succeeded = self.handler(message)
+            except Exception as e:
+                logger.exception("❌ Error processing individual message: %s", e)
+                succeeded = False
+
+            if self.heartbeat is not None:
+                self.heartbeat.untrack(message['ReceiptHandle'])
+            if self.on_complete is not None:
+                try:
+                    self.on_complete(message, received_at, succeeded)
+                except Exception as e:
+                    logger.warning("⚠️ on_complete hook failed: %s", e)
+            if succeeded:
+                self._deletes.put(message)
+            self._release()
+
+    def _delete_loop(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self._deletes.get(timeout=self.delete_flush_interval))
+                while len(batch) < 10:
+                    batch.append(self._deletes.get_nowait())
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._delete_batch(batch)
+            elif self._workers_done.is_set():
+                return
+
+    def _delete_batch(self, messages: List[Dict]) -> None:
+        entries = [
+            {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+            for i, message in enumerate(messages)
+        ]
+        try:
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        except Exception as e:
+            logger.error("❌ Batch delete of %s messages failed: %s", len(entries), e)
+            return
+
+        for failure in response.get('Failed', []):
+            logger.warning("⚠️ Failed to delete message %s: %s", failure.get('Id'), failure.get('Message'))
+        logger.debug("✅ Deleted %s processed messages", len(response.get('Successful', [])))
@@ -0,0 +1,159 @@
+import functools
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily
+
+# Covers a 1ms cache hit up to a request that waited out its full deadline
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "yolo_pipeline_stage_seconds",
+    "Time spent in each stage of the prediction pipeline",
+    ["pipeline", "stage"], buckets=LATENCY_BUCKETS,
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "yolo_inference_batch_size",
+    "Images per batched forward pass",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32),
+)
+INFERENCE_BATCH_SECONDS = Histogram(
+    "yolo_inference_batch_seconds",
+    "Time to run one batched forward pass",
+    buckets=LATENCY_BUCKETS,
+)
+SQS_MESSAGE_SECONDS = Histogram(
+    "yolo_sqs_message_seconds",
+    "Time from receiving an SQS message to finishing its handler",
+    ["outcome"], buckets=LATENCY_BUCKETS,
+)
+SQS_QUEUE_LAG_SECONDS = Histogram(
+    "yolo_sqs_queue_lag_seconds",
+    "Time an SQS message waited in the queue before it was received",
+    buckets=LATENCY_BUCKETS + (120.0, 300.0, 900.0, 3600.0),
+)
+STORAGE_CALL_SECONDS = Histogram(
+    "yolo_storage_call_seconds",
+    "Latency of storage backend calls",
+    ["backend", "method"], buckets=LATENCY_BUCKETS,
+)
+INFERENCE_PENDING = Gauge(
+    "yolo_inference_pending",
+    "Inference requests admitted and not yet finished",
+)
+UPLOADS_PENDING = Gauge(
+    "yolo_s3_uploads_pending",
+    "Files spooled for background upload to S3 and not yet uploaded",
+)
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    """Time a block of work as one pipeline stage"""
+    histogram = STAGE_SECONDS.labels(pipeline, name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def observe_stage(pipeline: str, name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(pipeline, name).observe(seconds)
+
+
+async def timed(pipeline: str, name: str, awaitable):
+    """Await something as one pipeline stage, e.g. one branch of an asyncio.gather"""
+    with stage(pipeline, name):
+        return await awaitable
+
+
+def observe_batches(predict_fn):
+    """Wrap a batch predict function so batch sizes and forward-pass times are recorded"""
+    @functools.wraps(predict_fn)
+    def observed(images):
+        INFERENCE_BATCH_SIZE.observe(len(images))
+        with INFERENCE_BATCH_SECONDS.time():
+            return predict_fn(images)
+    return observed
+
+
+def observe_sqs_message(message, received_at: float, succeeded: bool) -> None:
+    """ConsumerPool on_complete hook: receive-to-complete latency and queue lag"""
+    SQS_MESSAGE_SECONDS.labels("success" if succeeded else "failure").observe(time.time() - received_at)
+    sent_timestamp = message.get("Attributes", {}).get("SentTimestamp")
+    # Only the first receive measures queue lag; redeliveries would count the visibility timeout
+    if sent_timestamp and message["Attributes"].get("ApproximateReceiveCount", "1") == "1":
+        SQS_QUEUE_LAG_SECONDS.observe(max(0.0, received_at - int(sent_timestamp) / 1000.0))
+
+
+def instrument_storage(backend) -> None:
+    """Time every public storage method on this backend instance, labelled by backend and method"""
+    from storage.base import BaseStorage
+
+    backend_name = type(backend).__name__
+    for name in dir(BaseStorage):
+        if name.startswith("_") or not callable(getattr(BaseStorage, name)):
+            continue
+        method = getattr(backend, name)
+        histogram = STORAGE_CALL_SECONDS.labels(backend_name, name)
+
+        def timed_method(*args, _method=method, _histogram=histogram, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _histogram.observe(time.perf_counter() - start)
+
+        setattr(backend, name, functools.wraps(method)(timed_method))
+
+
+class AdmissionCollector:
+    """Exposes the admission controller's own counters at scrape time, so shedding adds no work"""
+
+    def __init__(self, admission):
+        self.admission = admission
+
+    def collect(self):
+        stats = self.admission.stats()
+        rejected = CounterMetricFamily("yolo_predict_rejected", "/predict requests shed with 503",
+                                       labels=["reason"])
+        rejected.add_metric(["queue_full"], stats["rejected_queue_full"])
+        rejected.add_metric(["deadline"], stats["rejected_deadline"])
+        rejected.add_metric(["timeout"], stats["timed_out"])
+        yield rejected
+        yield CounterMetricFamily("yolo_inference_admitted", "Inference requests admitted",
+                                  value=stats["admitted"])
+
+
+def register_admission(admission) -> None:
+    INFERENCE_PENDING.set_function(admission.pending)
+    REGISTRY.register(AdmissionCollector(admission))
+
+
+class UploadCollector:
+    """Background upload counters, read from the upload queue at scrape time"""
+
+    def __init__(self, uploads):
+        self.uploads = uploads
+
+    def collect(self):
+        stats = self.uploads.stats()
+        uploads = CounterMetricFamily("yolo_s3_uploads", "Background S3 uploads by outcome",
+                                      labels=["outcome"])
+        uploads.add_metric(["uploaded"], stats["uploaded"])
+        uploads.add_metric(["failed"], stats["failed"])
+        yield uploads
+        yield CounterMetricFamily("yolo_s3_upload_retries", "Background S3 upload attempts that were retried",
+                                  value=stats["retries"])
+
+
+def register_uploads(uploads) -> None:
+    UPLOADS_PENDING.set_function(uploads.pending)
+    REGISTRY.register(UploadCollector(uploads))
+
+
+def render():
+    """Current metrics in the Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
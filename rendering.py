@@ -0,0 +1,90 @@
+import functools
+import os
+import zlib
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# Ultralytics' default palette, in BGR
+PALETTE = [
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207), (10, 249, 72),
+    (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0), (168, 153, 44), (255, 194, 0),
+    (147, 69, 52), (255, 115, 100), (236, 24, 0), (255, 56, 132), (133, 0, 82), (255, 56, 203),
+    (200, 149, 255), (199, 55, 255),
+]
+TEXT_COLOR = (255, 255, 255)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# render: lazy (default) leaves the annotated image to be drawn from the stored detections
+# the first time it is requested, eager draws it before responding, deferred draws it
+# after the response is sent
+RENDER_MODES = ("lazy", "eager", "deferred")
+RENDER_MODE = os.getenv("RENDER_MODE", "lazy").lower()
+if RENDER_MODE not in RENDER_MODES:
+    raise ValueError(f"Unsupported RENDER_MODE: {RENDER_MODE} (expected one of {', '.join(RENDER_MODES)})")
+
+
+def color_for(label: str) -> Tuple[int, int, int]:
+    """Stable per-label color, so a label looks the same whichever model index it came from"""
+    return PALETTE[zlib.crc32(label.encode()) % len(PALETTE)]
+
+
+class Renderer:
+    """
+    Draws detection boxes and labels straight into a BGR frame.
+
+    Boxes are filled with array slices rather than per-pixel drawing calls, and each
+    label's text ("person 0.87") is rasterised once into a boolean mask and cached, so
+    repeated labels cost a single masked assignment.
+    """
+
+    def __init__(self, line_width: int = None, font_scale: float = None, glyph_cache_size: int = 4096):
+        self.line_width = line_width
+        self.font_scale = font_scale
+        self._glyph = functools.lru_cache(maxsize=glyph_cache_size)(self._rasterise)
+
+    def _rasterise(self, text: str, scale: float, thickness: int) -> np.ndarray:
+        (width, height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        pad = max(thickness, 2)
+        canvas = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+        cv2.putText(canvas, text, (pad, height + pad), FONT, scale, 255, thickness, cv2.LINE_AA)
+        return canvas > 127
+
+    def draw(self, frame: np.ndarray, detections: List[Dict]) -> np.ndarray:
+        """Annotate frame in place with {"label", "score", "box"} detections and return it"""
+        frame_h, frame_w = frame.shape[:2]
+        # Same scaling rule as Ultralytics' annotator, so images look as they did with Results.plot()
+        lw = self.line_width or max(round((frame_h + frame_w) / 2 * 0.003), 2)
+        scale = self.font_scale or lw / 3
+        thickness = max(lw - 1, 1)
+
+        for detection in detections:
+            x1, y1, x2, y2 = (int(round(v)) for v in detection["box"])
+            x1, x2 = max(0, min(x1, frame_w - 1)), max(0, min(x2, frame_w))
+            y1, y2 = max(0, min(y1, frame_h - 1)), max(0, min(y2, frame_h))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            color = color_for(detection["label"])
+
+            frame[y1:min(y1 + lw, y2), x1:x2] = color
+            frame[max(y2 - lw, y1):y2, x1:x2] = color
+            frame[y1:y2, x1:min(x1 + lw, x2)] = color
+            frame[y1:y2, max(x2 - lw, x1):x2] = color
+
+            mask = self._glyph(f"{detection['label']} {detection['score']:.2f}", scale, thickness)
+            self._label(frame, mask, x1, y1, color)
+        return frame
+
+    @staticmethod
+    def _label(frame: np.ndarray, mask: np.ndarray, x: int, y: int, color) -> None:
+        # Above the box when there is room, otherwise just inside its top edge
+        height, width = mask.shape
+        top = y - height if y >= height else y
+        region = frame[top:top + height, x:x + width]
+        mask = mask[:region.shape[0], :region.shape[1]]
+        region[...] = color
+        region[mask] = TEXT_COLOR
+
+
+renderer = Renderer()
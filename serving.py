@@ -0,0 +1,102 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+
+from clients import s3_client
+
+# Stored images never change once written, so clients and CDNs may keep them for long
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "31536000"))
+IMAGE_REDIRECT_TO_S3 = os.getenv("IMAGE_REDIRECT_TO_S3", "false").lower() == "true"
+IMAGE_PRESIGN_EXPIRES = int(os.getenv("IMAGE_PRESIGN_EXPIRES", "3600"))
+
+
+# Preferred on equal q-values: smallest files first. Wildcards only ever get JPEG, the stored format
+SERVED_TYPES = ("image/webp", "image/jpeg", "image/png")
+
+
+def negotiate_image_type(accept: Optional[str]) -> Optional[str]:
+    """Pick the served image type an Accept header ranks highest; None if it accepts none of them"""
+    if accept is None:
+        return "image/jpeg"
+    quality = {}
+    for part in accept.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_range = media_range.lower()
+        if media_range == "image/jpg":
+            media_range = "image/jpeg"
+        quality[media_range] = max(q, quality.get(media_range, 0.0))
+
+    wildcard = quality.get("image/*", quality.get("*/*", 0.0))
+    ranked = [(quality[media_type], -i, media_type) for i, media_type in enumerate(SERVED_TYPES)
+              if quality.get(media_type, 0.0) > 0]
+    if wildcard > 0 and "image/jpeg" not in quality:
+        ranked.append((wildcard, -SERVED_TYPES.index("image/jpeg"), "image/jpeg"))
+    return max(ranked)[2] if ranked else None
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """Strong validator from file identity: inode, modification time and size"""
+    return f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins; If-Modified-Since only counts without it"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def serve_file(request: Request, path: str, media_type: Optional[str] = None,
+               headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """
+    Serve a local image with ETag, Last-Modified and Cache-Control, answering conditional
+    requests with 304. FileResponse handles Range/If-Range and uses the server's zero-copy
+    path (ASGI pathsend) where the server supports it. None if the file is gone.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    etag = file_etag(stat)
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable",
+    }
+    if not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+
+def presigned_redirect(bucket: str, key: str, media_type: Optional[str] = None,
+                       headers: Optional[Dict[str, str]] = None) -> RedirectResponse:
+    """307 to a presigned S3 GET URL, so the image bytes bypass this process entirely"""
+    params = {"Bucket": bucket, "Key": key}
+    if media_type:
+        # Objects are uploaded without a content type; make S3 answer with the negotiated one
+        params["ResponseContentType"] = media_type
+    url = s3_client().generate_presigned_url("get_object", Params=params, ExpiresIn=IMAGE_PRESIGN_EXPIRES)
+    # Clients may reuse the redirect, but never past the URL's expiry
+    max_age = max(0, IMAGE_PRESIGN_EXPIRES - 60)
+    return RedirectResponse(url, status_code=307,
+                            headers={**(headers or {}), "Cache-Control": f"private, max-age={max_age}"})
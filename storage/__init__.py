@@ -2,6 +2,7 @@ import os
 
 from .sqlite_storage import SQLiteStorage
 from .dynamodb_storage import DynamoDBStorage
+from .cached_storage import CachedStorage
 from .base import BaseStorage
 
 
@@ -9,8 +10,16 @@ def get_storage() -> BaseStorage:
     storage_type = os.getenv("STORAGE_TYPE", "sqlite").lower()
 
     if storage_type == "dynamodb":
-        return DynamoDBStorage()
+        backend = DynamoDBStorage()
     elif storage_type == "sqlite":
-        return SQLiteStorage()
+        backend = SQLiteStorage()
     else:
-        raise ValueError(f"Unsupported STORAGE_TYPE: {storage_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported STORAGE_TYPE: {storage_type}")
+
+    cache_size = int(os.getenv("STORAGE_CACHE_SIZE", "10000"))
+    if cache_size <= 0:
+        return backend
+
+    ttl = float(os.getenv("STORAGE_CACHE_TTL_SECONDS", "0")) or None
+    negative_ttl = float(os.getenv("STORAGE_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+    return CachedStorage(backend, max_entries=cache_size, ttl_seconds=ttl, negative_ttl_seconds=negative_ttl)
\ No newline at end of file
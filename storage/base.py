@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 class BaseStorage(ABC):
@@ -17,6 +17,74 @@ class BaseStorage(ABC):
         """
         pass
 
+    def save_detections(self, prediction_uid: str, detections: List[Dict]) -> None:
+        """
+        Save many detected objects for a prediction session in one write.
+        Each detection is a dict with "label", "score" and "box" keys.
+        """
+        for detection in detections:
+            self.save_detection(prediction_uid, detection["label"], detection["score"], detection["box"])
+
+    def save_prediction_with_detections(self, uid: str, original_image: str, predicted_image: str,
+                                        detections: List[Dict], upload_status: Optional[str] = None) -> Optional[Dict]:
+        """
+        Save a prediction session and all of its detections together, with an initial
+        upload status ("pending" when its images are about to be queued for S3).
+        Returns the record exactly as get_prediction would read it back, or None
+        if the backend can't tell without reading it.
+        """
+        self.save_prediction(uid, original_image, predicted_image)
+        self.save_detections(uid, detections)
+        if upload_status is not None:
+            self.set_upload_status(uid, upload_status)
+        return None
+
+    def save_predictions_with_detections(self, predictions: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Save many prediction sessions and their detections in one bulk write.
+        Each entry is a dict with "uid", "original_image", "predicted_image" and "detections" keys,
+        and optionally "upload_status". Returns the stored records like
+        save_prediction_with_detections, in input order.
+        """
+        return [
+            self.save_prediction_with_detections(p["uid"], p["original_image"], p["predicted_image"],
+                                                 p["detections"], p.get("upload_status"))
+            for p in predictions
+        ]
+
+    def save_content_hash(self, content_hash: str, prediction_uid: str) -> None:
+        """
+        Remember which prediction was produced for an image content hash.
+        Backends without support simply don't persist it.
+        """
+        pass
+
+    def get_prediction_uid_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """
+        Look up the prediction produced for an image content hash, if any.
+        """
+        return None
+
+    def save_image_prediction(self, image_path: str, prediction_uid: str) -> None:
+        """
+        Remember which prediction an annotated image path belongs to, so the image can be
+        drawn when its path is first requested. Backends without support simply don't persist it.
+        """
+        pass
+
+    def get_prediction_uid_by_image(self, image_path: str) -> Optional[str]:
+        """
+        Look up the prediction an annotated image path belongs to, if any.
+        """
+        return None
+
+    def set_upload_status(self, uid: str, status: str) -> None:
+        """
+        Record whether the prediction's images have reached S3 ("pending", "uploaded" or "failed").
+        Backends without support simply don't persist it.
+        """
+        pass
+
     @abstractmethod
     def get_prediction(self, uid: str) -> Dict:
         """
@@ -38,6 +106,22 @@ class BaseStorage(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_predictions_by_label_page(self, label: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of prediction sessions that include a detection with a specific label.
+        Returns {"items": [...], "next_cursor": token or None}; pass next_cursor back to continue.
+        """
+        pass
+
+    @abstractmethod
+    def get_predictions_by_score_page(self, min_score: float, limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of prediction sessions that include detections with score >= min_score.
+        Returns {"items": [...], "next_cursor": token or None}; pass next_cursor back to continue.
+        """
+        pass
+
     @abstractmethod
     def get_prediction_image_path(self, uid: str) -> str:
         """
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .base import BaseStorage
+
+# Marks a cached "not found" so repeated polls for an unknown UID skip the backend
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU map with optional per-entry TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, key, default=None):
+        """Current value for key without touching recency, expiry or the counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class CachedStorage(BaseStorage):
+    """
+    Read-through cache in front of any BaseStorage for the per-UID lookups.
+
+    Prediction rows never change once written (apart from the upload status,
+    which is updated in the cached entry), so get_prediction and
+    get_prediction_image_path results are kept in a bounded LRU (with an
+    optional TTL). Misses are cached briefly so clients polling for a UID that
+    is still being processed don't hammer the backend; any write for that UID
+    clears the negative entry. Backends return the record they just wrote, so
+    the cache is filled on write without reading anything back and the first
+    read after a prediction is a hit. Everything else is passed straight through.
+    """
+
+    def __init__(self, backend: BaseStorage, max_entries: int = 10000, ttl_seconds: Optional[float] = None,
+                 negative_ttl_seconds: float = 5.0):
+        self.backend = backend
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.predictions = LRUCache(max_entries, ttl_seconds)
+        self.image_paths = LRUCache(max_entries, ttl_seconds)
+
+    def __getattr__(self, name):
+        # Expose backend attributes such as table_name, db_path or close()
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def stats(self) -> Dict:
+        return {
+            "predictions": self.predictions.stats(),
+            "image_paths": self.image_paths.stats()
+        }
+
+    def _cached(self, cache: LRUCache, uid: str, load):
+        value = cache.get(uid, None)
+        if value is _MISSING:
+            return None
+        if value is not None:
+            return value
+
+        value = load(uid)
+        if value is None:
+            if self.negative_ttl_seconds:
+                cache.put(uid, _MISSING, ttl_seconds=self.negative_ttl_seconds)
+        else:
+            cache.put(uid, value)
+        return value
+
+    def _fill(self, uid: str, predicted_image: str, record: Optional[Dict]) -> None:
+        self.image_paths.put(uid, predicted_image)
+        if record is None:
+            self.predictions.discard(uid)
+        else:
+            self.predictions.put(uid, record)
+
+    def save_prediction(self, uid: str, original_image: str, predicted_image: str) -> None:
+        self.backend.save_prediction(uid, original_image, predicted_image)
+        # Detections usually follow, so only the image path is final at this point
+        self.image_paths.put(uid, predicted_image)
+        self.predictions.discard(uid)
+
+    def save_detection(self, prediction_uid: str, label: str, score: float, box: List[float]) -> None:
+        self.backend.save_detection(prediction_uid, label, score, box)
+        self.predictions.discard(prediction_uid)
+
+    def save_detections(self, prediction_uid: str, detections: List[Dict]) -> None:
+        self.backend.save_detections(prediction_uid, detections)
+        self.predictions.discard(prediction_uid)
+
+    def save_prediction_with_detections(self, uid: str, original_image: str, predicted_image: str,
+                                        detections: List[Dict], upload_status: Optional[str] = None) -> Optional[Dict]:
+        record = self.backend.save_prediction_with_detections(uid, original_image, predicted_image, detections,
+                                                              upload_status)
+        self._fill(uid, predicted_image, record)
+        return record
+
+    def save_predictions_with_detections(self, predictions: List[Dict]) -> List[Optional[Dict]]:
+        records = self.backend.save_predictions_with_detections(predictions)
+        for p, record in zip(predictions, records):
+            self._fill(p["uid"], p["predicted_image"], record)
+        return records
+
+    def save_content_hash(self, content_hash: str, prediction_uid: str) -> None:
+        self.backend.save_content_hash(content_hash, prediction_uid)
+
+    def save_image_prediction(self, image_path: str, prediction_uid: str) -> None:
+        self.backend.save_image_prediction(image_path, prediction_uid)
+
+    def set_upload_status(self, uid: str, status: str) -> None:
+        self.backend.set_upload_status(uid, status)
+        # Keep a cached record (with the new status) rather than sending the next read to the backend
+        record = self.predictions.peek(uid)
+        if isinstance(record, dict):
+            self.predictions.put(uid, {**record, "upload_status": status})
+        else:
+            self.predictions.discard(uid)
+
+    def get_prediction_uid_by_content_hash(self, content_hash: str) -> Optional[str]:
+        return self.backend.get_prediction_uid_by_content_hash(content_hash)
+
+    def get_prediction_uid_by_image(self, image_path: str) -> Optional[str]:
+        return self.backend.get_prediction_uid_by_image(image_path)
+
+    def get_prediction(self, uid: str) -> Dict:
+        return self._cached(self.predictions, uid, self.backend.get_prediction)
+
+    def get_prediction_image_path(self, uid: str) -> str:
+        return self._cached(self.image_paths, uid, self.backend.get_prediction_image_path)
+
+    def get_predictions_by_label(self, label: str) -> List[Dict]:
+        return self.backend.get_predictions_by_label(label)
+
+    def get_predictions_by_score(self, min_score: float) -> List[Dict]:
+        return self.backend.get_predictions_by_score(min_score)
+
+    def get_predictions_by_label_page(self, label: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        return self.backend.get_predictions_by_label_page(label, limit, cursor)
+
+    def get_predictions_by_score_page(self, min_score: float, limit: int, cursor: Optional[str] = None) -> Dict:
+        return self.backend.get_predictions_by_score_page(min_score, limit, cursor)
@@ -1,20 +1,59 @@
-import boto3
-from boto3.dynamodb.conditions import Key
-from typing import List, Dict
+from boto3.dynamodb.conditions import Key, Attr
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from clients import get_resource
 from .base import BaseStorage
+from .pagination import encode_cursor, decode_cursor, InvalidCursor
 import os
+import time
 import hashlib
+import logging
 from decimal import Decimal
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Score range lookups use a write-sharded GSI: detections are spread over
+# SCORE_SHARDS partitions ("SCORE#0".."SCORE#n") by prediction UID, with score
+# as the sort key, so a min_score query reads only matching rows from each shard.
+# Changing the shard count requires re-running the backfill in storage.migrations.
+SCORE_INDEX_NAME = "ScoreRangeIndex"
+SCORE_SHARDS = int(os.getenv("DYNAMODB_SCORE_SHARDS", "8"))
+
+
+def score_shard_for(prediction_uid: str, shards: int = SCORE_SHARDS) -> str:
+    """Stable score-index partition for all detections of a prediction"""
+    bucket = int(hashlib.md5(prediction_uid.encode()).hexdigest(), 16) % shards
+    return f"SCORE#{bucket}"
+
+
+def score_index_definition() -> Dict:
+    return {
+        'IndexName': SCORE_INDEX_NAME,
+        'KeySchema': [
+            {'AttributeName': 'score_shard', 'KeyType': 'HASH'},
+            {'AttributeName': 'score', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'KEYS_ONLY'},
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    }
+
 
 class DynamoDBStorage(BaseStorage):
+    # How long to wait before asking DynamoDB again whether the score index is ready
+    SCORE_INDEX_RECHECK_SECONDS = 60
+
     def __init__(self, table_name: str = None):
         if table_name is None:
             table_name = os.getenv("DYNAMODB_TABLE", "maisa-YoloPredictions-Dev")
 
-        # Use US East 2 (Ohio) region
-        self.dynamodb = boto3.resource("dynamodb", region_name="us-east-2")
+        self._score_index_active = False
+        self._score_index_checked_at = 0.0
+
+        # Use US East 2 (Ohio) region, with the shared pool/retry/timeout settings
+        self.dynamodb = get_resource("dynamodb", region_name="us-east-2")
         self.table_name = table_name
         self.table = self.dynamodb.Table(table_name)
 
@@ -26,9 +65,9 @@ class DynamoDBStorage(BaseStorage):
         try:
             # Check if table exists
             self.table.load()
-            print(f"✅ DynamoDB table '{self.table_name}' already exists in us-east-2")
+            logger.info("✅ DynamoDB table '%s' already exists in us-east-2", self.table_name)
         except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
-            print(f"📦 Creating DynamoDB table '{self.table_name}' in us-east-2...")
+            logger.info("📦 Creating DynamoDB table '%s' in us-east-2...", self.table_name)
             self._create_table()
 
     def _create_table(self):
@@ -44,7 +83,8 @@ class DynamoDBStorage(BaseStorage):
                     {'AttributeName': 'PK', 'AttributeType': 'S'},
                     {'AttributeName': 'SK', 'AttributeType': 'S'},
                     {'AttributeName': 'label', 'AttributeType': 'S'},
-                    {'AttributeName': 'score', 'AttributeType': 'N'}
+                    {'AttributeName': 'score', 'AttributeType': 'N'},
+                    {'AttributeName': 'score_shard', 'AttributeType': 'S'}
                 ],
                 GlobalSecondaryIndexes=[
                     {
@@ -58,17 +98,7 @@ class DynamoDBStorage(BaseStorage):
                             'WriteCapacityUnits': 5
                         }
                     },
-                    {
-                        'IndexName': 'ScoreIndex',
-                        'KeySchema': [
-                            {'AttributeName': 'score', 'KeyType': 'HASH'}
-                        ],
-                        'Projection': {'ProjectionType': 'ALL'},
-                        'ProvisionedThroughput': {
-                            'ReadCapacityUnits': 5,
-                            'WriteCapacityUnits': 5
-                        }
-                    }
+                    score_index_definition()
                 ],
                 ProvisionedThroughput={
                     'ReadCapacityUnits': 5,
@@ -79,154 +109,454 @@ class DynamoDBStorage(BaseStorage):
             # Wait for table to be created
             table.wait_until_exists()
             self.table = table
-            print(f"✅ DynamoDB table '{self.table_name}' created successfully in us-east-2")
+            logger.info("✅ DynamoDB table '%s' created successfully in us-east-2", self.table_name)
 
         except Exception as e:
-            print(f"❌ Failed to create DynamoDB table: {e}")
+            logger.error("❌ Failed to create DynamoDB table: %s", e)
             raise
 
-    def save_prediction(self, uid: str, original_image: str, predicted_image: str) -> None:
-        """Save metadata for a prediction session"""
-        timestamp = datetime.now().isoformat()
-
+    def _prediction_item(self, uid: str, original_image: str, predicted_image: str,
+                         upload_status: Optional[str] = None) -> Dict:
         item = {
             "PK": f"PRED#{uid}",
             "SK": "META",
             "uid": uid,
-            "timestamp": timestamp,
+            "timestamp": datetime.now().isoformat(),
             "original_image": original_image,
             "predicted_image": predicted_image
         }
+        if upload_status is not None:
+            item["upload_status"] = upload_status
+        return item
 
-        print(f"✅ Saving prediction metadata to {self.table_name}: {item}")
-        try:
-            self.table.put_item(Item=item)
-        except Exception as e:
-            print(f"❌ Failed to save prediction: {e}")
-            raise
-
-    def save_detection(self, prediction_uid: str, label: str, score: float, box: List[float]) -> None:
-        """Save a single detected object"""
+    def _detection_item(self, prediction_uid: str, label: str, score: float, box: List[float]) -> Dict:
         detection_id = hashlib.md5(f"{label}-{score}-{box}".encode()).hexdigest()
-
-        item = {
+        return {
             "PK": f"PRED#{prediction_uid}",
             "SK": f"DETECT#{label}#{detection_id}",
             "prediction_uid": prediction_uid,
             "label": label,
             "score": Decimal(str(score)),
+            "score_shard": score_shard_for(prediction_uid),
             "box": [Decimal(str(x)) for x in box]
         }
 
-        print(f"✅ Saving detection to {self.table_name}: {item}")
+    def _batch_write(self, items: List[Dict]) -> None:
+        # batch_writer groups puts into BatchWriteItem calls of up to 25 items
+        # and retries unprocessed items; identical detections collapse into one
+        with self.table.batch_writer(overwrite_by_pkeys=["PK", "SK"]) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def save_prediction(self, uid: str, original_image: str, predicted_image: str) -> None:
+        """Save metadata for a prediction session"""
+        item = self._prediction_item(uid, original_image, predicted_image)
+
+        logger.debug("✅ Saving prediction metadata to %s: %s", self.table_name, item)
         try:
             self.table.put_item(Item=item)
         except Exception as e:
-            print(f"❌ Failed to save detection: {e}")
+            logger.error("❌ Failed to save prediction: %s", e)
             raise
 
-    def get_prediction(self, uid: str) -> Dict:
-        """Retrieve full prediction session including metadata and all detections"""
+    def save_detection(self, prediction_uid: str, label: str, score: float, box: List[float]) -> None:
+        """Save a single detected object"""
+        item = self._detection_item(prediction_uid, label, score, box)
+
+        logger.debug("✅ Saving detection to %s: %s", self.table_name, item)
         try:
-            response = self.table.query(
-                KeyConditionExpression=Key("PK").eq(f"PRED#{uid}")
-            )
+            self.table.put_item(Item=item)
+        except Exception as e:
+            logger.error("❌ Failed to save detection: %s", e)
+            raise
 
-            items = response.get("Items", [])
-            if not items:
-                return None
+    def save_detections(self, prediction_uid: str, detections: List[Dict]) -> None:
+        """Save many detected objects with batched writes"""
+        items = [
+            self._detection_item(prediction_uid, d["label"], d["score"], d["box"])
+            for d in detections
+        ]
 
-            # Find metadata item
-            meta = next((item for item in items if item["SK"] == "META"), None)
-            if not meta:
-                return None
+        logger.debug("✅ Saving %s detections to %s", len(items), self.table_name)
+        try:
+            self._batch_write(items)
+        except Exception as e:
+            logger.error("❌ Failed to save detections: %s", e)
+            raise
 
-            # Extract detection objects
-            detections = []
-            for item in items:
-                if item["SK"].startswith("DETECT#"):
-                    detections.append({
-                        "id": item["SK"],  # Use SK as ID since we don't have auto-increment
-                        "label": item["label"],
-                        "score": float(item["score"]),  # Convert Decimal back to float
-                        "box": [float(x) for x in item["box"]]  # Convert Decimal back to float
-                    })
-
-            return {
-                "uid": uid,
-                "timestamp": meta.get("timestamp"),
-                "original_image": meta["original_image"],
-                "predicted_image": meta["predicted_image"],
-                "detection_objects": detections
-            }
+    def save_prediction_with_detections(self, uid: str, original_image: str, predicted_image: str,
+                                        detections: List[Dict], upload_status: Optional[str] = None) -> Dict:
+        """Save a prediction session and its detections with batched writes; returns the stored record"""
+        items = [self._prediction_item(uid, original_image, predicted_image, upload_status)]
+        items += [self._detection_item(uid, d["label"], d["score"], d["box"]) for d in detections]
 
+        logger.debug("✅ Saving prediction %s with %s detections to %s", uid, len(detections), self.table_name)
+        try:
+            self._batch_write(items)
         except Exception as e:
-            print(f"❌ Failed to get prediction: {e}")
-            return None
+            logger.error("❌ Failed to save prediction with detections: %s", e)
+            raise
+        return self._prediction_record(uid, items)
+
+    def save_predictions_with_detections(self, predictions: List[Dict]) -> List[Dict]:
+        """Save many prediction sessions and their detections with batched writes; returns the stored records"""
+        items_by_uid = {}
+        for p in predictions:
+            items = [self._prediction_item(p["uid"], p["original_image"], p["predicted_image"], p.get("upload_status"))]
+            items += [self._detection_item(p["uid"], d["label"], d["score"], d["box"]) for d in p["detections"]]
+            items_by_uid[p["uid"]] = items
+        items = [item for uid_items in items_by_uid.values() for item in uid_items]
+
+        logger.debug("✅ Saving %s predictions (%s items) to %s", len(predictions), len(items), self.table_name)
+        try:
+            self._batch_write(items)
+        except Exception as e:
+            logger.error("❌ Failed to save predictions with detections: %s", e)
+            raise
+        return [self._prediction_record(uid, uid_items) for uid, uid_items in items_by_uid.items()]
 
-    def get_predictions_by_label(self, label: str) -> List[Dict]:
-        """Get all prediction sessions that include a detection with a specific label"""
+    def save_content_hash(self, content_hash: str, prediction_uid: str) -> None:
+        """Remember which prediction was produced for an image content hash"""
         try:
-            response = self.table.query(
-                IndexName="LabelIndex",
-                KeyConditionExpression=Key("label").eq(label)
+            self.table.put_item(Item={
+                "PK": f"HASH#{content_hash}",
+                "SK": "META",
+                "prediction_uid": prediction_uid
+            })
+        except Exception as e:
+            logger.error("❌ Failed to save content hash: %s", e)
+
+    def save_image_prediction(self, image_path: str, prediction_uid: str) -> None:
+        """Remember which prediction an annotated image path belongs to"""
+        try:
+            self.table.put_item(Item={
+                "PK": f"IMAGE#{image_path}",
+                "SK": "META",
+                "prediction_uid": prediction_uid
+            })
+        except Exception as e:
+            logger.error("❌ Failed to save image owner: %s", e)
+
+    def set_upload_status(self, uid: str, status: str) -> None:
+        """Record whether the prediction's images have reached S3"""
+        try:
+            # The condition stops a late status update from creating a bare META item
+            self.table.update_item(
+                Key={"PK": f"PRED#{uid}", "SK": "META"},
+                UpdateExpression="SET upload_status = :status",
+                ConditionExpression="attribute_exists(PK)",
+                ExpressionAttributeValues={":status": status}
             )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.warning("⚠️ Prediction %s not found, upload status %s not recorded", uid, status)
+        except Exception as e:
+            logger.error("❌ Failed to save upload status: %s", e)
+            raise
 
-            items = response.get("Items", [])
-            predictions = {}
+    def get_prediction_uid_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Look up the prediction produced for an image content hash"""
+        try:
+            response = self.table.get_item(Key={"PK": f"HASH#{content_hash}", "SK": "META"})
+            return response.get("Item", {}).get("prediction_uid")
+        except Exception as e:
+            logger.error("❌ Failed to look up content hash: %s", e)
+            return None
 
-            for item in items:
-                if item.get("SK", "").startswith("DETECT#"):
-                    pred_uid = item["PK"].split("#")[1]
-                    if pred_uid not in predictions:
-                        # Get metadata for this prediction to include timestamp
-                        meta_response = self.table.get_item(
-                            Key={"PK": f"PRED#{pred_uid}", "SK": "META"}
-                        )
-                        meta_item = meta_response.get("Item", {})
-
-                        predictions[pred_uid] = {
-                            "uid": pred_uid,
-                            "timestamp": meta_item.get("timestamp")
-                        }
+    def get_prediction_uid_by_image(self, image_path: str) -> Optional[str]:
+        """Look up the prediction an annotated image path belongs to"""
+        try:
+            response = self.table.get_item(Key={"PK": f"IMAGE#{image_path}", "SK": "META"})
+            return response.get("Item", {}).get("prediction_uid")
+        except Exception as e:
+            logger.error("❌ Failed to look up image owner: %s", e)
+            return None
 
-            return list(predictions.values())
+    def get_prediction(self, uid: str) -> Dict:
+        """Retrieve full prediction session including metadata and all detections"""
+        try:
+            items = list(self._paginate(
+                self.table.query,
+                KeyConditionExpression=Key("PK").eq(f"PRED#{uid}")
+            ))
+            return self._prediction_record(uid, items)
 
         except Exception as e:
-            print(f"❌ Failed to get predictions by label: {e}")
-            return []
+            logger.error("❌ Failed to get prediction: %s", e)
+            return None
+
+    def _prediction_record(self, uid: str, items: List[Dict]) -> Optional[Dict]:
+        """
+        Prediction record from a prediction's items, as queried or as just written:
+        items with the same key count once, in sort key order like a query returns them
+        """
+        items = sorted({item["SK"]: item for item in items}.values(), key=lambda item: item["SK"])
+
+        # Find metadata item
+        meta = next((item for item in items if item["SK"] == "META"), None)
+        if not meta:
+            return None
+
+        # Extract detection objects
+        detections = []
+        for item in items:
+            if item["SK"].startswith("DETECT#"):
+                detections.append({
+                    "id": item["SK"],  # Use SK as ID since we don't have auto-increment
+                    "label": item["label"],
+                    "score": float(item["score"]),  # Convert Decimal back to float
+                    "box": [float(x) for x in item["box"]]  # Convert Decimal back to float
+                })
+
+        return {
+            "uid": uid,
+            "timestamp": meta.get("timestamp"),
+            "original_image": meta["original_image"],
+            "predicted_image": meta["predicted_image"],
+            "upload_status": meta.get("upload_status"),
+            "detection_objects": detections
+        }
+
+    # batch_get_item accepts at most 100 keys per request
+    BATCH_GET_SIZE = 100
+
+    def _paginate(self, operation, **kwargs) -> Iterator[Dict]:
+        """Yield every item from a query or scan, following LastEvaluatedKey"""
+        while True:
+            response = operation(**kwargs)
+            yield from response.get("Items", [])
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            kwargs["ExclusiveStartKey"] = last_key
+
+    def _batch_get_metadata(self, uids: List[str]) -> Dict[str, Dict]:
+        """Fetch META items for up to BATCH_GET_SIZE predictions in one request, retrying unprocessed keys"""
+        request = {
+            self.table_name: {
+                "Keys": [{"PK": f"PRED#{uid}", "SK": "META"} for uid in uids],
+                "ProjectionExpression": "#uid, #ts",
+                "ExpressionAttributeNames": {"#uid": "uid", "#ts": "timestamp"}
+            }
+        }
+        metadata = {}
+        delay = 0.05
+        while request:
+            response = self.dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(self.table_name, []):
+                metadata[item["uid"]] = item
+            request = response.get("UnprocessedKeys") or None
+            if request:
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+        return metadata
+
+    def _iter_predictions_for_detections(self, detections: Iterable[Dict]) -> Iterator[Dict]:
+        """Turn a stream of detection items into distinct predictions with their timestamps"""
+        seen = set()
+        pending = []
+
+        def flush():
+            metadata = self._batch_get_metadata(pending)
+            for pred_uid in pending:
+                yield {
+                    "uid": pred_uid,
+                    "timestamp": metadata.get(pred_uid, {}).get("timestamp")
+                }
+            pending.clear()
+
+        for item in detections:
+            if not item.get("SK", "").startswith("DETECT#"):
+                continue
+            pred_uid = item["PK"].split("#")[1]
+            if pred_uid in seen:
+                continue
+            seen.add(pred_uid)
+            pending.append(pred_uid)
+            if len(pending) == self.BATCH_GET_SIZE:
+                yield from flush()
+
+        if pending:
+            yield from flush()
+
+    def _iter_sources(self, sources: List) -> Iterator[Dict]:
+        """Yield every item from each (operation, kwargs, key attributes) source in turn"""
+        for operation, kwargs, _ in sources:
+            yield from self._paginate(operation, **kwargs)
+
+    def iter_predictions_by_label(self, label: str) -> Iterator[Dict]:
+        """Stream prediction sessions that include a detection with a specific label"""
+        return self._iter_predictions_for_detections(self._iter_sources(self._label_sources(label)))
+
+    def _score_index_ready(self) -> bool:
+        """Whether ScoreRangeIndex exists and is ACTIVE (i.e. its backfill has finished)"""
+        if self._score_index_active:
+            return True
+        now = time.monotonic()
+        if now - self._score_index_checked_at < self.SCORE_INDEX_RECHECK_SECONDS:
+            return False
+        self._score_index_checked_at = now
 
-    def get_predictions_by_score(self, min_score: float) -> List[Dict]:
-        """Get all prediction sessions that include detections with score >= min_score"""
         try:
-            # Note: This uses scan which is not efficient for large datasets
-            # In production, consider using a different approach or GSI
-            response = self.table.scan()
-            items = response.get("Items", [])
+            description = self.dynamodb.meta.client.describe_table(TableName=self.table_name)["Table"]
+        except Exception as e:
+            logger.warning("⚠️ Could not check %s status: %s", SCORE_INDEX_NAME, e)
+            return False
+        for index in description.get("GlobalSecondaryIndexes", []):
+            if index["IndexName"] == SCORE_INDEX_NAME and index.get("IndexStatus") == "ACTIVE":
+                self._score_index_active = True
+        return self._score_index_active
+
+    def iter_predictions_by_score(self, min_score: float) -> Iterator[Dict]:
+        """
+        Stream prediction sessions that include detections with score >= min_score. Each
+        prediction is yielded once, however many of its detections match.
+        """
+        # Tables that have not been migrated yet (see storage.migrations) fall back to a scan
+        sources = self._score_sources(min_score, use_index=self._score_index_ready())
+        return self._iter_predictions_for_detections(self._iter_sources(sources))
+
+    # Query builders shared by the streaming and the paginated readers, as
+    # (operation, kwargs, key attributes a page can resume from) sources
+    def _label_sources(self, label: str) -> List:
+        return [(
+            self.table.query,
+            {
+                "IndexName": "LabelIndex",
+                "KeyConditionExpression": Key("label").eq(label),
+                "ProjectionExpression": "PK, SK, #label",
+                "ExpressionAttributeNames": {"#label": "label"}
+            },
+            ("PK", "SK", "label")
+        )]
+
+    def _score_sources(self, min_score: float, use_index: bool) -> List:
+        if not use_index:
+            return [(
+                self.table.scan,
+                {
+                    "FilterExpression": Attr("SK").begins_with("DETECT#") & Attr("score").gte(Decimal(str(min_score))),
+                    "ProjectionExpression": "PK, SK"
+                },
+                ("PK", "SK")
+            )]
+        return [
+            (
+                self.table.query,
+                {
+                    "IndexName": SCORE_INDEX_NAME,
+                    "KeyConditionExpression": Key("score_shard").eq(f"SCORE#{shard}") &
+                                              Key("score").gte(Decimal(str(min_score)))
+                },
+                ("PK", "SK", "score_shard", "score")
+            )
+            for shard in range(SCORE_SHARDS)
+        ]
+
+    def _page_predictions(self, sources: List, limit: int,
+                          position: Optional[Dict]) -> Tuple[List[str], Optional[Dict]]:
+        """
+        Collect up to limit distinct prediction UIDs from a list of (operation, kwargs, key attributes)
+        sources, resuming from position. Returns the UIDs and the position to resume from next time.
+        """
+        source_index = position.get("source", 0) if position else 0
+        start_key = position.get("start") if position else None
+        if not isinstance(source_index, int) or not 0 <= source_index < len(sources):
+            raise InvalidCursor("Invalid cursor position")
+        if start_key is not None and not (
+            isinstance(start_key, dict) and all(
+                isinstance(k, str) and isinstance(v, (str, int, float)) and not isinstance(v, bool)
+                for k, v in start_key.items()
+            )
+        ):
+            raise InvalidCursor("Invalid cursor position")
+
+        uids = []
+        seen = set()
+        for index in range(source_index, len(sources)):
+            operation, kwargs, key_attrs = sources[index]
+            kwargs = dict(kwargs)
+            resume_key = start_key
+            if start_key:
+                kwargs["ExclusiveStartKey"] = {
+                    k: Decimal(v) if k == "score" else v for k, v in start_key.items()
+                }
 
-            predictions = {}
+            while True:
+                response = operation(**kwargs)
+                for item in response.get("Items", []):
+                    if item.get("SK", "").startswith("DETECT#"):
+                        pred_uid = item["PK"].split("#")[1]
+                        if pred_uid not in seen:
+                            if len(uids) == limit:
+                                return uids, {"source": index, "start": resume_key}
+                            seen.add(pred_uid)
+                            uids.append(pred_uid)
+                    resume_key = {attr: item[attr] for attr in key_attrs}
+
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                kwargs["ExclusiveStartKey"] = last_key
+                resume_key = last_key
+
+            start_key = None
+
+        return uids, None
+
+    def _build_page(self, uids: List[str], position: Optional[Dict]) -> Dict:
+        metadata = {}
+        for start in range(0, len(uids), self.BATCH_GET_SIZE):
+            metadata.update(self._batch_get_metadata(uids[start:start + self.BATCH_GET_SIZE]))
+        return {
+            "items": [
+                {"uid": pred_uid, "timestamp": metadata.get(pred_uid, {}).get("timestamp")}
+                for pred_uid in uids
+            ],
+            "next_cursor": encode_cursor(position)
+        }
 
-            for item in items:
-                if (item.get("SK", "").startswith("DETECT#") and
-                        float(item.get("score", 0)) >= min_score):
-
-                    pred_uid = item["PK"].split("#")[1]
-                    if pred_uid not in predictions:
-                        # Get metadata for this prediction to include timestamp
-                        meta_response = self.table.get_item(
-                            Key={"PK": f"PRED#{pred_uid}", "SK": "META"}
-                        )
-                        meta_item = meta_response.get("Item", {})
-
-                        predictions[pred_uid] = {
-                            "uid": pred_uid,
-                            "timestamp": meta_item.get("timestamp")
-                        }
+    def get_predictions_by_label_page(self, label: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of prediction sessions that include a detection with a specific label.
+        LabelIndex has no sort key, so a prediction with several matching detections may
+        occasionally repeat on a later page.
+        """
+        position = decode_cursor(cursor)
+        uids, next_position = self._page_predictions(self._label_sources(label), limit, position)
+        return self._build_page(uids, next_position)
+
+    def get_predictions_by_score_page(self, min_score: float, limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of prediction sessions that include detections with score >= min_score.
+        Each shard is read in score order, so a prediction whose matching detections fall on
+        either side of a page boundary may repeat on the next page.
+        """
+        position = decode_cursor(cursor)
+        # A cursor keeps the mode it was issued in, even if the index becomes ready mid-way
+        if position is not None:
+            use_index = position.get("mode") == "index"
+        else:
+            use_index = self._score_index_ready()
+
+        uids, next_position = self._page_predictions(self._score_sources(min_score, use_index), limit, position)
+        if next_position is not None:
+            next_position["mode"] = "index" if use_index else "scan"
+        return self._build_page(uids, next_position)
 
-            return list(predictions.values())
+    def get_predictions_by_label(self, label: str) -> List[Dict]:
+        """Get all prediction sessions that include a detection with a specific label"""
+        try:
+            return list(self.iter_predictions_by_label(label))
+        except Exception as e:
+            logger.error("❌ Failed to get predictions by label: %s", e)
+            return []
 
+    def get_predictions_by_score(self, min_score: float) -> List[Dict]:
+        """Get all prediction sessions that include detections with score >= min_score"""
+        try:
+            return list(self.iter_predictions_by_score(min_score))
         except Exception as e:
-            print(f"❌ Failed to get predictions by score: {e}")
+            logger.error("❌ Failed to get predictions by score: %s", e)
             return []
 
     def get_prediction_image_path(self, uid: str) -> str:
@@ -243,5 +573,5 @@ class DynamoDBStorage(BaseStorage):
             return item["predicted_image"]
 
         except Exception as e:
-            print(f"❌ Failed to get prediction image path: {e}")
+            logger.error("❌ Failed to get prediction image path: %s", e)
             return None
\ No newline at end of file
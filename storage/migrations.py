@@ -0,0 +1,106 @@
+"""
+Migrate an existing DynamoDB predictions table to the sharded score index.
+
+1. Backfill: set score_shard on every DETECT# item that doesn't have it yet.
+2. Create ScoreRangeIndex (if missing). DynamoDB builds the index from the
+   backfilled items and marks it ACTIVE once done; DynamoDBStorage keeps using
+   a scan for score queries until then.
+
+Deploy the code that writes score_shard before running this, so detections
+saved during the migration are covered too. Safe to re-run.
+
+Usage:
+    python -m storage.migrations --table maisa-YoloPredictions-Dev [--drop-old-index]
+"""
+import argparse
+import os
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+from .dynamodb_storage import SCORE_INDEX_NAME, score_index_definition, score_shard_for
+
+
+def backfill_score_shards(table) -> int:
+    """Add score_shard to DETECT# items missing it; returns how many were updated"""
+    updated = 0
+    kwargs = {
+        "FilterExpression": Attr("SK").begins_with("DETECT#") & Attr("score_shard").not_exists(),
+        "ProjectionExpression": "PK, SK, prediction_uid"
+    }
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get("Items", []):
+            prediction_uid = item.get("prediction_uid") or item["PK"].split("#")[1]
+            table.update_item(
+                Key={"PK": item["PK"], "SK": item["SK"]},
+                UpdateExpression="SET score_shard = :shard",
+                ExpressionAttributeValues={":shard": score_shard_for(prediction_uid)}
+            )
+            updated += 1
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return updated
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def wait_for_indexes(client, table_name: str, poll_seconds: float = 20) -> None:
+    """Block until no global secondary index on the table is being created or deleted"""
+    while True:
+        description = client.describe_table(TableName=table_name)["Table"]
+        busy = [
+            index["IndexName"] for index in description.get("GlobalSecondaryIndexes", [])
+            if index.get("IndexStatus") != "ACTIVE"
+        ]
+        if not busy:
+            return
+        print(f"⏳ Waiting for indexes to finish building: {busy}")
+        time.sleep(poll_seconds)
+
+
+def ensure_score_index(client, table_name: str, drop_old_index: bool = False) -> None:
+    """Create ScoreRangeIndex if missing, optionally dropping the old hash-only ScoreIndex"""
+    description = client.describe_table(TableName=table_name)["Table"]
+    indexes = {index["IndexName"] for index in description.get("GlobalSecondaryIndexes", [])}
+
+    if SCORE_INDEX_NAME not in indexes:
+        print(f"📦 Creating {SCORE_INDEX_NAME} on {table_name}...")
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[
+                {'AttributeName': 'score_shard', 'AttributeType': 'S'},
+                {'AttributeName': 'score', 'AttributeType': 'N'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': score_index_definition()}]
+        )
+    else:
+        print(f"✅ {SCORE_INDEX_NAME} already exists on {table_name}")
+
+    if drop_old_index and "ScoreIndex" in indexes:
+        # DynamoDB allows one index change at a time, so wait for the create first
+        wait_for_indexes(client, table_name)
+        print(f"🗑️ Dropping unused ScoreIndex on {table_name}...")
+        client.update_table(
+            TableName=table_name,
+            GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': 'ScoreIndex'}}]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", default=os.getenv("DYNAMODB_TABLE", "maisa-YoloPredictions-Dev"))
+    parser.add_argument("--region", default="us-east-2")
+    parser.add_argument("--drop-old-index", action="store_true")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb", region_name=args.region)
+    table = dynamodb.Table(args.table)
+
+    updated = backfill_score_shards(table)
+    print(f"✅ Backfilled score_shard on {updated} detections")
+    ensure_score_index(dynamodb.meta.client, args.table, drop_old_index=args.drop_old_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import base64
+import binascii
+import json
+from typing import Dict, Optional
+
+
+class InvalidCursor(ValueError):
+    """Raised when a continuation token can't be decoded"""
+
+
+def encode_cursor(position: Optional[Dict]) -> Optional[str]:
+    """Serialize a backend-specific position into an opaque, URL-safe token"""
+    if position is None:
+        return None
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict]:
+    """Inverse of encode_cursor; None or an empty string means "from the start\""""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if not isinstance(position, dict):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return position
@@ -1,27 +1,69 @@
 import sqlite3
 import json
 import os
-from typing import List, Dict
-from datetime import datetime
+import threading
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
 from .base import BaseStorage
+from .pagination import encode_cursor, decode_cursor, InvalidCursor
 
 
 class SQLiteStorage(BaseStorage):
-    def __init__(self, db_path: str = "predictions.db"):
+    def __init__(self, db_path: str = "predictions.db", mmap_size: int = None):
         self.db_path = db_path
+        if mmap_size is None:
+            mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.mmap_size = mmap_size
+
+        # One long-lived connection per thread: sqlite3 connections must not be
+        # shared across threads, and keeping them open preserves each
+        # connection's prepared statement cache between calls
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self._init_db()
 
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and configuring it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread is off only so close() can run from any thread
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=256, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL lets the API threads and the SQS workers read while another thread writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
     def _init_db(self):
         """Initialize the SQLite database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS prediction_sessions (
                     uid TEXT PRIMARY KEY,
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                     original_image TEXT,
-                    predicted_image TEXT
+                    predicted_image TEXT,
+                    upload_status TEXT
                 )
             """)
+            # Databases created before upload tracking lack the column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(prediction_sessions)")}
+            if "upload_status" not in columns:
+                conn.execute("ALTER TABLE prediction_sessions ADD COLUMN upload_status TEXT")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS detection_objects (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,13 +74,21 @@ class SQLiteStorage(BaseStorage):
                     FOREIGN KEY (prediction_uid) REFERENCES prediction_sessions (uid)
                 )
             """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    content_hash TEXT PRIMARY KEY,
+                    prediction_uid TEXT
+                )
+            """)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_uid ON detection_objects (prediction_uid)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_label ON detection_objects (label)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_score ON detection_objects (score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_timestamp ON prediction_sessions (timestamp, uid)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_predicted_image ON prediction_sessions (predicted_image)")
 
     def save_prediction(self, uid: str, original_image: str, predicted_image: str) -> None:
         """Save metadata for a prediction session"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 INSERT INTO prediction_sessions (uid, original_image, predicted_image)
                 VALUES (?, ?, ?)
@@ -47,16 +97,107 @@ class SQLiteStorage(BaseStorage):
     def save_detection(self, prediction_uid: str, label: str, score: float, box: List[float]) -> None:
         """Save a single detected object"""
         box_json = json.dumps(box)
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 INSERT INTO detection_objects (prediction_uid, label, score, box)
                 VALUES (?, ?, ?, ?)
             """, (prediction_uid, label, score, box_json))
 
+    def save_detections(self, prediction_uid: str, detections: List[Dict]) -> None:
+        """Save many detected objects in a single transaction"""
+        with self._connection() as conn:
+            self._insert_detections(conn, prediction_uid, detections)
+
+    def save_prediction_with_detections(self, uid: str, original_image: str, predicted_image: str,
+                                        detections: List[Dict], upload_status: Optional[str] = None) -> Dict:
+        """Save a prediction session and its detections in a single transaction; returns the stored record"""
+        with self._connection() as conn:
+            return self._insert_prediction(conn, uid, original_image, predicted_image, detections, upload_status)
+
+    def save_predictions_with_detections(self, predictions: List[Dict]) -> List[Dict]:
+        """Save many prediction sessions and their detections in a single transaction; returns the stored records"""
+        with self._connection() as conn:
+            return [
+                self._insert_prediction(conn, p["uid"], p["original_image"], p["predicted_image"], p["detections"],
+                                        p.get("upload_status"))
+                for p in predictions
+            ]
+
+    def _insert_prediction(self, conn, uid: str, original_image: str, predicted_image: str,
+                           detections: List[Dict], upload_status: Optional[str] = None) -> Dict:
+        # The timestamp is set here (in CURRENT_TIMESTAMP's format) and the detections' ids read
+        # back in insertion order, so the record returned is exactly what get_prediction would read
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            INSERT INTO prediction_sessions (uid, timestamp, original_image, predicted_image, upload_status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (uid, timestamp, original_image, predicted_image, upload_status))
+        self._insert_detections(conn, uid, detections)
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM detection_objects WHERE prediction_uid = ? ORDER BY id", (uid,)
+        )]
+        objects = [
+            {"id": detection_id, "label": d["label"], "score": float(d["score"]),
+             "box": json.loads(json.dumps(d["box"]))}
+            for detection_id, d in zip(ids, detections)
+        ]
+        return {
+            "uid": uid,
+            "timestamp": timestamp,
+            "original_image": original_image,
+            "predicted_image": predicted_image,
+            "upload_status": upload_status,
+            "detection_objects": objects
+        }
+
+    def _insert_detections(self, conn, prediction_uid: str, detections: List[Dict]) -> None:
+        conn.executemany("""
+            INSERT INTO detection_objects (prediction_uid, label, score, box)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (prediction_uid, d["label"], d["score"], json.dumps(d["box"]))
+            for d in detections
+        ])
+
+    def save_content_hash(self, content_hash: str, prediction_uid: str) -> None:
+        """Remember which prediction was produced for an image content hash"""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO content_hashes (content_hash, prediction_uid)
+                VALUES (?, ?)
+            """, (content_hash, prediction_uid))
+
+    def save_image_prediction(self, image_path: str, prediction_uid: str) -> None:
+        """prediction_sessions already maps predicted_image to its prediction"""
+        pass
+
+    def set_upload_status(self, uid: str, status: str) -> None:
+        """Record whether the prediction's images have reached S3"""
+        with self._connection() as conn:
+            conn.execute("UPDATE prediction_sessions SET upload_status = ? WHERE uid = ?", (status, uid))
+
+    def get_prediction_uid_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Look up the prediction produced for an image content hash"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT prediction_uid FROM content_hashes WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def get_prediction_uid_by_image(self, image_path: str) -> Optional[str]:
+        """Look up the prediction an annotated image path belongs to"""
+        with self._connection() as conn:
+            # Result-cache hits share the first prediction's image; any of them can draw it
+            row = conn.execute(
+                "SELECT uid FROM prediction_sessions WHERE predicted_image = ? LIMIT 1",
+                (image_path,)
+            ).fetchone()
+            return row[0] if row else None
+
     def get_prediction(self, uid: str) -> Dict:
         """Retrieve full prediction session including metadata and all detections"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
 
             # Get prediction session
             session = conn.execute(
@@ -78,6 +219,7 @@ class SQLiteStorage(BaseStorage):
                 "timestamp": session["timestamp"],
                 "original_image": session["original_image"],
                 "predicted_image": session["predicted_image"],
+                "upload_status": session["upload_status"],
                 "detection_objects": [
                     {
                         "id": obj["id"],
@@ -90,8 +232,7 @@ class SQLiteStorage(BaseStorage):
 
     def get_predictions_by_label(self, label: str) -> List[Dict]:
         """Get all prediction sessions that include a detection with a specific label"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             rows = conn.execute("""
                 SELECT DISTINCT ps.uid, ps.timestamp
                 FROM prediction_sessions ps
@@ -104,8 +245,7 @@ class SQLiteStorage(BaseStorage):
 
     def get_predictions_by_score(self, min_score: float) -> List[Dict]:
         """Get all prediction sessions that include detections with score >= min_score"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             rows = conn.execute("""
                 SELECT DISTINCT ps.uid, ps.timestamp
                 FROM prediction_sessions ps
@@ -116,9 +256,48 @@ class SQLiteStorage(BaseStorage):
 
             return [{"uid": row["uid"], "timestamp": row["timestamp"]} for row in rows]
 
+    def _page_predictions(self, detection_filter: str, value, limit: int, cursor: Optional[str]) -> Dict:
+        """Keyset pagination over sessions with a matching detection, newest first by (timestamp, uid)"""
+        position = decode_cursor(cursor)
+        params = [value]
+        after = ""
+        if position is not None:
+            if "ts" not in position or "uid" not in position:
+                raise InvalidCursor(f"Invalid cursor: {cursor}")
+            after = "AND (ps.timestamp, ps.uid) < (?, ?)"
+            params += [position["ts"], position["uid"]]
+
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT ps.uid, ps.timestamp
+                FROM prediction_sessions ps
+                WHERE EXISTS (
+                    SELECT 1 FROM detection_objects do
+                    WHERE do.prediction_uid = ps.uid AND {detection_filter}
+                )
+                {after}
+                ORDER BY ps.timestamp DESC, ps.uid DESC
+                LIMIT ?
+            """, params + [limit + 1]).fetchall()
+
+        items = [{"uid": row["uid"], "timestamp": row["timestamp"]} for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor({"ts": last["timestamp"], "uid": last["uid"]})
+        return {"items": items, "next_cursor": next_cursor}
+
+    def get_predictions_by_label_page(self, label: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        """Get one page of prediction sessions that include a detection with a specific label"""
+        return self._page_predictions("do.label = ?", label, limit, cursor)
+
+    def get_predictions_by_score_page(self, min_score: float, limit: int, cursor: Optional[str] = None) -> Dict:
+        """Get one page of prediction sessions that include detections with score >= min_score"""
+        return self._page_predictions("do.score >= ?", min_score, limit, cursor)
+
     def get_prediction_image_path(self, uid: str) -> str:
         """Get the path to the predicted image file for a given prediction UID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             row = conn.execute(
                 "SELECT predicted_image FROM prediction_sessions WHERE uid = ?",
                 (uid,)
@@ -0,0 +1,61 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference import AdmissionController, Overloaded
+
+
+def test_rejects_when_queue_is_full():
+    admission = AdmissionController(max_pending=2)
+    first = admission.admit()
+    admission.admit()
+
+    with pytest.raises(Overloaded) as excinfo:
+        admission.admit()
+    assert excinfo.value.retry_after >= 1
+    assert admission.stats()["rejected_queue_full"] == 1
+
+    admission.release(first)
+    admission.admit()
+    assert admission.pending() == 2
+
+
+def test_forced_work_is_always_admitted_and_triggers_pause():
+    admission = AdmissionController(max_pending=2, pause_ratio=0.5)
+    assert not admission.should_pause()
+    admission.admit(force=True)
+    admission.admit(force=True)
+    admission.admit(force=True)
+    assert admission.pending() == 3
+    assert admission.should_pause()
+
+
+def test_rejects_when_estimated_wait_exceeds_deadline():
+    admission = AdmissionController(max_pending=100)
+    # One request at depth 1 took 2s, so the next one is expected to take ~2s as well
+    started, depth = admission.admit()
+    admission.release((started - 2.0, depth))
+
+    with pytest.raises(Overloaded):
+        admission.admit(deadline_seconds=1.0)
+    assert admission.stats()["rejected_deadline"] == 1
+    admission.admit(deadline_seconds=5.0)
+
+
+def test_slot_releases_on_error():
+    admission = AdmissionController(max_pending=1)
+    with pytest.raises(RuntimeError):
+        with admission.slot():
+            raise RuntimeError("boom")
+    assert admission.pending() == 0
+    assert admission.estimated_wait() is None
+
+
+def test_timeouts_are_counted_without_skewing_the_estimate():
+    admission = AdmissionController()
+    ticket = admission.admit()
+    admission.release(ticket, completed=False, timed_out=True)
+    assert admission.stats()["timed_out"] == 1
+    assert admission.estimated_wait() is None
@@ -1,7 +1,6 @@
 import sys
 import os
 import shutil
-import glob
 from fastapi.testclient import TestClient
 import time
 import boto3
@@ -66,6 +65,21 @@ def test_get_prediction_by_uid():
     assert "detection_objects" in json_data
     assert isinstance(json_data["detection_objects"], list)
 
+def test_duplicate_image_reuses_stored_images():
+    global prediction_uid
+    print("Testing: /predict with the same image again")
+    with open(test_image_dst, "rb") as f:
+        response = client.post("/predict", files={"file": ("test_image.jpg", f, "image/jpeg")})
+    assert response.status_code == 200
+    duplicate_uid = response.json()["prediction_uid"]
+    assert duplicate_uid != prediction_uid
+
+    first = client.get(f"/prediction/{prediction_uid}").json()
+    duplicate = client.get(f"/prediction/{duplicate_uid}").json()
+    # Nothing new is saved or uploaded, so both records point at the first prediction's images
+    assert duplicate["original_image"] == first["original_image"]
+    assert duplicate["predicted_image"] == first["predicted_image"]
+
 def test_get_prediction_image():
     global prediction_uid
     print("Testing: /prediction/{uid}/image")
@@ -92,30 +106,42 @@ def test_get_predictions_by_score_invalid():
     assert response.status_code == 422
     assert "should be less than or equal to" in response.text
 
+def test_ndjson_export_rejects_wrong_shaped_cursor():
+    print("Testing: /predictions/score/0.2?format=ndjson with a bad cursor")
+    # Decodes fine ({"x":1}) but is not a position the backend issued
+    response = client.get("/predictions/score/0.2", params={"format": "ndjson", "cursor": "eyJ4IjoxfQ"})
+    assert response.status_code == 400
+
 def test_get_original_image():
     print("Testing: /image/original/test_image.jpg")
     response = client.get(f"/image/original/test_image.jpg")
     assert response.status_code == 200
 
 def test_get_predicted_image():
+    global prediction_uid
     print("Testing: /image/predicted/{filename}")
-    pred_images = glob.glob(os.path.join(predicted_dir, "**", "*.jpg"), recursive=True)
-    if not pred_images:
-        print("⚠️ No predicted images found.")
-        for root, dirs, files in os.walk(predicted_dir):
-            print(f"In {root}: {files}")
-    assert pred_images, "No predicted image found to test /image/predicted"
+    # Images live in the sharded image store, so take the name from the prediction record
+    predicted_image = client.get(f"/prediction/{prediction_uid}").json()["predicted_image"]
+    filename = os.path.relpath(predicted_image, predicted_dir).replace(os.sep, "/")
 
-    full_path = pred_images[0]
-    filename = os.path.basename(full_path)
-    top_level_path = os.path.join(predicted_dir, filename)
+    response = client.get(f"/image/predicted/{filename}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
 
-    # Only copy if the file is in a subdirectory
-    if os.path.abspath(full_path) != os.path.abspath(top_level_path):
-        shutil.copy(full_path, top_level_path)
+def test_lazy_predicted_image_is_rendered_on_first_request():
+    print("Testing: /image/predicted/{filename} for render=lazy")
+    with open(test_image_dst, "rb") as f:
+        # Trailing bytes make this a new image to the result cache
+        image_bytes = f.read() + b"lazy"
+    response = client.post("/predict?render=lazy", files={"file": ("lazy.jpg", image_bytes, "image/jpeg")})
+    assert response.status_code == 200
+    uid = response.json()["prediction_uid"]
+    predicted_image = client.get(f"/prediction/{uid}").json()["predicted_image"]
+    filename = os.path.relpath(predicted_image, predicted_dir).replace(os.sep, "/")
 
     response = client.get(f"/image/predicted/{filename}")
     assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
 
 
 
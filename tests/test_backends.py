@@ -0,0 +1,47 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference.backends import export_model, exported_path, model_id, warm_up
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, images, **kwargs):
+        self.calls.append((len(images), images[0].shape, kwargs["imgsz"]))
+        return []
+
+
+def test_exported_paths_sit_next_to_the_weights():
+    assert exported_path("models/yolov8n.pt", "pytorch") is None
+    assert exported_path("models/yolov8n.pt", "onnx") == "models/yolov8n.onnx"
+    assert exported_path("models/yolov8n.pt", "onnx", int8=True) == "models/yolov8n.int8.onnx"
+    assert exported_path("yolov8n.pt", "openvino", int8=True) == "yolov8n_int8_openvino_model"
+
+
+def test_existing_export_is_reused(tmp_path):
+    weights = str(tmp_path / "yolov8n.pt")
+    (tmp_path / "yolov8n.onnx").write_bytes(b"onnx")
+    assert export_model(weights, "onnx") == str(tmp_path / "yolov8n.onnx")
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        export_model("yolov8n.pt", "tensorrt")
+
+
+def test_model_id_distinguishes_backends():
+    assert model_id("yolov8n.pt", "onnx", 640, False) != model_id("yolov8n.pt", "pytorch", 640, False)
+    assert model_id("yolov8n.pt", "onnx", 640, False) != model_id("yolov8n.pt", "onnx", 640, True)
+
+
+def test_warm_up_runs_each_batch_size():
+    model = RecordingModel()
+    warm_up(model, imgsz=320, batch_sizes=(1, 4), runs=2)
+    assert [c[0] for c in model.calls] == [1, 1, 4, 4]
+    assert model.calls[0][1] == (320, 320, 3)
+    assert model.calls[0][2] == 320
@@ -0,0 +1,73 @@
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference import BatchScheduler
+
+
+def test_each_caller_gets_its_own_result():
+    batches = []
+
+    def predict_fn(images):
+        batches.append(list(images))
+        return [image * 10 for image in images]
+
+    scheduler = BatchScheduler(predict_fn, max_batch_size=4, max_wait_ms=50)
+    futures = [scheduler.submit(i) for i in range(8)]
+    assert [f.result(timeout=5) for f in futures] == [i * 10 for i in range(8)]
+    scheduler.stop()
+
+    assert all(len(batch) <= 4 for batch in batches)
+    assert len(batches) < 8
+
+
+def test_flushes_partial_batch_after_max_wait():
+    scheduler = BatchScheduler(lambda images: images, max_batch_size=100, max_wait_ms=10)
+    start = time.monotonic()
+    assert scheduler.predict("only", timeout=5) == "only"
+    assert time.monotonic() - start < 1
+    scheduler.stop()
+
+
+def test_concurrent_callers_are_batched():
+    sizes = []
+    release = threading.Event()
+
+    def predict_fn(images):
+        sizes.append(len(images))
+        release.wait(5)
+        return images
+
+    scheduler = BatchScheduler(predict_fn, max_batch_size=8, max_wait_ms=200)
+    threads = [threading.Thread(target=scheduler.predict, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+    scheduler.stop()
+
+    assert sizes[0] > 1
+
+
+def test_errors_propagate_to_every_caller():
+    def predict_fn(images):
+        raise ValueError("boom")
+
+    scheduler = BatchScheduler(predict_fn, max_batch_size=2, max_wait_ms=50)
+    futures = [scheduler.submit(i) for i in range(2)]
+    for f in futures:
+        with pytest.raises(ValueError):
+            f.result(timeout=5)
+    scheduler.stop()
+
+
+def test_submit_after_stop_raises():
+    scheduler = BatchScheduler(lambda images: images)
+    scheduler.stop()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(1)
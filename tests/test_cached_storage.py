@@ -0,0 +1,117 @@
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from storage.cached_storage import CachedStorage, LRUCache
+from storage.sqlite_storage import SQLiteStorage
+
+
+class CountingStorage(SQLiteStorage):
+    def __init__(self, *args, **kwargs):
+        self.reads = 0
+        super().__init__(*args, **kwargs)
+
+    def get_prediction(self, uid):
+        self.reads += 1
+        return super().get_prediction(uid)
+
+    def get_prediction_image_path(self, uid):
+        self.reads += 1
+        return super().get_prediction_image_path(uid)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = CountingStorage(db_path=str(tmp_path / "predictions.db"))
+    yield backend
+    backend.close()
+
+
+DETECTIONS = [{"label": "cat", "score": 0.9, "box": [0, 0, 1, 1]}]
+
+
+def test_cache_is_warm_after_write(backend):
+    storage = CachedStorage(backend)
+    storage.save_prediction_with_detections("uid-1", "o.jpg", "p.jpg", DETECTIONS)
+
+    # Filled from the data written, without reading the record back
+    assert backend.reads == 0
+    assert storage.get_prediction("uid-1") == backend.get_prediction("uid-1")
+    assert storage.get_prediction_image_path("uid-1") == "p.jpg"
+    assert backend.reads == 1
+    assert storage.stats()["predictions"]["hits"] == 1
+
+
+def test_bulk_writes_warm_the_cache(backend):
+    storage = CachedStorage(backend)
+    storage.save_predictions_with_detections([
+        {"uid": f"bulk-{i}", "original_image": "o.jpg", "predicted_image": "p.jpg", "detections": DETECTIONS * i}
+        for i in range(3)
+    ])
+
+    cached = [storage.get_prediction(f"bulk-{i}") for i in range(3)]
+    assert backend.reads == 0
+    assert cached == [backend.get_prediction(f"bulk-{i}") for i in range(3)]
+
+
+def test_repeated_reads_hit_the_cache(backend):
+    backend.save_prediction_with_detections("uid-2", "o.jpg", "p.jpg", DETECTIONS)
+    storage = CachedStorage(backend)
+
+    for _ in range(5):
+        storage.get_prediction("uid-2")
+    assert backend.reads == 1
+
+
+def test_negative_entries_are_cleared_by_writes(backend):
+    storage = CachedStorage(backend, negative_ttl_seconds=60)
+
+    assert storage.get_prediction("uid-3") is None
+    assert storage.get_prediction("uid-3") is None
+    assert backend.reads == 1
+
+    storage.save_prediction_with_detections("uid-3", "o.jpg", "p.jpg", DETECTIONS)
+    assert storage.get_prediction("uid-3") is not None
+
+
+def test_negative_entries_expire(backend):
+    storage = CachedStorage(backend, negative_ttl_seconds=0.05)
+    assert storage.get_prediction_image_path("uid-4") is None
+    backend.save_prediction("uid-4", "o.jpg", "p.jpg")
+    time.sleep(0.1)
+    assert storage.get_prediction_image_path("uid-4") == "p.jpg"
+
+
+def test_save_detection_invalidates_prediction(backend):
+    storage = CachedStorage(backend)
+    storage.save_prediction_with_detections("uid-5", "o.jpg", "p.jpg", DETECTIONS)
+    storage.save_detection("uid-5", "dog", 0.5, [1, 1, 2, 2])
+    assert len(storage.get_prediction("uid-5")["detection_objects"]) == 2
+
+
+def test_upload_status_updates_cached_prediction(backend):
+    storage = CachedStorage(backend)
+    storage.save_prediction_with_detections("uid-6", "o.jpg", "p.jpg", DETECTIONS)
+    storage.set_upload_status("uid-6", "uploaded")
+    assert storage.get_prediction("uid-6")["upload_status"] == "uploaded"
+    assert backend.reads == 0
+
+
+def test_backend_attributes_are_exposed(backend):
+    storage = CachedStorage(backend)
+    assert storage.db_path == backend.db_path
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,29 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import clients
+
+
+def test_clients_are_shared_across_threads():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = list(pool.map(lambda _: clients.get_client("s3"), range(32)))
+    assert all(client is created[0] for client in created)
+    assert clients.s3_client() is created[0]
+    assert clients.get_client("s3", endpoint_url="http://localhost:9000") is not created[0]
+
+
+def test_aws_config_uses_adaptive_retries_and_pool_size():
+    config = clients.s3_client().meta.config
+    assert config.retries["mode"] == "adaptive"
+    assert config.max_pool_connections == clients.AWS_MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+
+
+def test_http_session_is_shared_and_never_retries_post_reads():
+    session = clients.http_session()
+    assert clients.http_session() is session
+    retry = session.get_adapter("https://example.com").max_retries
+    assert retry.read == 0
+    assert "POST" not in retry.allowed_methods
@@ -0,0 +1,188 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from messaging import ConsumerPool, VisibilityHeartbeat
+
+
+class FakeSQS:
+    """Minimal in-memory stand-in for the SQS client calls the pool makes"""
+
+    def __init__(self, bodies):
+        self.pending = [
+            {'MessageId': str(i), 'ReceiptHandle': f"rh-{i}", 'Body': body}
+            for i, body in enumerate(bodies)
+        ]
+        self.receive_sizes = []
+        self.deleted = []
+        self.delete_calls = 0
+        self.visibility_calls = []
+        self.lock = threading.Lock()
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds, **kwargs):
+        with self.lock:
+            batch = self.pending[:MaxNumberOfMessages]
+            self.pending = self.pending[MaxNumberOfMessages:]
+            self.receive_sizes.append(len(batch))
+        if not batch:
+            time.sleep(0.01)
+        return {'Messages': batch}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self.lock:
+            self.delete_calls += 1
+            self.deleted.extend(entry['ReceiptHandle'] for entry in Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        with self.lock:
+            self.visibility_calls.append([dict(entry) for entry in Entries])
+            deleted = set(self.deleted)
+        failed = [
+            {'Id': entry['Id'], 'Code': 'ReceiptHandleIsInvalid', 'Message': 'deleted'}
+            for entry in Entries if entry['ReceiptHandle'] in deleted
+        ]
+        return {'Successful': [], 'Failed': failed}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_processes_and_batch_deletes_successes():
+    sqs = FakeSQS([f"msg-{i}" for i in range(25)])
+    handled = []
+    lock = threading.Lock()
+
+    def handler(message):
+        with lock:
+            handled.append(message['Body'])
+        return message['Body'] != "msg-3"
+
+    pool = ConsumerPool(sqs, "queue", handler, num_workers=3, wait_time_seconds=0,
+                        delete_flush_interval=0.05, pause_interval=0.05)
+    pool.start()
+    assert wait_for(lambda: len(handled) == 25)
+    pool.stop(timeout=5)
+
+    assert sorted(sqs.deleted) == sorted(f"rh-{i}" for i in range(25) if i != 3)
+    assert sqs.delete_calls < 24
+    assert max(sqs.receive_sizes) == 10
+
+
+def test_never_holds_more_than_capacity():
+    sqs = FakeSQS([f"msg-{i}" for i in range(40)])
+    release = threading.Event()
+    peak = []
+
+    def handler(message):
+        peak.append(pool.in_flight)
+        release.wait(5)
+        return True
+
+    pool = ConsumerPool(sqs, "queue", handler, num_workers=2, batch_size=5, prefetch_batches=1,
+                        wait_time_seconds=0, delete_flush_interval=0.05, pause_interval=0.05)
+    pool.start()
+    time.sleep(0.3)
+    assert sum(sqs.receive_sizes) <= pool.capacity
+    release.set()
+    assert wait_for(lambda: len(sqs.deleted) == 40)
+    pool.stop(timeout=5)
+    assert max(peak) <= pool.capacity
+
+
+def test_should_pause_stops_receiving():
+    sqs = FakeSQS(["msg"])
+    pool = ConsumerPool(sqs, "queue", lambda message: True, wait_time_seconds=0,
+                        should_pause=lambda: True, pause_interval=0.05)
+    pool.start()
+    time.sleep(0.2)
+    pool.stop(timeout=5)
+    assert sqs.receive_sizes == []
+
+
+def test_handler_exception_does_not_delete():
+    sqs = FakeSQS(["bad"])
+    called = threading.Event()
+
+    def handler(message):
+        called.set()
+        raise RuntimeError("boom")
+
+    pool = ConsumerPool(sqs, "queue", handler, wait_time_seconds=0,
+                        delete_flush_interval=0.05, pause_interval=0.05)
+    pool.start()
+    assert called.wait(5)
+    pool.stop(timeout=5)
+    assert sqs.deleted == []
+
+
+def test_heartbeat_extends_tracked_handles_in_batches_of_ten():
+    sqs = FakeSQS([])
+    heartbeat = VisibilityHeartbeat(sqs, "queue", visibility_timeout=30, interval=10)
+    for i in range(23):
+        heartbeat.track(f"rh-{i}")
+    heartbeat.untrack("rh-0")
+
+    heartbeat.extend_all()
+
+    assert [len(call) for call in sqs.visibility_calls] == [10, 10, 2]
+    extended = [entry['ReceiptHandle'] for call in sqs.visibility_calls for entry in call]
+    assert "rh-0" not in extended
+    assert all(entry['VisibilityTimeout'] == 30 for call in sqs.visibility_calls for entry in call)
+
+
+def test_heartbeat_drops_invalid_handles():
+    sqs = FakeSQS([])
+    sqs.deleted.append("rh-gone")
+    heartbeat = VisibilityHeartbeat(sqs, "queue", visibility_timeout=30, interval=10)
+    heartbeat.track("rh-gone")
+    heartbeat.track("rh-live")
+
+    heartbeat.extend_all()
+
+    assert heartbeat.tracked_count == 1
+
+
+def test_heartbeat_failed_request_does_not_skip_later_chunks():
+    sqs = FakeSQS([])
+    calls = []
+
+    def change_message_visibility_batch(QueueUrl, Entries):
+        calls.append(len(Entries))
+        if len(calls) == 1:
+            raise ConnectionError("throttled")
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+    sqs.change_message_visibility_batch = change_message_visibility_batch
+    heartbeat = VisibilityHeartbeat(sqs, "queue", visibility_timeout=30, interval=10)
+    for i in range(25):
+        heartbeat.track(f"rh-{i}")
+
+    heartbeat.extend_all()
+
+    assert calls == [10, 10, 5]
+    assert heartbeat.tracked_count == 25
+
+
+def test_slow_message_is_kept_invisible_until_done():
+    sqs = FakeSQS(["slow"])
+    release = threading.Event()
+    heartbeat = VisibilityHeartbeat(sqs, "queue", visibility_timeout=2, interval=0.05)
+
+    pool = ConsumerPool(sqs, "queue", lambda message: release.wait(5), wait_time_seconds=0,
+                        visibility_timeout=2, heartbeat=heartbeat,
+                        delete_flush_interval=0.05, pause_interval=0.05)
+    pool.start()
+    assert wait_for(lambda: len(sqs.visibility_calls) >= 2)
+    release.set()
+    assert wait_for(lambda: sqs.deleted == ["rh-0"])
+    pool.stop(timeout=5)
+    assert heartbeat.tracked_count == 0
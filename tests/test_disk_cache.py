@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from disk_cache import DiskCache
+
+
+def test_put_and_get(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    assert cache.get("a") is None
+
+    path = cache.put("a", b"hello")
+    assert cache.get("a") == path
+    with open(path, "rb") as f:
+        assert f.read() == b"hello"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    a = cache.put("a", b"x" * 100)
+    cache.put("b", b"x" * 100)
+    cache.get("a")
+    cache.put("c", b"x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == a and os.path.exists(a)
+    assert cache.stats()["bytes"] == 200
+
+
+def test_index_is_rebuilt_on_restart(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    old = cache.put("old", b"x" * 400)
+    os.utime(old, (time.time() - 60, time.time() - 60))
+    cache.put("new", b"x" * 400)
+
+    restarted = DiskCache(str(tmp_path), max_bytes=500)
+    assert restarted.get("old") is None and not os.path.exists(old)
+    assert restarted.get("new") is not None
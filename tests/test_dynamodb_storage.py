@@ -0,0 +1,261 @@
+import sys
+import os
+import contextlib
+from decimal import Decimal
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from storage.dynamodb_storage import DynamoDBStorage, SCORE_INDEX_NAME, SCORE_SHARDS
+from storage.migrations import backfill_score_shards
+from storage.pagination import InvalidCursor, encode_cursor
+
+
+def matches(condition, item):
+    """Evaluate the subset of boto3 condition expressions these tests use"""
+    if condition is None:
+        return True
+    operator = condition.expression_operator
+    values = condition._values
+    if operator == "AND":
+        return matches(values[0], item) and matches(values[1], item)
+    name = values[0].name
+    if operator == "attribute_not_exists":
+        return name not in item
+    if name not in item:
+        return False
+    if operator == "=":
+        return item[name] == values[1]
+    if operator == ">=":
+        return item[name] >= values[1]
+    if operator == "begins_with":
+        return item[name].startswith(values[1])
+    raise NotImplementedError(operator)
+
+
+class FakeTable:
+    """In-memory table returning small pages so pagination is exercised"""
+
+    def __init__(self, page_size=3):
+        self.items = {}
+        self.page_size = page_size
+        self.calls = []
+
+    def put_item(self, Item):
+        self.items[(Item["PK"], Item["SK"])] = Item
+
+    @contextlib.contextmanager
+    def batch_writer(self, overwrite_by_pkeys=None):
+        yield self
+
+    def _page(self, items, kwargs):
+        start = 0
+        exclusive = kwargs.get("ExclusiveStartKey")
+        if exclusive:
+            keys = [(item["PK"], item["SK"]) for item in items]
+            start = keys.index((exclusive["PK"], exclusive["SK"])) + 1
+        page = items[start:start + self.page_size]
+        response = {"Items": page}
+        if start + self.page_size < len(items):
+            response["LastEvaluatedKey"] = {"PK": page[-1]["PK"], "SK": page[-1]["SK"]}
+        return response
+
+    def query(self, **kwargs):
+        self.calls.append(("query", kwargs.get("IndexName")))
+        items = [item for item in self.items.values() if matches(kwargs["KeyConditionExpression"], item)]
+        return self._page(items, kwargs)
+
+    def scan(self, **kwargs):
+        self.calls.append(("scan", None))
+        items = [item for item in self.items.values() if matches(kwargs.get("FilterExpression"), item)]
+        return self._page(items, kwargs)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues):
+        assert UpdateExpression == "SET score_shard = :shard"
+        self.items[(Key["PK"], Key["SK"])]["score_shard"] = ExpressionAttributeValues[":shard"]
+
+
+class FakeResource:
+    def __init__(self, table, table_name, unprocessed_first=False):
+        self.table = table
+        self.table_name = table_name
+        self.unprocessed_first = unprocessed_first
+        self.batch_sizes = []
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems[self.table_name]["Keys"]
+        self.batch_sizes.append(len(keys))
+        served, unprocessed = keys, []
+        if self.unprocessed_first:
+            self.unprocessed_first = False
+            served, unprocessed = keys[:1], keys[1:]
+        found = [self.table.items[(k["PK"], k["SK"])] for k in served if (k["PK"], k["SK"]) in self.table.items]
+        response = {"Responses": {self.table_name: found}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {self.table_name: dict(RequestItems[self.table_name], Keys=unprocessed)}
+        return response
+
+
+def make_storage(score_index_active=False, **resource_kwargs):
+    storage = DynamoDBStorage.__new__(DynamoDBStorage)
+    storage._score_index_active = score_index_active
+    storage._score_index_checked_at = float("inf")
+    storage.table_name = "test-table"
+    storage.table = FakeTable()
+    storage.dynamodb = FakeResource(storage.table, storage.table_name, **resource_kwargs)
+    return storage
+
+
+def seed(storage, count, label="person", score=0.9):
+    """Two detections per prediction, scored score and score - 0.1"""
+    for i in range(count):
+        uid = f"uid-{i:04d}"
+        storage.table.put_item(Item=storage._prediction_item(uid, "o.jpg", "p.jpg"))
+        for j in range(2):
+            storage.table.put_item(Item=storage._detection_item(uid, label, score - j / 10, [j, 0, 1, 1]))
+
+
+def test_label_query_batches_metadata_lookups():
+    storage = make_storage()
+    seed(storage, 250)
+
+    results = storage.get_predictions_by_label("person")
+
+    assert sorted(r["uid"] for r in results) == [f"uid-{i:04d}" for i in range(250)]
+    assert all(r["timestamp"] for r in results)
+    assert storage.dynamodb.batch_sizes == [100, 100, 50]
+
+
+def test_label_query_follows_pagination():
+    storage = make_storage()
+    seed(storage, 10)
+    storage.table.page_size = 4
+
+    assert len(storage.get_predictions_by_label("person")) == 10
+    assert len([c for c in storage.table.calls if c[0] == "query"]) == 5
+
+
+def test_unprocessed_keys_are_retried():
+    storage = make_storage(unprocessed_first=True)
+    seed(storage, 5)
+
+    results = storage.get_predictions_by_label("person")
+
+    assert all(r["timestamp"] for r in results)
+    assert storage.dynamodb.batch_sizes == [5, 4]
+
+
+def test_iter_predictions_by_label_is_lazy():
+    storage = make_storage()
+    seed(storage, 250)
+
+    first = next(storage.iter_predictions_by_label("person"))
+
+    assert first["uid"].startswith("uid-")
+    assert storage.dynamodb.batch_sizes == [100]
+
+
+def test_detection_item_uses_decimals():
+    storage = make_storage()
+    item = storage._detection_item("uid", "cat", 0.5, [1.0, 2.0])
+    assert item["score"] == Decimal("0.5")
+    assert item["SK"].startswith("DETECT#cat#")
+
+
+def test_saved_record_matches_what_is_read_back():
+    storage = make_storage()
+    detections = [{"label": "dog", "score": 0.7, "box": [1.5, 2, 3, 4]},
+                  {"label": "cat", "score": 0.9, "box": [0, 0, 1, 1]},
+                  {"label": "cat", "score": 0.9, "box": [0, 0, 1, 1]}]
+
+    record = storage.save_prediction_with_detections("uid-1", "o.jpg", "p.jpg", detections)
+
+    assert record == storage.get_prediction("uid-1")
+    assert len(record["detection_objects"]) == 2
+    assert storage.save_predictions_with_detections([
+        {"uid": "uid-2", "original_image": "o.jpg", "predicted_image": "p.jpg", "detections": detections[:1]}
+    ]) == [storage.get_prediction("uid-2")]
+
+
+def test_score_query_uses_sharded_index_when_active():
+    storage = make_storage(score_index_active=True)
+    seed(storage, 6, score=0.9)
+    for i in range(6, 9):
+        uid = f"uid-{i:04d}"
+        storage.table.put_item(Item=storage._prediction_item(uid, "o.jpg", "p.jpg"))
+        storage.table.put_item(Item=storage._detection_item(uid, "car", 0.2, [0, 0, 1, 1]))
+
+    results = storage.get_predictions_by_score(0.85)
+
+    assert sorted(r["uid"] for r in results) == [f"uid-{i:04d}" for i in range(6)]
+    assert ("scan", None) not in storage.table.calls
+    shard_queries = [c for c in storage.table.calls if c == ("query", SCORE_INDEX_NAME)]
+    assert len(shard_queries) >= SCORE_SHARDS
+
+
+def test_score_query_yields_each_prediction_once():
+    storage = make_storage(score_index_active=True)
+    seed(storage, 5, score=0.9)
+
+    results = list(storage.iter_predictions_by_score(0.75))
+
+    assert sorted(r["uid"] for r in results) == [f"uid-{i:04d}" for i in range(5)]
+
+
+def test_score_query_falls_back_to_scan_before_migration():
+    storage = make_storage()
+    seed(storage, 4, score=0.9)
+
+    assert len(storage.get_predictions_by_score(0.85)) == 4
+    assert ("scan", None) in storage.table.calls
+
+
+def test_backfill_adds_missing_score_shards():
+    storage = make_storage()
+    seed(storage, 3)
+    legacy = next(item for item in storage.table.items.values() if item["SK"].startswith("DETECT#"))
+    expected = legacy.pop("score_shard")
+
+    assert backfill_score_shards(storage.table) == 1
+    assert legacy["score_shard"] == expected
+    assert backfill_score_shards(storage.table) == 0
+
+
+def collect_pages(fetch, limit):
+    uids, cursor, pages = [], None, 0
+    while True:
+        page = fetch(limit, cursor)
+        pages += 1
+        assert len(page["items"]) <= limit
+        uids += [item["uid"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return uids, pages
+
+
+def test_label_pages_cover_every_prediction_once():
+    storage = make_storage()
+    seed(storage, 23)
+
+    uids, pages = collect_pages(lambda limit, cursor: storage.get_predictions_by_label_page("person", limit, cursor), 5)
+
+    assert sorted(uids) == [f"uid-{i:04d}" for i in range(23)]
+    assert pages == 5
+
+
+def test_score_pages_span_index_shards():
+    storage = make_storage(score_index_active=True)
+    seed(storage, 17, score=0.9)
+
+    uids, _ = collect_pages(lambda limit, cursor: storage.get_predictions_by_score_page(0.5, limit, cursor), 4)
+
+    assert sorted(uids) == [f"uid-{i:04d}" for i in range(17)]
+
+
+def test_invalid_cursor_is_rejected():
+    storage = make_storage()
+    with pytest.raises(InvalidCursor):
+        storage.get_predictions_by_label_page("person", 5, "not-a-cursor")
+    for start in (["PK"], "PK", {"PK": ["x"]}):
+        with pytest.raises(InvalidCursor):
+            storage.get_predictions_by_label_page("person", 5, encode_cursor({"source": 0, "start": start}))
@@ -0,0 +1,26 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from executors import SingleFlight
+
+
+def test_single_flight_runs_once_per_key():
+    calls = []
+
+    async def render(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"{key}.jpg"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*[flight.do("a", render, "a") for _ in range(5)], flight.do("b", render, "b"))
+        # Finished keys start a fresh call
+        results.append(await flight.do("a", render, "a"))
+        return results
+
+    results = asyncio.run(main())
+    assert results == ["a.jpg"] * 5 + ["b.jpg", "a.jpg"]
+    assert calls == ["a", "b", "a"]
@@ -0,0 +1,68 @@
+import sys
+import os
+import io
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import image_store
+from image_store import ImageStore
+
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault("max_bytes", 10 ** 6)
+    return ImageStore(str(tmp_path / "store"), root=str(tmp_path / "uploads"), **kwargs)
+
+
+def test_saved_images_are_sharded_and_readable(tmp_path):
+    store = make_store(tmp_path)
+    path = str(tmp_path / "uploads" / "original" / "user" / "1.jpg")
+    store.save(path, b"jpeg")
+
+    local = store.local_path(path)
+    assert os.path.relpath(local, tmp_path / "store").count(os.sep) == 2
+    assert store.read(path) == b"jpeg"
+
+
+def test_paths_outside_the_root_are_rejected(tmp_path):
+    store = make_store(tmp_path)
+    assert store.local_path(str(tmp_path / "uploads" / "original" / "..")) is None
+    assert store.key_for(str(tmp_path / "secret.txt")) is None
+
+
+def test_misses_are_filled_from_s3(tmp_path):
+    s3 = mock.Mock()
+    s3.get_object.return_value = {"Body": io.BytesIO(b"from s3")}
+    store = make_store(tmp_path, bucket="bucket")
+    path = str(tmp_path / "uploads" / "predicted" / "user" / "1_predicted.jpg")
+
+    with mock.patch.object(image_store, "s3_client", return_value=s3):
+        assert store.read(path) == b"from s3"
+        assert store.read(path) == b"from s3"
+
+    s3.get_object.assert_called_once_with(Bucket="bucket", Key="predicted/user/1_predicted.jpg")
+    assert store.stats()["s3_fetches"] == 1
+
+
+def test_missing_everywhere_returns_none(tmp_path):
+    s3 = mock.Mock()
+    s3.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+    store = make_store(tmp_path, bucket="bucket")
+
+    with mock.patch.object(image_store, "s3_client", return_value=s3):
+        assert store.local_path(str(tmp_path / "uploads" / "original" / "gone.jpg")) is None
+    assert store.stats()["s3_misses"] == 1
+
+
+def test_s3_existence_is_remembered(tmp_path):
+    s3 = mock.Mock()
+    s3.head_object.side_effect = [{}, ClientError({"Error": {"Code": "404"}}, "HeadObject")]
+    store = make_store(tmp_path, bucket="bucket")
+    uploaded = str(tmp_path / "uploads" / "original" / "user" / "1.jpg")
+    missing = str(tmp_path / "uploads" / "original" / "user" / "2.jpg")
+
+    with mock.patch.object(image_store, "s3_client", return_value=s3):
+        assert store.in_s3(uploaded) and store.in_s3(uploaded)
+        assert not store.in_s3(missing) and not store.in_s3(missing)
+    assert s3.head_object.call_count == 2
@@ -0,0 +1,84 @@
+import sys
+import os
+import io
+
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from images import (VARIANT_SIZES, decode_image, encode_jpeg, extract_zip_images, make_variant,
+                    variant_path, variant_size)
+
+
+def jpeg_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), color).save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def test_decode_returns_bgr_array():
+    frame = decode_image(jpeg_bytes((255, 0, 0)))
+    assert frame.shape == (24, 32, 3)
+    assert frame.flags["C_CONTIGUOUS"]
+    blue, green, red = frame[12, 16]
+    assert red > 200 and blue < 50
+
+
+def test_encode_round_trip_keeps_colors():
+    frame = decode_image(jpeg_bytes((0, 0, 255)))
+    with Image.open(io.BytesIO(encode_jpeg(frame))) as image:
+        red, green, blue = image.convert("RGB").getpixel((16, 12))
+    assert blue > 200 and red < 50
+
+
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_extract_zip_images_skips_hidden_entries():
+    data = zip_bytes({"album/a.jpg": jpeg_bytes((0, 0, 255)), "album/.DS_Store": b"x",
+                      "__MACOSX/album/._a.jpg": b"x", "b.jpg": jpeg_bytes((0, 255, 0))})
+    names = [name for name, _ in extract_zip_images(data, max_files=10, max_bytes=10 ** 6)]
+    assert names == ["album/a.jpg", "b.jpg"]
+
+
+def test_extract_zip_images_enforces_limits():
+    data = zip_bytes({"a.jpg": b"\0" * 1000, "b.jpg": b"\0" * 1000})
+    with pytest.raises(ValueError):
+        extract_zip_images(data, max_files=1, max_bytes=10 ** 6)
+    with pytest.raises(ValueError):
+        extract_zip_images(data, max_files=10, max_bytes=1500)
+
+
+def test_variant_paths_sit_next_to_the_image():
+    path = "uploads/predicted/user/1_predicted.jpg"
+    assert variant_path(path, None, "image/jpeg") == path
+    assert variant_path(path, None, "image/webp") == "uploads/predicted/user/1_predicted.webp"
+    assert variant_path(path, 320, "image/jpeg") == "uploads/predicted/user/1_predicted_320.jpg"
+
+
+def test_variant_sizes_round_up():
+    assert variant_size(None) is None
+    assert variant_size(100) == VARIANT_SIZES[0]
+    assert variant_size(VARIANT_SIZES[-1] + 1) is None
+
+
+def test_make_variant_scales_down_and_reencodes():
+    frame = np.zeros((600, 800, 3), dtype=np.uint8)
+    data = encode_jpeg(frame)
+
+    webp = make_variant(data, 320, "image/webp")
+    assert webp[:4] == b"RIFF" and webp[8:12] == b"WEBP"
+    with Image.open(io.BytesIO(webp)) as image:
+        assert image.size == (320, 240)
+
+    png = make_variant(data, 1280, "image/png")
+    with Image.open(io.BytesIO(png)) as image:
+        assert image.format == "PNG" and image.size == (800, 600)
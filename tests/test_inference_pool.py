@@ -0,0 +1,82 @@
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference import BatchScheduler, InferenceProcessPool
+from inference.process_pool import cpu_sets
+
+
+class FakeResult:
+    names = {0: "person"}
+
+    def __init__(self, frame):
+        # Encode the frame's fill value and this worker's settings in the box
+        value = float(frame[0, 0, 0])
+        self.boxes = type("Boxes", (), {})()
+        self.boxes.data = torch.tensor([[value, os.getpid(), torch.get_num_threads(), 4.0, 0.9, 0.0]])
+
+
+class FakeModel:
+    def __call__(self, frames, **kwargs):
+        time.sleep(0.01)
+        return [FakeResult(frame) for frame in frames]
+
+
+def load_fake_model():
+    return FakeModel()
+
+
+def raw_outputs(frames, outputs):
+    return outputs
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = InferenceProcessPool(load_fake_model, num_workers=2, threads_per_worker=1, result_fn=raw_outputs)
+    yield pool
+    pool.shutdown()
+
+
+def frame(value):
+    return np.full((8, 8, 3), value, dtype=np.uint8)
+
+
+def test_results_come_back_in_order(pool):
+    outputs = pool.predict_batch([frame(1), frame(2), frame(3)])
+    assert [boxes[0][0] for _, boxes in outputs] == [1.0, 2.0, 3.0]
+    assert outputs[0][0] == {0: "person"}
+
+
+def test_workers_use_fixed_thread_count(pool):
+    _, boxes = pool.predict_batch([frame(0)])[0]
+    assert boxes[0][2] == 1.0
+
+
+def test_concurrent_batches_spread_across_workers(pool):
+    scheduler = BatchScheduler(pool.predict_batch, max_batch_size=1, max_wait_ms=0, concurrency=2)
+    with ThreadPoolExecutor(max_workers=8) as callers:
+        outputs = list(callers.map(lambda i: scheduler.predict(frame(i), timeout=30), range(40)))
+    scheduler.stop()
+    assert [boxes[0][0] for _, boxes in outputs] == [float(i) for i in range(40)]
+    assert len({boxes[0][1] for _, boxes in outputs}) == 2
+
+
+def test_cpu_sets_do_not_overlap():
+    assert cpu_sets(2, 4, available=list(range(8))) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert cpu_sets(4, 1, available=[2, 3]) == [[2], [3], [2], [3]]
+
+
+def test_workers_are_not_spawned_until_needed():
+    lazy = InferenceProcessPool(load_fake_model, num_workers=1, result_fn=raw_outputs)
+    assert lazy._executor is None
+    try:
+        assert len(lazy.predict_batch([frame(1)])) == 1
+        assert lazy._executor is not None
+    finally:
+        lazy.shutdown()
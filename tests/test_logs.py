@@ -0,0 +1,42 @@
+import sys
+import os
+import json
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from logs import CorrelationFilter, JsonFormatter, Sampler, add_correlation, bind, correlation_ids
+
+
+def format_record(msg, *args, **kwargs):
+    record = logging.LogRecord("yolo", logging.INFO, __file__, 1, msg, args, None, **kwargs)
+    CorrelationFilter().filter(record)
+    return json.loads(JsonFormatter().format(record))
+
+
+def test_json_lines_carry_correlation_ids():
+    with bind(request_id="req-1"):
+        add_correlation(prediction_id="pred-1")
+        entry = format_record("saved %s detections", 3)
+
+    assert entry["msg"] == "saved 3 detections"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "req-1"
+    assert entry["prediction_id"] == "pred-1"
+    assert correlation_ids() == {}
+
+
+def test_structured_fields_are_merged():
+    record = logging.LogRecord("sqs", logging.INFO, __file__, 1, "done", None, None)
+    record.fields = {"labels": ["cat"]}
+    assert json.loads(JsonFormatter().format(record))["labels"] == ["cat"]
+
+
+def test_sampler_lets_one_event_per_interval_through():
+    sampler = Sampler(interval_seconds=60)
+    assert sampler.allow("poll") == (True, 0)
+    assert sampler.allow("poll") == (False, 0)
+    assert sampler.allow("poll") == (False, 0)
+    assert sampler.allow("other") == (True, 0)
+
+    sampler.interval_seconds = 0
+    assert sampler.allow("poll") == (True, 2)
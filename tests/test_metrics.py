@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from prometheus_client import REGISTRY
+
+import metrics
+from storage.sqlite_storage import SQLiteStorage
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_storage_calls_are_timed_per_method(tmp_path):
+    storage = SQLiteStorage(db_path=str(tmp_path / "predictions.db"))
+    metrics.instrument_storage(storage)
+    before = sample("yolo_storage_call_seconds_count", backend="SQLiteStorage", method="get_prediction")
+
+    storage.save_prediction("uid-1", "o.jpg", "p.jpg")
+    assert storage.get_prediction("uid-1")["uid"] == "uid-1"
+
+    assert sample("yolo_storage_call_seconds_count", backend="SQLiteStorage", method="get_prediction") == before + 1
+    storage.close()
+
+
+def test_batch_sizes_are_recorded():
+    before = sample("yolo_inference_batch_size_sum")
+    predict = metrics.observe_batches(lambda images: [len(images)] * len(images))
+    assert predict([1, 2, 3]) == [3, 3, 3]
+    assert sample("yolo_inference_batch_size_sum") == before + 3
+
+
+def test_sqs_queue_lag_only_counts_first_receive():
+    before = sample("yolo_sqs_queue_lag_seconds_count")
+    now = time.time()
+    first = {"Attributes": {"SentTimestamp": str(int((now - 5) * 1000)), "ApproximateReceiveCount": "1"}}
+    retry = {"Attributes": {"SentTimestamp": str(int((now - 500) * 1000)), "ApproximateReceiveCount": "3"}}
+
+    metrics.observe_sqs_message(first, now, True)
+    metrics.observe_sqs_message(retry, now, False)
+
+    assert sample("yolo_sqs_queue_lag_seconds_count") == before + 1
+    assert sample("yolo_sqs_message_seconds_count", outcome="failure") >= 1
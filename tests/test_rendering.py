@@ -0,0 +1,46 @@
+import sys
+import os
+import importlib
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import rendering
+from rendering import Renderer, color_for, TEXT_COLOR
+
+
+def test_draws_box_outline_and_label():
+    frame = np.zeros((200, 200, 3), dtype=np.uint8)
+    Renderer(line_width=2).draw(frame, [{"label": "cat", "score": 0.9, "box": [50, 60, 150, 180]}])
+
+    color = color_for("cat")
+    assert tuple(frame[100, 50]) == color and tuple(frame[179, 100]) == color
+    assert not frame[100:170, 60:140].any()
+    # Label sits above the box: background in the box color with some white text
+    label = frame[:60, 50:150].reshape(-1, 3)
+    assert (label == color).all(axis=1).any() and (label == TEXT_COLOR).all(axis=1).any()
+
+
+def test_boxes_outside_the_frame_are_clipped():
+    frame = np.zeros((50, 50, 3), dtype=np.uint8)
+    Renderer().draw(frame, [{"label": "dog", "score": 0.5, "box": [-20, -20, 80, 80]},
+                            {"label": "dog", "score": 0.5, "box": [60, 60, 90, 90]}])
+    assert frame.any()
+
+
+def test_label_glyphs_are_cached():
+    renderer = Renderer()
+    detections = [{"label": "person", "score": 0.87, "box": [10, 10, 40, 40]}] * 3
+    renderer.draw(np.zeros((64, 64, 3), dtype=np.uint8), detections)
+    assert renderer._glyph.cache_info().misses == 1
+
+
+def test_render_mode_is_validated(monkeypatch):
+    monkeypatch.setenv("RENDER_MODE", "sometimes")
+    with pytest.raises(ValueError, match="Unsupported RENDER_MODE"):
+        importlib.reload(rendering)
+    monkeypatch.setenv("RENDER_MODE", "EAGER")
+    assert importlib.reload(rendering).RENDER_MODE == "eager"
+    monkeypatch.delenv("RENDER_MODE")
+    assert importlib.reload(rendering).RENDER_MODE == "lazy"
@@ -0,0 +1,53 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference import ResultCache
+from storage.sqlite_storage import SQLiteStorage
+
+DETECTIONS = [{"label": "dog", "score": 0.8, "box": [1.0, 2.0, 3.0, 4.0]}]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(db_path=str(tmp_path / "predictions.db"))
+    yield storage
+    storage.close()
+
+
+def test_local_hit_after_store():
+    cache = ResultCache("model-a")
+    assert cache.lookup("abc") is None
+
+    cache.store("abc", "uid-1", DETECTIONS, "orig.jpg", "pred.jpg")
+    entry = cache.lookup("abc")
+
+    assert entry["prediction_uid"] == "uid-1"
+    assert entry["original_image"] == "orig.jpg"
+    assert entry["detections"] == DETECTIONS
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_model_identity_is_part_of_the_key():
+    cache = ResultCache("model-a")
+    cache.store("abc", "uid-1", DETECTIONS, "orig.jpg", "pred.jpg")
+    other_model = ResultCache("model-b")
+    assert cache.key_for("abc") != other_model.key_for("abc")
+
+
+def test_storage_tier_survives_a_fresh_local_cache(storage):
+    storage.save_prediction_with_detections("uid-2", "orig.jpg", "pred.jpg", DETECTIONS)
+    ResultCache("model-a", storage=storage).store("abc", "uid-2", DETECTIONS, "orig.jpg", "pred.jpg")
+
+    fresh = ResultCache("model-a", storage=storage)
+    entry = fresh.lookup("abc")
+
+    assert entry["original_image"] == "orig.jpg"
+    assert entry["predicted_image"] == "pred.jpg"
+    assert entry["detections"] == DETECTIONS
+    assert fresh.stats()["storage_hits"] == 1
+    assert fresh.lookup("abc") is not None
+    assert fresh.stats()["local_hits"] == 1
@@ -0,0 +1,84 @@
+import sys
+import os
+from email.utils import formatdate
+from unittest import mock
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import serving
+from serving import file_etag, negotiate_image_type, presigned_redirect, serve_file
+
+
+def make_client(path):
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return serve_file(request, str(path), "image/jpeg", {"Vary": "Accept"}) or {"missing": True}
+
+    return TestClient(app)
+
+
+def test_serves_file_with_caching_headers(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"0123456789")
+    response = make_client(path).get("/file")
+
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["etag"] == file_etag(os.stat(path))
+    assert response.headers["vary"] == "Accept"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["last-modified"]
+
+
+def test_conditional_requests_get_304(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"0123456789")
+    client = make_client(path)
+    etag = client.get("/file").headers["etag"]
+
+    assert client.get("/file", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get("/file", headers={"If-None-Match": '"other"'}).status_code == 200
+    later = formatdate(os.stat(path).st_mtime + 60, usegmt=True)
+    assert client.get("/file", headers={"If-Modified-Since": later}).status_code == 304
+    # If-None-Match takes precedence over If-Modified-Since
+    assert client.get("/file", headers={"If-None-Match": '"other"', "If-Modified-Since": later}).status_code == 200
+
+
+def test_range_requests_get_partial_content(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"0123456789")
+    response = make_client(path).get("/file", headers={"Range": "bytes=2-5"})
+
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+
+
+def test_missing_file_returns_none(tmp_path):
+    assert make_client(tmp_path / "gone.jpg").get("/file").json() == {"missing": True}
+
+
+def test_presigned_redirect_sets_content_type():
+    s3 = mock.Mock()
+    s3.generate_presigned_url.return_value = "https://bucket.s3/key?sig"
+    with mock.patch.object(serving, "s3_client", return_value=s3):
+        response = presigned_redirect("bucket", "predicted/u/1.jpg", "image/png")
+
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://bucket.s3/key?sig"
+    assert s3.generate_presigned_url.call_args.kwargs["Params"]["ResponseContentType"] == "image/png"
+
+
+def test_negotiates_the_highest_ranked_image_type():
+    assert negotiate_image_type("image/webp,image/jpeg") == "image/webp"
+    assert negotiate_image_type("image/png, image/jpeg;q=0.9") == "image/png"
+    assert negotiate_image_type("image/jpg") == "image/jpeg"
+    assert negotiate_image_type("image/avif,image/webp,*/*;q=0.8") == "image/webp"
+    assert negotiate_image_type("*/*") == "image/jpeg"
+    assert negotiate_image_type(None) == "image/jpeg"
+    assert negotiate_image_type("image/webp;q=0, image/png;q=0.5") == "image/png"
+    assert negotiate_image_type("application/json") is None
@@ -0,0 +1,175 @@
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from storage.sqlite_storage import SQLiteStorage
+from storage.pagination import InvalidCursor
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(db_path=str(tmp_path / "predictions.db"))
+    yield storage
+    storage.close()
+
+
+def make_detections(count):
+    return [
+        {"label": "person" if i % 2 else "car", "score": 0.5 + i / 100, "box": [i, i, i + 10, i + 10]}
+        for i in range(count)
+    ]
+
+
+def test_save_prediction_with_detections(storage):
+    storage.save_prediction_with_detections("uid-1", "orig.jpg", "pred.jpg", make_detections(30))
+
+    prediction = storage.get_prediction("uid-1")
+    assert prediction["original_image"] == "orig.jpg"
+    assert prediction["predicted_image"] == "pred.jpg"
+    assert len(prediction["detection_objects"]) == 30
+    assert prediction["detection_objects"][3]["box"] == [3, 3, 13, 13]
+
+
+def test_save_detections_appends_to_existing_prediction(storage):
+    storage.save_prediction("uid-2", "orig.jpg", "pred.jpg")
+    storage.save_detection("uid-2", "dog", 0.9, [0, 0, 1, 1])
+    storage.save_detections("uid-2", make_detections(3))
+
+    labels = [d["label"] for d in storage.get_prediction("uid-2")["detection_objects"]]
+    assert labels == ["dog", "car", "person", "car"]
+
+
+def test_save_prediction_with_no_detections(storage):
+    storage.save_prediction_with_detections("uid-3", "orig.jpg", "pred.jpg", [])
+    assert storage.get_prediction("uid-3")["detection_objects"] == []
+
+
+def test_save_predictions_in_bulk(storage):
+    storage.save_predictions_with_detections([
+        {"uid": f"bulk-{i}", "original_image": "o", "predicted_image": "p", "detections": make_detections(i)}
+        for i in range(3)
+    ])
+    assert [len(storage.get_prediction(f"bulk-{i}")["detection_objects"]) for i in range(3)] == [0, 1, 2]
+
+
+def test_upload_status(storage):
+    storage.save_prediction_with_detections("uid-6", "orig.jpg", "pred.jpg", [])
+    assert storage.get_prediction("uid-6")["upload_status"] is None
+
+    storage.set_upload_status("uid-6", "uploaded")
+    assert storage.get_prediction("uid-6")["upload_status"] == "uploaded"
+
+
+def test_upload_status_is_written_with_the_prediction(storage):
+    record = storage.save_prediction_with_detections("uid-7", "o.jpg", "p.jpg", make_detections(1), "pending")
+    assert record["upload_status"] == "pending"
+    assert storage.get_prediction("uid-7")["upload_status"] == "pending"
+
+
+def test_prediction_is_found_by_its_predicted_image(storage):
+    storage.save_prediction_with_detections("uid-8", "o.jpg", "user/8_predicted.jpg", make_detections(1))
+    storage.save_image_prediction("user/8_predicted.jpg", "uid-8")
+
+    assert storage.get_prediction_uid_by_image("user/8_predicted.jpg") == "uid-8"
+    assert storage.get_prediction_uid_by_image("user/9_predicted.jpg") is None
+
+
+def test_upload_status_column_is_added_to_old_databases(tmp_path):
+    import sqlite3
+    db_path = str(tmp_path / "old.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE prediction_sessions (uid TEXT PRIMARY KEY, timestamp DATETIME, "
+                     "original_image TEXT, predicted_image TEXT)")
+        conn.execute("INSERT INTO prediction_sessions VALUES ('old', NULL, 'o', 'p')")
+
+    storage = SQLiteStorage(db_path=db_path)
+    storage.set_upload_status("old", "pending")
+    assert storage.get_prediction("old")["upload_status"] == "pending"
+    storage.close()
+
+
+def test_label_and_score_queries(storage):
+    storage.save_prediction_with_detections("uid-4", "o", "p", [{"label": "cat", "score": 0.95, "box": [0, 0, 1, 1]}])
+    storage.save_prediction_with_detections("uid-5", "o", "p", [{"label": "dog", "score": 0.3, "box": [0, 0, 1, 1]}])
+
+    assert [p["uid"] for p in storage.get_predictions_by_label("cat")] == ["uid-4"]
+    assert [p["uid"] for p in storage.get_predictions_by_score(0.9)] == ["uid-4"]
+    assert storage.get_prediction_image_path("uid-5") == "p"
+    assert storage.get_prediction("missing") is None
+
+
+def test_connections_use_wal(storage):
+    mode = storage._connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_concurrent_readers_and_writers(storage):
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(50):
+                storage.save_prediction_with_detections(f"w{n}-{i}", "o", "p", make_detections(5))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(100):
+                storage.get_predictions_by_label("car")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(storage.get_predictions_by_label("car")) == 200
+
+
+def test_label_pages_are_newest_first_without_gaps(storage):
+    for i in range(12):
+        storage.save_prediction_with_detections(f"uid-{i:02d}", "o", "p", make_detections(3))
+
+    seen, cursor = [], None
+    while True:
+        page = storage.get_predictions_by_label_page("car", 5, cursor)
+        seen += [item["uid"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"uid-{i:02d}" for i in reversed(range(12))]
+
+
+def test_score_page_respects_limit(storage):
+    for i in range(3):
+        storage.save_prediction_with_detections(f"uid-{i}", "o", "p", make_detections(2))
+
+    page = storage.get_predictions_by_score_page(0.5, 2)
+    assert len(page["items"]) == 2
+    assert page["next_cursor"]
+    assert len(storage.get_predictions_by_score_page(0.5, 2, page["next_cursor"])["items"]) == 1
+
+
+def test_invalid_cursor_is_rejected(storage):
+    with pytest.raises(InvalidCursor):
+        storage.get_predictions_by_label_page("car", 5, "bogus")
+
+
+def test_saved_record_matches_what_is_read_back(storage):
+    record = storage.save_prediction_with_detections("uid-r", "o.jpg", "p.jpg", make_detections(3))
+    assert record == storage.get_prediction("uid-r")
+
+    records = storage.save_predictions_with_detections([
+        {"uid": f"bulk-r{i}", "original_image": "o.jpg", "predicted_image": "p.jpg", "detections": make_detections(i)}
+        for i in range(3)
+    ])
+    assert records == [storage.get_prediction(f"bulk-r{i}") for i in range(3)]
@@ -0,0 +1,107 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+
+from transfers import UploadQueue, UploadQueueFull
+
+
+class FakeS3:
+    """Records uploaded objects; the first `failures` calls per key raise"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = {}
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def upload_file(self, path, bucket, key, Config=None):
+        with self.lock:
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            if self.attempts[key] <= self.failures:
+                raise ConnectionError("connection reset")
+        with open(path, "rb") as f:
+            self.objects[(bucket, key)] = f.read()
+
+
+class Statuses:
+    def __init__(self):
+        self.statuses = {}
+        self.done = threading.Event()
+
+    def __call__(self, uid, status):
+        self.statuses[uid] = status
+        self.done.set()
+
+
+def make_queue(tmp_path, s3, on_complete, **kwargs):
+    kwargs.setdefault("retry_base_delay", 0.001)
+    return UploadQueue(s3=s3, spool_dir=str(tmp_path / "spool"), on_complete=on_complete, **kwargs)
+
+
+def test_uploads_group_and_reports_status(tmp_path):
+    s3, statuses = FakeS3(failures=1), Statuses()
+    uploads = make_queue(tmp_path, s3, statuses, num_workers=2)
+    uploads.start()
+
+    uploads.submit("uid-1", "bucket", [("original/a.jpg", b"original"), ("predicted/a.jpg", b"predicted")])
+    assert statuses.done.wait(5)
+    uploads.stop(timeout=5)
+
+    assert statuses.statuses == {"uid-1": "uploaded"}
+    assert s3.objects[("bucket", "predicted/a.jpg")] == b"predicted"
+    assert uploads.stats()["retries"] == 2
+    assert uploads.pending() == 0
+    assert os.listdir(tmp_path / "spool") == ["failed"]
+
+
+def test_untracked_uploads_report_no_status(tmp_path):
+    s3, statuses = FakeS3(), Statuses()
+    uploads = make_queue(tmp_path, s3, statuses, num_workers=1)
+    uploads.start()
+
+    uploads.submit(None, "bucket", [("predicted/a_320.webp", b"variant")])
+    uploads.submit("uid-1", "bucket", [("original/a.jpg", b"original")])
+    assert statuses.done.wait(5)
+    uploads.stop(timeout=5)
+
+    assert statuses.statuses == {"uid-1": "uploaded"}
+    assert s3.objects[("bucket", "predicted/a_320.webp")] == b"variant"
+    assert uploads.pending() == 0
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    statuses = Statuses()
+    uploads = make_queue(tmp_path, FakeS3(failures=10), statuses, max_attempts=3)
+    uploads.start()
+
+    uploads.submit("uid-2", "bucket", [("predicted/b.jpg", b"data")])
+    assert statuses.done.wait(5)
+    uploads.stop(timeout=5)
+
+    assert statuses.statuses == {"uid-2": "failed"}
+    assert len(os.listdir(tmp_path / "spool" / "failed")) == 2
+
+
+def test_spooled_uploads_survive_a_restart(tmp_path):
+    # Never started: the job is spooled but nothing uploads it
+    make_queue(tmp_path, FakeS3(), None).submit("uid-3", "bucket", [("original/c.jpg", b"data")])
+
+    s3, statuses = FakeS3(), Statuses()
+    uploads = make_queue(tmp_path, s3, statuses)
+    assert uploads.start() == 1
+    assert statuses.done.wait(5)
+    uploads.stop(timeout=5)
+
+    assert statuses.statuses == {"uid-3": "uploaded"}
+    assert s3.objects[("bucket", "original/c.jpg")] == b"data"
+
+
+def test_rejects_when_full(tmp_path):
+    uploads = make_queue(tmp_path, FakeS3(), None, max_pending=2)
+    uploads.submit("uid-4", "bucket", [("a", b"1")])
+    with pytest.raises(UploadQueueFull):
+        uploads.submit("uid-5", "bucket", [("b", b"2"), ("c", b"3")])
+    assert uploads.pending() == 1
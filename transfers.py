@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from boto3.s3.transfer import TransferConfig
+
+from clients import s3_client
+
+logger = logging.getLogger("uploads")
+
+MB = 1024 * 1024
+
+PENDING = "pending"
+UPLOADED = "uploaded"
+FAILED = "failed"
+
+
+class UploadQueueFull(Exception):
+    """Raised by UploadQueue.submit when the backlog is at capacity"""
+
+
+def transfer_config(multipart_threshold_mb: float = 8, multipart_chunksize_mb: float = 8,
+                    max_concurrency: int = 4) -> TransferConfig:
+    """
+    TransferConfig for the upload workers. Annotated images are usually far below the
+    multipart threshold and go up in one PUT; larger objects are split into parts that
+    are sent max_concurrency at a time.
+    """
+    return TransferConfig(multipart_threshold=int(multipart_threshold_mb * MB),
+                          multipart_chunksize=int(multipart_chunksize_mb * MB),
+                          max_concurrency=max_concurrency, use_threads=max_concurrency > 1)
+
+
+class UploadQueue:
+    """
+    Background S3 uploads with a durable local spool.
+
+    submit() writes each file to spool_dir before queueing it, so the caller can
+    return as soon as that local write is done and a restart resumes whatever was
+    still pending. A pool of worker threads uploads from the spool, retrying with
+    exponential backoff and full jitter; after max_attempts the file is moved to
+    spool_dir/failed for inspection instead of being replayed forever.
+
+    Files are submitted in groups per prediction; on_complete(prediction_uid, status)
+    is called once every file of the group is done, with "uploaded" or "failed".
+    Files submitted without a prediction_uid (images derived later, whose upload
+    says nothing about the prediction's own) are uploaded the same way, untracked.
+    """
+
+    def __init__(self, s3=None, spool_dir: str = "upload-spool", num_workers: int = 4,
+                 max_pending: int = 1000, max_attempts: int = 5, retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 30.0, config: Optional[TransferConfig] = None,
+                 on_complete: Optional[Callable[[str, str], None]] = None):
+        self.s3 = s3 or s3_client()
+        self.spool_dir = spool_dir
+        self.failed_dir = os.path.join(spool_dir, "failed")
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.config = config or transfer_config()
+        self.on_complete = on_complete
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._pending = 0
+        # prediction_uid -> [files still to upload, any of them failed]
+        self._groups: Dict[str, list] = {}
+        self._counts = {"submitted": 0, "uploaded": 0, "failed": 0, "retries": 0, "recovered": 0}
+
+    def start(self) -> int:
+        """Requeue files spooled by a previous run and start the workers; returns the number requeued"""
+        recovered = self._recover()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._work, name=f"upload-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return recovered
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after in-flight uploads finish; anything still queued stays spooled for the next start"""
+        self._stopping.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, prediction_uid: Optional[str], bucket: str, files: List[Tuple[str, bytes]]) -> None:
+        """Spool and queue (s3_key, data) uploads for one prediction; raises UploadQueueFull at capacity"""
+        with self._lock:
+            if self._pending + len(files) > self.max_pending:
+                raise UploadQueueFull(f"{self._pending} uploads already pending")
+            self._pending += len(files)
+
+        try:
+            jobs = [self._spool(prediction_uid, bucket, key, data) for key, data in files]
+        except BaseException:
+            with self._lock:
+                self._pending -= len(files)
+            raise
+
+        with self._lock:
+            if prediction_uid is not None:
+                group = self._groups.setdefault(prediction_uid, [0, False])
+                group[0] += len(jobs)
+            self._counts["submitted"] += len(jobs)
+        for job in jobs:
+            self._queue.put(job)
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"pending": self._pending, **self._counts}
+
+    def _paths(self, job_id: str) -> Tuple[str, str]:
+        base = os.path.join(self.spool_dir, job_id)
+        return base + ".json", base + ".bin"
+
+    def _spool(self, prediction_uid: Optional[str], bucket: str, key: str, data: bytes) -> Dict:
+        job = {"id": uuid.uuid4().hex, "prediction_uid": prediction_uid, "bucket": bucket, "key": key}
+        manifest_path, data_path = self._paths(job["id"])
+        with open(data_path, "wb") as f:
+            f.write(data)
+        # The manifest is renamed into place last, so recovery never sees a half-written job
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        return job
+
+    def _recover(self) -> int:
+        jobs = []
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if name.endswith(".json"):
+                try:
+                    with open(path) as f:
+                        job = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("⚠️ Skipping unreadable upload manifest %s: %s", path, e)
+                    continue
+                if os.path.exists(self._paths(job["id"])[1]):
+                    jobs.append(job)
+                else:
+                    os.remove(path)
+            elif name.endswith(".tmp") or (name.endswith(".bin") and not os.path.exists(path[:-4] + ".json")):
+                # Interrupted mid-spool: submit() never returned, so nobody is waiting on it
+                os.remove(path)
+
+        with self._lock:
+            for job in jobs:
+                if job["prediction_uid"] is not None:
+                    group = self._groups.setdefault(job["prediction_uid"], [0, False])
+                    group[0] += 1
+            self._pending += len(jobs)
+            self._counts["recovered"] += len(jobs)
+        for job in jobs:
+            self._queue.put(job)
+        return len(jobs)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None or self._stopping.is_set():
+                return
+            self._process(job)
+
+    def _process(self, job: Dict) -> None:
+        manifest_path, data_path = self._paths(job["id"])
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.s3.upload_file(data_path, job["bucket"], job["key"], Config=self.config)
+                break
+            except Exception as e:
+                if attempt >= self.max_attempts:
+                    logger.error("❌ Giving up on s3://%s/%s after %s attempts: %s",
+                                 job["bucket"], job["key"], attempt, e)
+                    for path in (manifest_path, data_path):
+                        shutil.move(path, os.path.join(self.failed_dir, os.path.basename(path)))
+                    self._finish(job, succeeded=False)
+                    return
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+                logger.warning("⚠️ Upload of s3://%s/%s failed (attempt %s), retrying in %.2fs: %s",
+                               job["bucket"], job["key"], attempt, delay, e)
+                with self._lock:
+                    self._counts["retries"] += 1
+                if self._stopping.wait(delay):
+                    # Shutting down: leave the job spooled for the next start
+                    return
+
+        os.remove(manifest_path)
+        os.remove(data_path)
+        logger.debug("✅ Uploaded s3://%s/%s", job["bucket"], job["key"])
+        self._finish(job, succeeded=True)
+
+    def _finish(self, job: Dict, succeeded: bool) -> None:
+        uid = job["prediction_uid"]
+        with self._lock:
+            self._pending -= 1
+            self._counts["uploaded" if succeeded else "failed"] += 1
+            if uid is None:
+                return
+            group = self._groups[uid]
+            group[0] -= 1
+            group[1] = group[1] or not succeeded
+            if group[0]:
+                return
+            del self._groups[uid]
+            status = FAILED if group[1] else UPLOADED
+
+        if self.on_complete is not None:
+            try:
+                self.on_complete(uid, status)
+            except Exception as e:
+                logger.error("❌ Failed to record upload status %s for %s: %s", status, uid, e)
+
+
+def get_upload_queue(on_complete: Optional[Callable[[str, str], None]] = None) -> Optional[UploadQueue]:
+    """Background upload queue configured from the environment; None when UPLOAD_WORKERS=0"""
+    num_workers = int(os.getenv("UPLOAD_WORKERS", "4"))
+    if num_workers <= 0:
+        return None
+
+    config = transfer_config(
+        multipart_threshold_mb=float(os.getenv("UPLOAD_MULTIPART_THRESHOLD_MB", "8")),
+        multipart_chunksize_mb=float(os.getenv("UPLOAD_MULTIPART_CHUNKSIZE_MB", "8")),
+        max_concurrency=int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4")),
+    )
+    return UploadQueue(
+        spool_dir=os.getenv("UPLOAD_SPOOL_DIR", "upload-spool"),
+        num_workers=num_workers,
+        max_pending=int(os.getenv("UPLOAD_QUEUE_SIZE", "1000")),
+        max_attempts=int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5")),
+        retry_base_delay=float(os.getenv("UPLOAD_RETRY_BASE_DELAY", "0.5")),
+        config=config,
+        on_complete=on_complete,
+    )